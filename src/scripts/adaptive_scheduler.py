@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Adaptive Scheduler
+
+This module computes the interval between workflow loop checks from the
+observed issue arrival rate. Activity (new issues, completed tasks) pulls
+the interval down to the minimum, idle cycles back off exponentially up to
+the maximum, and a smoothed arrival rate caps the interval at the expected
+time until the next arrival.
+"""
+
+import time
+from typing import Optional
+
+
+class AdaptiveScheduler:
+    """Arrival-rate driven check interval with exponential idle backoff."""
+
+    def __init__(self, min_interval: float, max_interval: float, backoff: float = 2.0,
+                 smoothing: float = 0.3, initial: Optional[float] = None):
+        """Initialize the scheduler.
+
+        Args:
+            min_interval: Shortest interval between checks in seconds
+            max_interval: Longest interval between checks in seconds
+            backoff: Factor applied to the interval after an idle cycle
+            smoothing: Weight of the latest cycle in the arrival rate average
+            initial: Interval to start with (defaults to min_interval)
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = max(1.0, backoff)
+        self.smoothing = smoothing
+        self.interval = self._clamp(initial if initial is not None else min_interval)
+        self.rate = 0.0
+        self._events = 0
+        self._last_cycle = None
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def record_event(self, count: int = 1) -> None:
+        """Record activity (new issues or completed tasks) since the last cycle.
+
+        Args:
+            count: Number of events
+        """
+        self._events += max(0, count)
+
+    def next_interval(self, now: Optional[float] = None) -> float:
+        """Finish a cycle and return the interval until the next check.
+
+        Args:
+            now: Current time in seconds (defaults to time.time())
+
+        Returns:
+            Interval in seconds
+        """
+        now = time.time() if now is None else now
+        elapsed = now - self._last_cycle if self._last_cycle is not None else self.interval
+        observed = self._events / elapsed if elapsed > 0 else 0.0
+        self.rate = self.smoothing * observed + (1 - self.smoothing) * self.rate
+
+        if self._events:
+            interval = self.min_interval
+        else:
+            interval = self.interval * self.backoff
+
+        # Don't sleep much longer than the expected time to the next arrival
+        if self.rate > 0:
+            interval = min(interval, 1.0 / self.rate)
+
+        self.interval = self._clamp(interval)
+        self._events = 0
+        self._last_cycle = now
+        return self.interval
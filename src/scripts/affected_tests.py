@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Affected Test Selection
+
+This module selects the tests affected by a change. The files changed
+between the merge base and the working tree are mapped through the import
+graph of the repository (Python imports and relative JavaScript/TypeScript
+imports and requires) to the test files that depend on them, directly or
+transitively. Changes to configuration or the build system, deleted files
+and changes without any affected test fall back to the full suite.
+"""
+
+import os
+import re
+import ast
+import fnmatch
+import subprocess
+from collections import deque
+
+from shard_runner import SKIP_DIRS, detect_framework, discover_test_files
+
+# Constants
+BASE_REFS = ("origin/HEAD", "origin/main", "origin/master")
+PYTHON_EXTENSIONS = (".py",)
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+# Changes to these files can affect any test, so they trigger a full run
+FULL_RUN_PATTERNS = (
+    "package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "npm-shrinkwrap.json",
+    "requirements*.txt", "setup.py", "setup.cfg", "pyproject.toml", "poetry.lock", "Pipfile*",
+    "tox.ini", "pytest.ini", "conftest.py", "jest.config.*", "jest.setup.*", "babel.config.*",
+    ".babelrc", "tsconfig*.json", "Makefile", "Dockerfile", "docker-compose*.yml", ".env*",
+)
+JS_IMPORT = re.compile(
+    r"""(?:\bimport\s+(?:[^'"]*?\s+from\s+)?|\bexport\s+[^'"]*?\s+from\s+|"""
+    r"""\brequire\s*\(\s*|\bimport\s*\(\s*|\bjest\.mock\s*\(\s*)['"]([^'"]+)['"]"""
+)
+
+
+def _git(args, repo_path):
+    return subprocess.run(['git'] + args, cwd=repo_path, capture_output=True, text=True)
+
+
+def merge_base(repo_path, base_ref=None):
+    """Return the merge base of HEAD and the base branch, or None"""
+    for ref in ([base_ref] if base_ref else BASE_REFS):
+        result = _git(['merge-base', 'HEAD', ref], repo_path)
+        if result.returncode == 0:
+            return result.stdout.strip()
+    return None
+
+
+def changed_files(repo_path, base):
+    """Return the files changed since base, including uncommitted and untracked files"""
+    files = set()
+    for args in (['diff', '--name-only', base, 'HEAD'],
+                 ['diff', '--name-only', 'HEAD'],
+                 ['ls-files', '--others', '--exclude-standard']):
+        result = _git(args, repo_path)
+        if result.returncode == 0:
+            files.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return sorted(files)
+
+
+def needs_full_run(path):
+    """Return True if a change to path can affect tests outside the import graph"""
+    name = os.path.basename(path)
+    return path.startswith(".github/") or any(fnmatch.fnmatch(name, pattern)
+                                              for pattern in FULL_RUN_PATTERNS)
+
+
+def source_files(repo_path):
+    """Return the Python and JavaScript/TypeScript files of the repository"""
+    files = []
+    for root, dirs, names in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(names):
+            if name.endswith(PYTHON_EXTENSIONS + JS_EXTENSIONS):
+                files.append(os.path.relpath(os.path.join(root, name), repo_path))
+    return files
+
+
+def _python_modules(files):
+    """Map dotted module names to the files they may refer to
+
+    A module can be imported relative to any parent directory on sys.path
+    (repository root, src/ layouts, scripts added to sys.path by tests), so
+    every suffix of the path is registered. Ambiguous names map to all
+    candidates, which errs on the side of running more tests.
+    """
+    modules = {}
+    for path in files:
+        if not path.endswith(".py"):
+            continue
+        parts = path[:-3].split(os.sep)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        for start in range(len(parts)):
+            modules.setdefault(".".join(parts[start:]), set()).add(path)
+    return modules
+
+
+def _python_imports(path, source, modules):
+    """Return the repository files imported by a Python file"""
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError):
+        return set()
+
+    package = os.path.dirname(path).split(os.sep) if os.path.dirname(path) else []
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                anchor = package[:len(package) - node.level + 1]
+                prefix = ".".join(anchor + ([node.module] if node.module else []))
+            else:
+                prefix = node.module or ""
+            names.append(prefix)
+            names += [f"{prefix}.{alias.name}" if prefix else alias.name for alias in node.names]
+
+    imported = set()
+    for name in names:
+        # Importing a.b.c also imports the packages a and a.b
+        parts = name.split(".")
+        for end in range(1, len(parts) + 1):
+            imported.update(modules.get(".".join(parts[:end]), ()))
+    imported.discard(path)
+    return imported
+
+
+def _resolve_js(path, specifier, known):
+    """Resolve a relative JS import specifier to a repository file"""
+    if not specifier.startswith("."):
+        return None
+    base = os.path.normpath(os.path.join(os.path.dirname(path), specifier))
+    candidates = [base] + [base + ext for ext in JS_EXTENSIONS]
+    candidates += [os.path.join(base, "index" + ext) for ext in JS_EXTENSIONS]
+    for candidate in candidates:
+        if candidate in known:
+            return candidate
+    return None
+
+
+def import_graph(repo_path, files=None):
+    """Return the import graph as {file: set of imported repository files}"""
+    files = files if files is not None else source_files(repo_path)
+    known = set(files)
+    modules = _python_modules(files)
+    graph = {}
+    for path in files:
+        try:
+            with open(os.path.join(repo_path, path), encoding="utf-8", errors="replace") as f:
+                source = f.read()
+        except OSError:
+            continue
+        if path.endswith(".py"):
+            graph[path] = _python_imports(path, source, modules)
+        else:
+            resolved = (_resolve_js(path, match, known) for match in JS_IMPORT.findall(source))
+            graph[path] = {target for target in resolved if target and target != path}
+    return graph
+
+
+def dependents(graph, changed):
+    """Return all files that depend on the changed files, including the changed files"""
+    reverse = {}
+    for path, imports in graph.items():
+        for target in imports:
+            reverse.setdefault(target, set()).add(path)
+
+    seen = set(changed)
+    queue = deque(changed)
+    while queue:
+        for dependent in reverse.get(queue.popleft(), ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                queue.append(dependent)
+    return seen
+
+
+def select_tests(repo_path, test_command, base_ref=None):
+    """Return the test files affected by the change, or None to run the full suite
+
+    Args:
+        repo_path: Repository (or worktree) with the change checked out
+        test_command: Test command; selection supports pytest and jest suites
+        base_ref: Branch to diff against (defaults to the remote's default branch)
+    """
+    repo_path = str(repo_path)
+    framework = detect_framework(test_command, repo_path)
+    if framework is None:
+        print(f"Affected tests: '{test_command}' is not a pytest or jest suite, running all tests")
+        return None
+
+    base = merge_base(repo_path, base_ref)
+    if base is None:
+        print("Affected tests: no merge base found, running all tests")
+        return None
+
+    changed = changed_files(repo_path, base)
+    for path in changed:
+        if needs_full_run(path):
+            print(f"Affected tests: {path} changed, running all tests")
+            return None
+        if not os.path.exists(os.path.join(repo_path, path)):
+            print(f"Affected tests: {path} was removed, running all tests")
+            return None
+
+    tests = set(discover_test_files(repo_path, framework))
+    affected = dependents(import_graph(repo_path), changed)
+    selected = sorted(path for path in affected if path in tests)
+    if not selected:
+        print("Affected tests: no tests depend on the changed files, running all tests")
+        return None
+
+    print(f"Affected tests: {len(changed)} changed files affect {len(selected)} of "
+          f"{len(tests)} test files")
+    return selected
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Commit Bisection
+
+This module finds the commit that made a test fail before the failure is
+reported. The commits between a known good commit and HEAD are searched
+like git bisect, but several commits are tested at once, each in its own
+worktree: with N worktrees every round splits the remaining range into
+N + 1 parts, so the culprit is found in log_(N+1) rounds instead of log_2.
+
+The known good commit is the last commit whose tests passed in a clean
+checkout (recorded by test_and_report), an explicitly given ref or the merge
+base with the default branch.
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+from json_state import locked, load_json, save_json
+from output_capture import excerpt_text
+from affected_tests import merge_base
+from shard_runner import detect_framework
+
+# Constants
+BISECT_JOBS = 4
+MAX_DIFF_CHARS = 20000
+LAST_GOOD_FILE = os.path.expanduser("~/.cache/openhands-workflow/last_good.json")
+# pytest exit codes when the failing test does not exist at a commit: the node ID
+# is not found (usage error) or no tests are collected
+PYTEST_TEST_ABSENT = (4, 5)
+
+
+def _git(args, cwd):
+    """Run a git command and return the completed process"""
+    return subprocess.run(['git'] + args, cwd=cwd, capture_output=True, text=True)
+
+
+def record_good(repo_path, state_file=None):
+    """Remember HEAD as the last good commit if the working tree is clean"""
+    state_file = state_file or LAST_GOOD_FILE
+    status = _git(['status', '--porcelain', '--untracked-files=no'], repo_path)
+    head = _git(['rev-parse', 'HEAD'], repo_path)
+    if status.returncode != 0 or status.stdout.strip() or head.returncode != 0:
+        return None
+    with locked(state_file):
+        state = load_json(state_file)
+        state[os.path.realpath(str(repo_path))] = head.stdout.strip()
+        save_json(state, state_file)
+    return head.stdout.strip()
+
+
+def good_commit(repo_path, good_ref=None, state_file=None):
+    """Return the commit to start bisecting from, or None if there is none"""
+    if good_ref:
+        result = _git(['rev-parse', '--verify', good_ref + '^{commit}'], repo_path)
+        return result.stdout.strip() if result.returncode == 0 else None
+    recorded = load_json(state_file or LAST_GOOD_FILE).get(os.path.realpath(str(repo_path)))
+    # The recorded commit must still be an ancestor of HEAD (no rewritten history)
+    if recorded:
+        ancestor = _git(['merge-base', '--is-ancestor', recorded, 'HEAD'], repo_path)
+        if ancestor.returncode == 0:
+            return recorded
+    return merge_base(str(repo_path))
+
+
+def commit_range(repo_path, good, bad="HEAD"):
+    """Return the first-parent commits after good up to bad, oldest first"""
+    result = _git(['rev-list', '--first-parent', '--reverse', f'{good}..{bad}'], repo_path)
+    if result.returncode != 0:
+        return []
+    return result.stdout.split()
+
+
+def split_points(lo, hi, parts):
+    """Return up to `parts` indices spread evenly strictly between lo and hi"""
+    step = (hi - lo) / float(parts + 1)
+    return sorted({lo + max(1, round(step * (index + 1))) for index in range(parts)
+                   if lo + max(1, round(step * (index + 1))) < hi})
+
+
+def describe_commit(repo_path, sha, max_chars=MAX_DIFF_CHARS):
+    """Return the subject, author, date and an excerpt of the diff of a commit"""
+    info = _git(['show', '-s', '--format=%H%n%an <%ae>%n%aI%n%s', sha], repo_path)
+    full_sha, author, date, subject = (info.stdout.split("\n", 3) + [""] * 4)[:4]
+    diff = _git(['show', '--stat', '--patch', '--format=', sha], repo_path)
+    return {
+        "commit": full_sha or sha,
+        "subject": subject.strip(),
+        "author": author,
+        "date": date,
+        "diff": excerpt_text(diff.stdout.strip(), limit=max_chars),
+    }
+
+
+class Bisector:
+    """Parallel bisection over a pool of worktrees of one repository."""
+
+    def __init__(self, repo_path, good, run, jobs=BISECT_JOBS):
+        """Initialize the bisector.
+
+        Args:
+            repo_path: Repository to bisect
+            good: Commit known to pass
+            run: Callable (test_command, worktree) returning a CompletedProcess or None
+            jobs: Number of commits tested at once (one worktree each)
+        """
+        self.repo_path = str(repo_path)
+        self.good = good
+        self.run = run
+        self.jobs = max(1, jobs)
+        self.worktrees = Queue()
+        self.tmp = None
+
+    def __enter__(self):
+        self.tmp = tempfile.mkdtemp(prefix="bisect-")
+        for index in range(self.jobs):
+            path = os.path.join(self.tmp, f"wt{index}")
+            added = _git(['worktree', 'add', '--detach', path, self.good], self.repo_path)
+            if added.returncode == 0:
+                self.worktrees.put(path)
+        return self
+
+    def __exit__(self, *exc):
+        while not self.worktrees.empty():
+            _git(['worktree', 'remove', '--force', self.worktrees.get()], self.repo_path)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        _git(['worktree', 'prune'], self.repo_path)
+
+    def _test(self, sha, test_command):
+        """Test a commit in a free worktree; returns "good", "bad" or None on errors"""
+        worktree = self.worktrees.get()
+        try:
+            # Ignored files (installed dependencies) are kept between commits
+            if _git(['checkout', '--detach', '--force', sha], worktree).returncode != 0:
+                return None
+            _git(['clean', '-fdq'], worktree)
+            result = self.run(test_command, worktree)
+            if result is None:
+                return None
+            passed = (0,)
+            if detect_framework(test_command, worktree) == "pytest":
+                # A test added after the good commit counts as passing before it existed
+                passed += PYTEST_TEST_ABSENT
+            return "good" if result.returncode in passed else "bad"
+        finally:
+            self.worktrees.put(worktree)
+
+    def _test_all(self, commits, test_command):
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(lambda sha: self._test(sha, test_command), commits))
+
+    def find(self, test_command):
+        """Return the first commit after the good commit that fails test_command
+
+        Returns:
+            A dict with the commit, subject, author, date and diff excerpt plus
+            the number of rounds and tested commits, or None if the failure
+            can't be pinned to a commit (e.g. HEAD passes in a clean checkout)
+        """
+        if self.worktrees.empty():
+            print("Bisect: could not create worktrees")
+            return None
+        commits = commit_range(self.repo_path, self.good)
+        if not commits:
+            print("Bisect: no commits after the last good commit")
+            return None
+        print(f"Bisecting {len(commits)} commits after {self.good[:7]} with {self.jobs} "
+              f"parallel worktrees: {test_command}")
+
+        # The first round also confirms both ends of the range
+        lo, hi = -1, len(commits) - 1
+        points = split_points(lo, hi, max(1, self.jobs - 2))
+        outcomes = self._test_all([self.good, commits[hi]] + [commits[index] for index in points],
+                                  test_command)
+        if outcomes[:2] != ["good", "bad"]:
+            print(f"Bisect: expected the good commit to pass and HEAD to fail, got {outcomes[:2]}")
+            return None
+        outcomes = outcomes[2:]
+        tested = len(points) + 2
+        rounds = 1
+
+        while True:
+            if None in outcomes:
+                print("Bisect: a commit could not be tested")
+                return None
+            # Narrow to the range between the last passing and the first failing commit
+            bad = [index for index, outcome in zip(points, outcomes) if outcome == "bad"]
+            if bad:
+                hi = bad[0]
+            lo = max([lo] + [index for index, outcome in zip(points, outcomes)
+                             if outcome == "good" and index < hi])
+            if hi - lo <= 1:
+                break
+            points = split_points(lo, hi, self.jobs)
+            outcomes = self._test_all([commits[index] for index in points], test_command)
+            tested += len(points)
+            rounds += 1
+
+        culprit = describe_commit(self.repo_path, commits[hi])
+        culprit.update({"good": self.good, "rounds": rounds, "tested": tested})
+        print(f"Bisect: {culprit['commit'][:7]} ({culprit['subject']}) is the first failing "
+              f"commit; {tested} commits tested in {rounds} rounds")
+        return culprit
@@ -3,107 +3,202 @@
 Check PR Script
 
 This script checks a pull request for test failures and comments on the PR.
+The PR is checked out into its own cached git worktree, so the repository's
+working tree is left alone and several PRs can be checked at the same time.
+With --sticky-comment, one result comment per PR is updated in place.
 """
 
 import subprocess
 import sys
 import os
 import json
+import time
+import shutil
 import argparse
+import tempfile
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from github_batch import GitHubWriteBatcher, repository_for_path
+from github_limits import run_gh
+from output_capture import excerpt_text
+from shard_runner import restrict_command
+from affected_tests import select_tests
+from result_cache import POLICIES, MAX_AGE_HOURS, cached_run
+from test_runner import (add_runner_arguments, runner_options, run_tests,
+                         install_dependencies, isolated_environment)
+from pr_worktree import WORKTREE_DIR, KEEP_DAYS, checkout_worktree, prune_worktrees
+from report_parser import collect_failures
+from flaky_detector import RERUNS, RERUN_JOBS, FlakyHistory, confirm_failures
+from sticky_comment import post_sticky_comment
+
+# Constants
+CHECK_STATE_FILE = os.path.expanduser("~/.cache/openhands-workflow/pr_checks.json")
+MAX_JOBS = 4
 
 
 def parse_args():
     """Parse command line arguments"""
-    parser = argparse.ArgumentParser(description='Check a PR for test failures')
-    parser.add_argument('pr_number', type=str, help='PR number to check')
+    parser = argparse.ArgumentParser(description='Check PRs for test failures')
+    parser.add_argument('pr_numbers', type=str, nargs='*', metavar='pr_number',
+                        help='PR numbers to check: single numbers, lists (12,15) or ranges (10-20)')
+    parser.add_argument('--all-open', action='store_true',
+                        help='Check all open PRs')
+    parser.add_argument('--label', type=str,
+                        help='Check all open PRs with this label')
+    parser.add_argument('--jobs', type=int, default=MAX_JOBS,
+                        help='Number of PRs checked in parallel in batch mode')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='Skip PRs whose head was already checked')
+    parser.add_argument('--state-file', type=str, default=CHECK_STATE_FILE,
+                        help='File recording the head commit of each checked PR')
     parser.add_argument('--repo-path', type=str, default=os.getcwd(),
                         help='Path to the repository')
     parser.add_argument('--test-command', type=str, default='npm test',
                         help='Command to run tests')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Run pytest/jest test files in N parallel processes (0: one per CPU)')
+    parser.add_argument('--test-cache', choices=POLICIES, default='off',
+                        help='Reuse test results of identical trees: off, reuse-passed, '
+                             'reuse-all or refresh (default: off)')
+    parser.add_argument('--test-cache-max-age', type=float, default=MAX_AGE_HOURS,
+                        help='Ignore cached test results older than this many hours')
+    parser.add_argument('--affected-only', action='store_true',
+                        help='Only run tests that depend on the changed files '
+                             '(falls back to all tests for config/build changes)')
+    parser.add_argument('--base-ref', type=str,
+                        help='Branch to diff against for --affected-only (default: origin/HEAD)')
     parser.add_argument('--auto-approve', action='store_true',
                         help='Automatically approve PR if tests pass')
-    return parser.parse_args()
-
-
-def checkout_pr(pr_number, repo_path):
-    """Checkout the PR branch locally"""
-    print(f"Checking out PR #{pr_number} in {repo_path}...")
-
-    # Change to the repository directory
-    original_dir = os.getcwd()
-    os.chdir(repo_path)
-
+    parser.add_argument('--reruns', type=int, default=RERUNS,
+                        help='Rerun each failing test N times in isolation; PRs whose failures '
+                             'all pass on a rerun are reported as flaky (0: no reruns)')
+    parser.add_argument('--rerun-jobs', type=int, default=RERUN_JOBS,
+                        help='Number of reruns running in parallel')
+    parser.add_argument('--batch-writes', action='store_true',
+                        help='Send the comment and approval as one batched GraphQL request')
+    parser.add_argument('--sticky-comment', action='store_true',
+                        help='Update one result comment per PR with the changes since the last '
+                             'check instead of adding a new comment')
+    parser.add_argument('--worktree-dir', type=str, default=WORKTREE_DIR,
+                        help='Directory for the cached PR worktrees')
+    parser.add_argument('--keep-days', type=float, default=KEEP_DAYS,
+                        help='Remove PR worktrees that were not used for this many days')
+    add_runner_arguments(parser)
+    args = parser.parse_args()
+    if not args.pr_numbers and not args.all_open and not args.label:
+        parser.error('Expected PR numbers, --all-open or --label')
+    return args
+
+
+def parse_pr_numbers(values):
+    """Parse PR arguments into explicit numbers and ranges
+
+    Returns:
+        (numbers, ranges) where ranges is a list of (first, last) tuples
+    """
+    numbers = []
+    ranges = []
+    for value in values:
+        for part in value.split(","):
+            part = part.strip().lstrip("#")
+            if not part:
+                continue
+            if "-" in part:
+                first, last = (int(bound) for bound in part.split("-", 1))
+                ranges.append((min(first, last), max(first, last)))
+            else:
+                numbers.append(int(part))
+    return numbers, ranges
+
+
+def list_open_prs(repo_path, label=None):
+    """Return the open PRs as dicts with number, updatedAt and headRefOid"""
+    command = ['gh', 'pr', 'list', '--state', 'open', '--limit', '1000',
+               '--json', 'number,updatedAt,headRefOid']
+    if label:
+        command += ['--label', label]
+    result = run_gh(command, cwd=repo_path)
+    if result.returncode != 0:
+        print(f"Error listing PRs: {result.stderr}")
+        return None
     try:
-        # Fetch the PR
-        fetch_result = subprocess.run(
-            ['git', 'fetch', 'origin', f'pull/{pr_number}/head:pr-{pr_number}'],
-            capture_output=True,
-            text=True
-        )
-
-        if fetch_result.returncode != 0:
-            print(f"Error fetching PR: {fetch_result.stderr}")
-            os.chdir(original_dir)
-            return False
-
-        # Checkout the PR branch
-        checkout_result = subprocess.run(
-            ['git', 'checkout', f'pr-{pr_number}'],
-            capture_output=True,
-            text=True
-        )
-
-        if checkout_result.returncode != 0:
-            print(f"Error checking out PR: {checkout_result.stderr}")
-            os.chdir(original_dir)
-            return False
-
-        print(f"Successfully checked out PR #{pr_number}")
-        return True
-    except Exception as e:
-        print(f"Error during checkout: {e}")
-        os.chdir(original_dir)
-        return False
-
-
-def run_tests(test_command, repo_path):
-    """Run tests on the PR branch"""
-    print(f"Running tests with command: {test_command}")
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        print(f"Error parsing PR list: {result.stdout}")
+        return None
 
-    # Change to the repository directory if not already there
-    original_dir = os.getcwd()
-    if original_dir != repo_path:
-        os.chdir(repo_path)
 
+def load_check_state(state_file, repo_path):
+    """Return the recorded checks of a repository by PR number"""
     try:
-        # Run the test command
-        test_result = subprocess.run(
-            test_command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-
-        # Change back to the original directory
-        if original_dir != repo_path:
-            os.chdir(original_dir)
-
-        return test_result
-    except Exception as e:
-        print(f"Error running tests: {e}")
-        # Change back to the original directory
-        if original_dir != repo_path:
-            os.chdir(original_dir)
-        return None
+        with open(state_file) as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return state.get(str(repo_path), {})
 
 
-def comment_on_pr(pr_number, message, success, repo_path):
-    """Add a comment to the PR with test results"""
+def save_check_state(state_file, repo_path, checks):
+    """Record the checks of a repository"""
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        state = {}
+    state[str(repo_path)] = checks
+    os.makedirs(os.path.dirname(os.path.abspath(state_file)), exist_ok=True)
+    with open(state_file, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def prioritize_prs(prs, checks):
+    """Order PRs so that new heads come first, most recently updated first
+
+    Args:
+        prs: PR dicts with number, updatedAt and headRefOid
+        checks: Recorded checks by PR number (string keys)
+
+    Returns:
+        (changed, unchanged) lists of PR dicts
+    """
+    changed = []
+    unchanged = []
+    for pr in prs:
+        check = checks.get(str(pr["number"]))
+        head = pr.get("headRefOid")
+        if check and head and check.get("head") == head:
+            unchanged.append(pr)
+        else:
+            changed.append(pr)
+    changed.sort(key=lambda pr: pr.get("updatedAt") or "", reverse=True)
+    unchanged.sort(key=lambda pr: pr.get("updatedAt") or "", reverse=True)
+    return changed, unchanged
+
+
+def comment_on_pr(pr_number, message, success, repo_path, writer=None, flaky=None,
+                  sticky=False, failing=(), head=None):
+    """Add a comment to the PR with test results
+
+    flaky lists the IDs of failing tests that passed when rerun; if all
+    failures were flaky, the comment says so instead of reporting a failure.
+    With sticky, the PR's result comment is updated with the changes since
+    the last check of the failing tests instead.
+    """
     print("Adding comment to PR...")
 
     # Set the comment prefix based on success
     prefix = "✅ Tests passed!" if success else "❌ Tests failed!"
+    if flaky:
+        if not success:
+            prefix = "⚠️ Tests failed only in flaky tests!"
+        prefix += "\n\nThese tests failed but passed when rerun:\n" + "\n".join(
+            f"- `{test_id}`" for test_id in flaky)
+
+    if sticky:
+        status = "passed" if success else "flaky" if flaky else "failed"
+        return post_sticky_comment(pr_number, "check-pr", prefix, status, message, repo_path,
+                                   failing, head, writer)
 
     comment_body = f"""
 {prefix}
@@ -114,12 +209,16 @@ def comment_on_pr(pr_number, message, success, repo_path):
 ```
 """
 
-    # Add comment using GitHub CLI
-    result = subprocess.run(
-        ['gh', 'pr', 'comment', pr_number, '--body', comment_body],
-        cwd=repo_path,
-        capture_output=True,
-        text=True
+    # Queue the comment if writes are batched
+    if writer:
+        writer.comment(pr_number, comment_body)
+        return True
+
+    # Add comment using GitHub CLI; the body is passed on stdin to stay clear of ARG_MAX
+    result = run_gh(
+        ['gh', 'pr', 'comment', pr_number, '--body-file', '-'],
+        input=comment_body,
+        cwd=repo_path
     )
 
     if result.returncode != 0:
@@ -130,15 +229,18 @@ def comment_on_pr(pr_number, message, success, repo_path):
     return True
 
 
-def approve_pr(pr_number, repo_path):
+def approve_pr(pr_number, repo_path, writer=None):
     """Approve the PR if tests pass"""
     print(f"Approving PR #{pr_number}...")
 
-    result = subprocess.run(
+    # Queue the approval if writes are batched
+    if writer:
+        writer.approve(pr_number, "Automated approval: All tests passed.")
+        return True
+
+    result = run_gh(
         ['gh', 'pr', 'review', pr_number, '--approve', '--body', "Automated approval: All tests passed."],
-        cwd=repo_path,
-        capture_output=True,
-        text=True
+        cwd=repo_path
     )
 
     if result.returncode != 0:
@@ -149,51 +251,228 @@ def approve_pr(pr_number, repo_path):
     return True
 
 
-def main():
-    # Parse command line arguments
-    args = parse_args()
-    pr_number = args.pr_number
-    repo_path = Path(args.repo_path).resolve()
+def check_pr(pr_number, repo_path, args, writer=None):
+    """Check out a PR, run its tests, comment and optionally approve
+
+    Returns:
+        A result dict with the PR number, status ("passed", "failed" or
+        "error"), head commit and duration
+    """
+    started = time.time()
+    result = {"number": int(pr_number), "status": "error", "head": None}
+
+    # Check out the PR into its own worktree and run the tests there
+    print(f"Checking out PR #{pr_number} from {repo_path}...")
+    with checkout_worktree(pr_number, repo_path, args.worktree_dir) as worktree:
+        if worktree is None:
+            result["duration"] = time.time() - started
+            return result
+        print(f"Successfully checked out PR #{pr_number} in {worktree}")
+        head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=worktree,
+                              capture_output=True, text=True)
+        result["head"] = head.stdout.strip() or None
+
+        # Install the PR's dependencies, reusing cached environments
+        deps_env = install_dependencies(worktree, args)
+        if deps_env is None:
+            result["duration"] = time.time() - started
+            return result
+
+        # Select the tests affected by the PR if requested
+        test_files = None
+        if args.affected_only:
+            test_files = select_tests(worktree, args.test_command, args.base_ref)
+        cache_command = (restrict_command(args.test_command, worktree, test_files)
+                         if test_files else args.test_command)
+
+        # Let pytest/jest write a report, so failing tests can be rerun on their own
+        report_dir = tempfile.mkdtemp(prefix="test-reports-")
+        try:
+            test_result = cached_run(cache_command, worktree,
+                                     lambda: run_tests(args.test_command, worktree, args.shards,
+                                                       test_files, env=deps_env,
+                                                       report_dir=report_dir,
+                                                       **runner_options(args)),
+                                     args.test_cache, args.test_cache_max_age,
+                                     options=dict(runner_options(args), shards=args.shards),
+                                     report_dir=report_dir)
+
+            failures = []
+            if test_result is not None and test_result.returncode != 0:
+                failures = collect_failures([report_dir], str(worktree))
+
+            # Failures that pass on a rerun don't count against the PR
+            flaky = []
+            if failures and args.reruns > 0:
+                confirmed, flaky = confirm_failures(failures, args.test_command, worktree,
+                                                    args.reruns, args.rerun_jobs,
+                                                    dict(isolated_environment(args.clean_env,
+                                                                              args.pass_env),
+                                                         **deps_env),
+                                                    args.timeout or None)
+                history = FlakyHistory(repo_path)
+                history.record(confirmed, flaky)
+                history.save()
+                if confirmed:
+                    flaky = []
+        finally:
+            shutil.rmtree(report_dir, ignore_errors=True)
 
-    # Ensure the repository path exists
-    if not repo_path.exists() or not repo_path.is_dir():
-        print(f"Error: Repository path {repo_path} does not exist or is not a directory")
-        return 1
-
-    # Checkout the PR
-    if not checkout_pr(pr_number, repo_path):
-        return 1
-
-    # Run tests
-    test_result = run_tests(args.test_command, repo_path)
     if test_result is None:
-        return 1
+        result["duration"] = time.time() - started
+        return result
 
     # Check if tests passed
     tests_passed = test_result.returncode == 0
 
     # Get test output
-    test_output = test_result.stdout if test_result.stdout else test_result.stderr
+    test_output = excerpt_text(test_result.stdout if test_result.stdout else test_result.stderr)
+    if getattr(test_result, "log_path", None):
+        print(f"Full test output: {test_result.log_path}")
 
     # Comment on PR with test results
-    if not comment_on_pr(pr_number, test_output, tests_passed, repo_path):
-        return 1
+    if not comment_on_pr(str(pr_number), test_output, tests_passed, repo_path, writer,
+                         [failure["test_id"] for failure in flaky], args.sticky_comment,
+                         [failure["test_id"] for failure in failures], result["head"]):
+        result["duration"] = time.time() - started
+        return result
 
     # If tests passed and auto-approve is enabled, approve the PR
     if tests_passed and args.auto_approve:
-        if not approve_pr(pr_number, repo_path):
-            return 1
+        if not approve_pr(str(pr_number), repo_path, writer):
+            result["duration"] = time.time() - started
+            return result
         print(f"PR #{pr_number} checked and approved.")
     else:
-        status = "passed" if tests_passed else "failed"
+        status = "passed" if tests_passed else "flaky" if flaky else "failed"
         approval = "" if not args.auto_approve else " Not approved due to test failures."
         print(f"PR #{pr_number} checked. Tests {status}.{approval}")
 
-    # Return to previous branch
-    subprocess.run(['git', 'checkout', '-'], cwd=repo_path, capture_output=True)
+    result["status"] = "passed" if tests_passed else "flaky" if flaky else "failed"
+    result["duration"] = time.time() - started
+    return result
+
+
+def select_prs(args, repo_path, checks):
+    """Return the PR numbers to check, in the order they should be checked
+
+    Explicit numbers are checked even if they are not open; ranges, --label
+    and --all-open select from the open PRs.
+    """
+    numbers, ranges = parse_pr_numbers(args.pr_numbers)
+
+    open_prs = []
+    if args.all_open or args.label or ranges or args.skip_unchanged:
+        open_prs = list_open_prs(repo_path, args.label)
+        if open_prs is None:
+            return None
+    by_number = {pr["number"]: pr for pr in open_prs}
+
+    if numbers or ranges:
+        selected = {number: by_number.get(number, {"number": number}) for number in numbers
+                    if number in by_number or not args.label}
+        for pr in open_prs:
+            if any(first <= pr["number"] <= last for first, last in ranges):
+                selected[pr["number"]] = pr
+    else:
+        selected = by_number
+
+    changed, unchanged = prioritize_prs(list(selected.values()), checks)
+    if args.skip_unchanged:
+        for pr in unchanged:
+            print(f"Skipping PR #{pr['number']}: head {pr['headRefOid'][:7]} was already checked")
+        unchanged = []
+    return [pr["number"] for pr in changed + unchanged]
+
+
+def print_summary(results):
+    """Print the aggregated result of a batch check"""
+    print("")
+    print(f"{'PR':>6}  {'Result':<8} {'Duration':>9}  Head")
+    for result in sorted(results, key=lambda result: result["number"]):
+        head = (result.get("head") or "")[:7]
+        print(f"{'#' + str(result['number']):>6}  {result['status']:<8} "
+              f"{result['duration']:>8.1f}s  {head}")
+    counts = {status: sum(1 for result in results if result["status"] == status)
+              for status in ("passed", "flaky", "failed", "error")}
+    print(f"\nChecked {len(results)} PRs: {counts['passed']} passed, {counts['flaky']} flaky, "
+          f"{counts['failed']} failed, {counts['error']} errors")
 
-    return 0 if tests_passed else 1
+
+def main():
+    # Parse command line arguments
+    args = parse_args()
+    repo_path = Path(args.repo_path).resolve()
+
+    # Ensure the repository path exists
+    if not repo_path.exists() or not repo_path.is_dir():
+        print(f"Error: Repository path {repo_path} does not exist or is not a directory")
+        return 1
+
+    # Work out which PRs to check; PRs updated since their last check come first
+    checks = load_check_state(args.state_file, repo_path)
+    try:
+        pr_numbers = select_prs(args, repo_path, checks)
+    except ValueError as e:
+        print(f"Error: Invalid PR number: {e}")
+        return 1
+    if pr_numbers is None:
+        return 1
+    if not pr_numbers:
+        print("No PRs to check.")
+        return 0
+
+    # Collect GitHub writes into one batch if requested
+    writer = None
+    if args.batch_writes:
+        repository = repository_for_path(str(repo_path))
+        if not repository:
+            return 1
+        writer = GitHubWriteBatcher(repository, cwd=str(repo_path), background=False)
+
+    # Check the PRs, several at a time in batch mode
+    if len(pr_numbers) == 1:
+        results = [check_pr(pr_numbers[0], repo_path, args, writer)]
+    else:
+        print(f"Checking {len(pr_numbers)} PRs with {args.jobs} parallel jobs: "
+              + ", ".join(f"#{number}" for number in pr_numbers))
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            results = list(executor.map(lambda number: check_pr(number, repo_path, args, writer),
+                                        pr_numbers))
+
+    # Remove worktrees of PRs that were not checked for a while
+    for path in prune_worktrees(repo_path, args.keep_days, args.worktree_dir):
+        print(f"Removed unused worktree {path}")
+
+    # Send the batched writes and report each outcome
+    writes_ok = True
+    if writer:
+        items = writer.flush()
+        for item in items:
+            if not item.ok:
+                print(f"Error: GitHub {item.kind} on #{item.number} failed: {item.error}")
+                for result in results:
+                    if result["number"] == item.number:
+                        result["status"] = "error"
+        writes_ok = all(item.ok for item in items)
+
+    # Remember which head was checked so unchanged PRs can be skipped next time
+    for result in results:
+        if result["status"] != "error" and result["head"]:
+            checks[str(result["number"])] = {"head": result["head"], "status": result["status"],
+                                             "checked_at": time.time()}
+    try:
+        save_check_state(args.state_file, repo_path, checks)
+    except OSError as e:
+        print(f"Warning: Could not save PR check state: {e}")
+
+    if len(results) > 1:
+        print_summary(results)
+
+    if not writes_ok:
+        return 1
+    return 0 if all(result["status"] in ("passed", "flaky") for result in results) else 1
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
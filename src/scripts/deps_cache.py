@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Dependency Cache
+
+This module installs the dependencies of a repository before its tests run
+and caches the installed environment by the hash of its lockfile. Supported
+are npm (package-lock.json), yarn (yarn.lock), poetry (poetry.lock) and pip
+(requirements.txt); node_modules and .venv are cached. Cached environments
+are cloned copy-on-write (reflink) into the repository or worktree where the
+file system supports it, hardlinked otherwise. A directory whose dependencies
+already match the lockfile is left alone, so warm runs skip installation
+entirely. The cache is evicted least recently used first once it grows
+beyond a size budget.
+
+Python environments are built at their cache location and keep pointing at
+it, since virtualenvs are not relocatable; an evicted environment is simply
+installed again on the next run.
+
+Running this module as a script lists or clears cache entries, or installs
+the dependencies of a repository.
+"""
+
+import os
+import sys
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import subprocess
+
+from json_state import locked, load_json, save_json
+from result_cache import environment_fingerprint
+
+# Constants
+CACHE_DIR = os.environ.get(
+    "DEPS_CACHE_DIR",
+    os.path.expanduser("~/.cache/openhands-workflow/deps")
+)
+BUDGET_MB = 10 * 1024
+MARKER = ".openhands-deps"
+# (name, lockfile and manifest, environment directory, install command)
+ECOSYSTEMS = (
+    ("npm", ("package-lock.json", "package.json"), "node_modules", "npm ci"),
+    ("yarn", ("yarn.lock", "package.json"), "node_modules", "yarn install --frozen-lockfile"),
+    ("poetry", ("poetry.lock", "pyproject.toml"), ".venv",
+     "poetry install --no-root --no-interaction"),
+    ("pip", ("requirements.txt",), ".venv", "pip install -r requirements.txt"),
+)
+
+
+def detect_ecosystems(repo_path):
+    """Return the ecosystems of a repository, at most one per environment directory"""
+    found = {}
+    for ecosystem in ECOSYSTEMS:
+        name, files, env_dir, _ = ecosystem
+        if env_dir not in found and os.path.isfile(os.path.join(repo_path, files[0])):
+            found[env_dir] = ecosystem
+    return list(found.values())
+
+
+def dependency_key(repo_path, ecosystem):
+    """Return the cache key of an ecosystem's dependencies in a repository"""
+    name, files, _, command = ecosystem
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file.encode("utf-8") + b"\0")
+        try:
+            with open(os.path.join(repo_path, file), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    digest.update(environment_fingerprint(command.split()[0]).encode("utf-8"))
+    return f"{name}-{digest.hexdigest()[:32]}"
+
+
+def _read_marker(env_path):
+    try:
+        with open(os.path.join(env_path, MARKER)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_marker(env_path, key):
+    # Replace the file so a hardlinked marker in the cache is not changed
+    tmp = os.path.join(env_path, MARKER + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(key + "\n")
+    os.replace(tmp, os.path.join(env_path, MARKER))
+
+
+def _remove(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def clone_tree(source, target):
+    """Clone a directory tree; returns "reflink", "hardlink" or "copy"
+
+    Reflinks share the data copy-on-write. Hardlinks share the files
+    themselves, which is safe as long as installers replace files instead of
+    writing into them, as npm and pip do.
+    """
+    _remove(target)
+    if sys.platform.startswith("linux"):
+        result = subprocess.run(['cp', '-a', '--reflink=always', source, target],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            return "reflink"
+        _remove(target)
+    try:
+        shutil.copytree(source, target, symlinks=True, copy_function=os.link)
+        return "hardlink"
+    except OSError:
+        # Cache and repository are on different file systems
+        _remove(target)
+        shutil.copytree(source, target, symlinks=True)
+        return "copy"
+
+
+def tree_size(path):
+    """Return the size of all files below a directory in bytes"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _load_entry(cache_dir, key):
+    return load_json(os.path.join(cache_dir, f"{key}.json")) or None
+
+
+def _save_entry(cache_dir, entry):
+    save_json(entry, os.path.join(cache_dir, f"{entry['key']}.json"))
+
+
+def _install(repo_path, ecosystem, entry_path):
+    """Install an ecosystem's dependencies into the cache entry at entry_path
+
+    Returns True if the installation succeeded.
+    """
+    name, _, env_dir, command = ecosystem
+    env = dict(os.environ)
+    _remove(entry_path)
+
+    if env_dir == ".venv":
+        # Build the virtualenv where it is cached; virtualenvs can't be moved
+        venv = os.path.join(entry_path, env_dir)
+        result = subprocess.run([sys.executable, '-m', 'venv', venv],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"Error creating virtualenv: {result.stderr}")
+            _remove(entry_path)
+            return False
+        env["VIRTUAL_ENV"] = venv
+        env["PATH"] = os.path.join(venv, "bin") + os.pathsep + env.get("PATH", "")
+        env.pop("PYTHONHOME", None)
+    else:
+        # Start from scratch; installers may write into hardlinked files otherwise
+        _remove(os.path.join(repo_path, env_dir))
+
+    print(f"Installing {name} dependencies: {command}")
+    result = subprocess.run(command, shell=True, cwd=repo_path, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error installing {name} dependencies: {result.stderr[-2000:]}")
+        _remove(entry_path)
+        return False
+
+    if env_dir != ".venv":
+        # node_modules is relocatable, so it is installed in place and then cached
+        staging = entry_path + ".partial"
+        _remove(staging)
+        os.makedirs(staging)
+        clone_tree(os.path.join(repo_path, env_dir), os.path.join(staging, env_dir))
+        os.rename(staging, entry_path)
+    return True
+
+
+def _exclude(repo_path, env_dir):
+    """Keep an environment directory out of git status (and the result cache's tree hash)"""
+    result = subprocess.run(['git', 'rev-parse', '--git-path', 'info/exclude'],
+                            cwd=repo_path, capture_output=True, text=True)
+    if result.returncode != 0:
+        return
+    path = os.path.join(repo_path, result.stdout.strip())
+    pattern = f"/{env_dir}/"
+    try:
+        with open(path) as f:
+            if pattern in f.read().split("\n"):
+                return
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(pattern + "\n")
+
+
+def dependency_env(repo_path, ecosystems):
+    """Return the environment variables that put installed tools on the PATH"""
+    paths = []
+    env = {}
+    for _, _, env_dir, _ in ecosystems:
+        if env_dir == ".venv":
+            env["VIRTUAL_ENV"] = os.path.join(repo_path, env_dir)
+            paths.append(os.path.join(repo_path, env_dir, "bin"))
+        else:
+            paths.append(os.path.join(repo_path, env_dir, ".bin"))
+    if paths:
+        env["PATH"] = os.pathsep.join(paths + [os.environ.get("PATH", "")])
+    return env
+
+
+def ensure_dependencies(repo_path, cache_dir=None, budget_mb=BUDGET_MB):
+    """Make the dependencies of a repository match its lockfiles
+
+    Args:
+        repo_path: Repository or worktree whose dependencies are needed
+        cache_dir: Cache directory (defaults to CACHE_DIR)
+        budget_mb: Evict least recently used entries beyond this size
+
+    Returns:
+        Environment variables for the test run (PATH and VIRTUAL_ENV), or None
+        if an installation failed
+    """
+    repo_path = str(repo_path)
+    cache_dir = cache_dir or CACHE_DIR
+    ecosystems = detect_ecosystems(repo_path)
+    for ecosystem in ecosystems:
+        name, _, env_dir, _ = ecosystem
+        key = dependency_key(repo_path, ecosystem)
+        target = os.path.join(repo_path, env_dir)
+        entry_path = os.path.join(cache_dir, key)
+        _exclude(repo_path, env_dir)
+
+        with locked(entry_path):
+            entry = _load_entry(cache_dir, key)
+            cached = entry and os.path.isdir(os.path.join(entry_path, env_dir))
+            if cached and _read_marker(target) == key:
+                print(f"{name} dependencies are up to date ({env_dir})")
+            else:
+                start = time.time()
+                if not cached:
+                    if not _install(repo_path, ecosystem, entry_path):
+                        return None
+                    entry = {"key": key, "ecosystem": name, "env_dir": env_dir,
+                             "size": tree_size(entry_path), "created": time.time()}
+                    if env_dir == ".venv":
+                        # The worktree links to the environment built in the cache
+                        method = clone_tree(os.path.join(entry_path, env_dir), target)
+                    else:
+                        method = "installed"
+                else:
+                    method = clone_tree(os.path.join(entry_path, env_dir), target)
+                _write_marker(target, key)
+                print(f"{name} dependencies ready in {time.time() - start:.1f}s ({method})")
+            entry["last_used"] = time.time()
+            _save_entry(cache_dir, entry)
+
+        for key_removed in evict(cache_dir, budget_mb, keep={key}):
+            print(f"Evicted cached dependencies {key_removed}")
+    return dependency_env(repo_path, ecosystems)
+
+
+def list_entries(cache_dir=None):
+    """Return all cache entries, most recently used first"""
+    cache_dir = cache_dir or CACHE_DIR
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json"):
+            entry = _load_entry(cache_dir, name[:-len(".json")])
+            if entry:
+                entries.append(entry)
+    return sorted(entries, key=lambda entry: entry.get("last_used", 0), reverse=True)
+
+
+def remove_entry(cache_dir, key):
+    """Remove a cache entry unless it is in use; returns True if it was removed"""
+    path = os.path.join(cache_dir, key)
+    with open(path + ".lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        _remove(path)
+        _remove(os.path.join(cache_dir, f"{key}.json"))
+    _remove(path + ".lock")
+    return True
+
+
+def evict(cache_dir=None, budget_mb=BUDGET_MB, keep=()):
+    """Remove least recently used entries until the cache fits the budget
+
+    Returns the removed keys.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    entries = list_entries(cache_dir)
+    total = sum(entry.get("size", 0) for entry in entries)
+    removed = []
+    for entry in reversed(entries):
+        if total <= budget_mb * 1024 * 1024:
+            break
+        if entry["key"] in keep:
+            continue
+        if remove_entry(cache_dir, entry["key"]):
+            total -= entry.get("size", 0)
+            removed.append(entry["key"])
+    return removed
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Manage the dependency cache')
+    parser.add_argument('command', choices=['list', 'clear', 'install'], help='Command to run')
+    parser.add_argument('--repo-path', type=str, default=os.getcwd(),
+                        help='Repository to install dependencies for (install)')
+    parser.add_argument('--cache-dir', type=str, default=CACHE_DIR,
+                        help='Cache directory')
+    parser.add_argument('--budget-mb', type=int, default=BUDGET_MB,
+                        help='Size budget of the cache in MiB')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'install':
+        installed = ensure_dependencies(args.repo_path, args.cache_dir, args.budget_mb)
+        return 0 if installed is not None else 1
+
+    if args.command == 'clear':
+        removed = evict(args.cache_dir, 0)
+        print(f"Removed {len(removed)} cached dependency environments")
+        return 0
+
+    entries = list_entries(args.cache_dir)
+    if not entries:
+        print(f"No cached dependencies in {args.cache_dir}")
+        return 0
+    for entry in entries:
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("last_used", 0)))
+        print(f"{used}  {entry['key']:<40}  {entry.get('size', 0) / 1024 / 1024:>8.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,16 +9,16 @@ with OpenHands and GPT-CLI.
 import os
 import sys
 import subprocess
+import time
 import argparse
 import json
 import logging
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+from structured_logging import setup_logging
+from health_probe import check_health, print_health
+
+# Logging is configured in main() (queue-based, optional JSON log file)
 logger = logging.getLogger("dev-server-cli-wrapper")
 
 # Constants
@@ -37,6 +37,10 @@ def parse_args():
                         help='Installation directory for Dev-Server-Workflow')
     parser.add_argument('--use-openhands', action='store_true',
                         help='Use OpenHands for assistance')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the result of the health command as JSON')
+    parser.add_argument('--log-file', type=str,
+                        help='Also write JSON logs to this file (rotated and compressed)')
     return parser.parse_args()
 
 
@@ -48,6 +52,7 @@ def run_command(command, cwd=None, shell=False):
         command = command.split()
     
     try:
+        started = time.time()
         result = subprocess.run(
             command,
             cwd=cwd,
@@ -56,9 +61,12 @@ def run_command(command, cwd=None, shell=False):
             capture_output=True,
             text=True
         )
+        logger.debug("Command finished", extra={"stage": "command", "command": str(command),
+                                                 "duration": round(time.time() - started, 3)})
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed with exit code {e.returncode}")
+        logger.error(f"Command failed with exit code {e.returncode}",
+                     extra={"stage": "command", "command": str(command), "exit_code": e.returncode})
         logger.error(f"Error output: {e.stderr}")
         raise
 
@@ -152,6 +160,22 @@ def ask_openhands(prompt):
 def main():
     """Main function"""
     args = parse_args()
+
+    # Set up the non-blocking logging pipeline
+    setup_logging("dev-server-cli-wrapper", log_file=args.log_file)
+
+    # Health checks run in-process and don't need the Dev-Server CLI
+    if args.command == "health":
+        try:
+            health = check_health(args.install_dir, args.args or None)
+        except ValueError as e:
+            logger.error(str(e))
+            return 1
+        if args.json:
+            print(json.dumps(health, indent=2, sort_keys=True))
+        else:
+            print_health(health)
+        return 0 if all(result["state"] == "up" for result in health.values()) else 1
     
     # Check if Dev-Server CLI is installed
     if not check_dev_server_installed():
@@ -8,6 +8,7 @@ It integrates with OpenHands and GPT-CLI to provide a complete workflow.
 
 import os
 import sys
+import shutil
 import subprocess
 import argparse
 import json
@@ -15,22 +16,28 @@ import time
 import logging
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+from structured_logging import setup_logging
+from startup_orchestrator import (COMPONENTS, DEFAULT_PORTS, READY_TIMEOUT, component_url,
+                                  http_probe, start_components, log_report)
+from health_probe import component_env
+from json_state import locked
+from install_state import InstallState, run_step, fingerprint, remote_head
+
+# Logging is configured in main() (queue-based, optional JSON log file)
 logger = logging.getLogger("dev-server-installer")
 
 # Constants
 DEV_SERVER_REPO = "https://github.com/EcoSphereNetwork/Dev-Server-Workflow.git"
 DEV_SERVER_DIR = os.path.expanduser("~/Dev-Server-Workflow")
+OPENHANDS_INTEGRATION_DIR = os.path.expanduser("~/openhands-workspace/dev-server-integration")
+# Bare mirrors shared by all installs on the host, refreshed with incremental fetches
+MIRROR_DIR = os.environ.get("DEV_SERVER_MIRROR_DIR",
+                            os.path.expanduser("~/.cache/openhands-workflow/mirrors"))
+CLONE_DEPTH = 1  # history depth of clones without a mirror (0 for the full history)
+# Refs kept in the mirror; pull request refs (refs/pull/*) are not fetched
+MIRROR_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
 DEFAULT_ENV_VARS = {
-    "N8N_PORT": "5678",
-    "MCP_HUB_PORT": "3000",
-    "FRONTEND_PORT": "8080",
-    "GRAFANA_PORT": "3001",
-    "PROMETHEUS_PORT": "9090",
+    **DEFAULT_PORTS,
     "OPENHANDS_API_KEY": "",
     "GITHUB_TOKEN": "",
     "GITLAB_TOKEN": "",
@@ -53,8 +60,20 @@ def parse_args():
                         help='Install and setup the Dev-Server CLI')
     parser.add_argument('--env-file', type=str,
                         help='Path to custom .env file')
+    parser.add_argument('--no-mirror', action='store_false', dest='mirror',
+                        help='Clone from GitHub without the local mirror cache')
+    parser.add_argument('--clone-depth', type=int, default=CLONE_DEPTH,
+                        help=f'History depth of clones without a mirror '
+                             f'(default: {CLONE_DEPTH}, 0 for all)')
     parser.add_argument('--components', type=str, default="all",
                         help='Comma-separated list of components to install (default: all)')
+    parser.add_argument('--force', action='store_true',
+                        help='Run all installation steps, even those unchanged since the last run')
+    parser.add_argument('--ready-timeout', type=int, default=READY_TIMEOUT,
+                        help=f'Seconds each component may take to become ready '
+                             f'(default: {READY_TIMEOUT})')
+    parser.add_argument('--log-file', type=str,
+                        help='Also write JSON logs to this file (rotated and compressed)')
     return parser.parse_args()
 
 
@@ -66,6 +85,7 @@ def run_command(command, cwd=None, shell=False):
         command = command.split()
     
     try:
+        started = time.time()
         result = subprocess.run(
             command,
             cwd=cwd,
@@ -74,15 +94,73 @@ def run_command(command, cwd=None, shell=False):
             capture_output=True,
             text=True
         )
+        logger.debug("Command finished", extra={"stage": "command", "command": str(command),
+                                                 "duration": round(time.time() - started, 3)})
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed with exit code {e.returncode}")
+        logger.error(f"Command failed with exit code {e.returncode}",
+                     extra={"stage": "command", "command": str(command), "exit_code": e.returncode})
         logger.error(f"Error output: {e.stderr}")
         raise
 
 
-def clone_repository(install_dir):
-    """Clone the Dev-Server-Workflow repository"""
+def configure_mirror(mirror):
+    """Restrict the mirror to branches and tags
+
+    Mirrors made by older versions with `git clone --mirror` fetched all
+    refs; their pull request refs are removed here as well.
+    """
+    run_command(["git", "config", "remote.origin.mirror", "false"], cwd=mirror)
+    run_command(["git", "config", "--replace-all", "remote.origin.fetch", MIRROR_REFSPECS[0]],
+                cwd=mirror)
+    for refspec in MIRROR_REFSPECS[1:]:
+        run_command(["git", "config", "--add", "remote.origin.fetch", refspec], cwd=mirror)
+    refs = run_command(["git", "for-each-ref", "--format=%(refname)", "refs/pull"], cwd=mirror)
+    for ref in refs.splitlines():
+        run_command(["git", "update-ref", "-d", ref], cwd=mirror)
+
+
+def refresh_mirror(repo_url, mirror_dir=None):
+    """Create or update the local bare mirror of a repository
+
+    The first call clones the mirror; later calls only fetch new objects.
+    Only branches and tags are mirrored (see MIRROR_REFSPECS).
+
+    Returns:
+        The path of the mirror, or None if there is no usable mirror
+    """
+    name = repo_url.rstrip("/").split("/")[-1]
+    if not name.endswith(".git"):
+        name += ".git"
+    mirror = os.path.join(mirror_dir or MIRROR_DIR, name)
+    with locked(mirror):
+        try:
+            if os.path.exists(os.path.join(mirror, "HEAD")):
+                logger.info(f"Updating mirror {mirror}")
+                configure_mirror(mirror)
+                run_command(["git", "remote", "update", "--prune"], cwd=mirror)
+            else:
+                logger.info(f"Creating mirror {mirror}")
+                run_command(["git", "clone", "--bare", repo_url, mirror])
+                configure_mirror(mirror)
+        except (OSError, subprocess.CalledProcessError):
+            # A stale mirror still saves most of the download
+            if not os.path.exists(os.path.join(mirror, "HEAD")):
+                logger.warning("Could not create the mirror, cloning without it")
+                return None
+            logger.warning("Could not update the mirror, using it as it is")
+    return mirror
+
+
+def clone_repository(install_dir, mirror=True, depth=CLONE_DEPTH):
+    """Clone the Dev-Server-Workflow repository
+
+    With the mirror cache, the mirror is brought up to date with one
+    incremental fetch and the install is cloned from it locally (git
+    hardlinks the objects where it can). The install doesn't depend on the
+    mirror afterwards. Without it, a shallow blob-less clone is made from
+    GitHub.
+    """
     logger.info(f"Cloning Dev-Server-Workflow repository to {install_dir}")
     
     if os.path.exists(install_dir):
@@ -101,19 +179,30 @@ def clone_repository(install_dir):
             sys.exit(1)
         
         # Delete the directory
-        import shutil
         shutil.rmtree(install_dir)
     
     # Create parent directory if it doesn't exist
     os.makedirs(os.path.dirname(install_dir), exist_ok=True)
     
     # Clone the repository
-    run_command(["git", "clone", DEV_SERVER_REPO, install_dir])
+    mirror_path = refresh_mirror(DEV_SERVER_REPO) if mirror else None
+    if mirror_path:
+        run_command(["git", "clone", mirror_path, install_dir])
+        run_command(["git", "remote", "set-url", "origin", DEV_SERVER_REPO], cwd=install_dir)
+    else:
+        command = ["git", "clone", "--filter=blob:none"]
+        if depth:
+            command += ["--depth", str(depth)]
+        run_command(command + [DEV_SERVER_REPO, install_dir])
     logger.info("Repository cloned successfully")
 
 
 def create_env_file(install_dir, env_file=None):
-    """Create .env file for the Dev-Server-Workflow"""
+    """Create .env file for the Dev-Server-Workflow
+
+    A custom .env file is always copied; otherwise an existing .env file,
+    which usually holds the user's edits, is kept as it is.
+    """
     logger.info("Creating .env file")
     
     env_path = os.path.join(install_dir, ".env")
@@ -121,17 +210,13 @@ def create_env_file(install_dir, env_file=None):
     # If a custom .env file is provided, copy it
     if env_file and os.path.exists(env_file):
         logger.info(f"Using custom .env file from {env_file}")
-        import shutil
         shutil.copy(env_file, env_path)
         return
     
-    # Check if .env file already exists
+    # Keep an existing .env file
     if os.path.exists(env_path):
-        logger.info(f".env file already exists at {env_path}")
-        response = input("Do you want to overwrite the existing .env file? (y/n): ")
-        if response.lower() != "y":
-            logger.info("Keeping existing .env file")
-            return
+        logger.info(f"Keeping existing .env file at {env_path}")
+        return
     
     # Create .env file from template
     template_path = os.path.join(install_dir, "src", "env-template")
@@ -148,46 +233,69 @@ def create_env_file(install_dir, env_file=None):
         return
     
     # Copy template to .env
-    import shutil
     shutil.copy(template_path, env_path)
     logger.info(f".env file created from template at {env_path}")
     logger.warning("Please edit the .env file and fill in the required values")
 
 
-def docker_installation(install_dir, start=False, components="all"):
-    """Perform Docker installation of Dev-Server-Workflow"""
+def docker_installation(install_dir, start=False, components="all", ready_timeout=READY_TIMEOUT,
+                        state=None):
+    """Perform Docker installation of Dev-Server-Workflow
+
+    With an InstallState, preparing the script and the setup are skipped
+    while their inputs are unchanged; the containers are always started.
+    """
     logger.info("Performing Docker installation")
     
-    # Check if Docker is installed
-    try:
-        run_command(["docker", "--version"])
-        run_command(["docker-compose", "--version"])
-    except Exception:
-        logger.error("Docker or Docker Compose not installed")
-        logger.info("Please install Docker and Docker Compose and try again")
-        sys.exit(1)
-    
     # Run docker-start.sh script
     docker_start_script = os.path.join(install_dir, "docker-start.sh")
+
+    def prepare():
+        # Check if Docker is installed
+        try:
+            run_command(["docker", "--version"])
+            run_command(["docker-compose", "--version"])
+        except Exception:
+            logger.error("Docker or Docker Compose not installed")
+            logger.info("Please install Docker and Docker Compose and try again")
+            sys.exit(1)
+
+        # Make script executable
+        run_command(["chmod", "+x", docker_start_script])
+
+        # Show help
+        run_command([docker_start_script, "help"])
+
+    run_step(state, "docker-prepare", prepare,
+             inputs={"docker": shutil.which("docker"), "compose": shutil.which("docker-compose")},
+             outputs=[docker_start_script])
     
-    # Make script executable
-    run_command(["chmod", "+x", docker_start_script])
-    
-    # Show help
-    run_command([docker_start_script, "help"])
-    
-    # Start containers if requested
+    # Start containers if requested: independent components in parallel,
+    # dependents once their dependencies answer the readiness probe
     if start:
-        if components == "all":
-            logger.info("Starting all containers")
-            run_command([docker_start_script, "start"])
-        else:
-            logger.info(f"Starting components: {components}")
-            run_command([docker_start_script, "start"] + components.split(","))
+        names = list(COMPONENTS) if components == "all" else components.split(",")
+        logger.info(f"Starting components: {', '.join(names)}")
+        env = component_env(install_dir)
+
+        def probe(name):
+            url = component_url(name, env)
+            return url is None or http_probe(url)
+
+        results = start_components(names,
+                                   lambda name: run_command([docker_start_script, "start", name]),
+                                   probe, ready_timeout=ready_timeout)
+        if not log_report(results):
+            logger.error("Not all components became ready")
+            sys.exit(1)
         
         # Run setup
-        logger.info("Running setup")
-        run_command([docker_start_script, "setup"])
+        def setup():
+            logger.info("Running setup")
+            run_command([docker_start_script, "setup"])
+
+        run_step(state, "docker-setup", setup,
+                 inputs={"script": fingerprint(docker_start_script),
+                         "env": fingerprint(os.path.join(install_dir, ".env"))})
     
     logger.info("Docker installation completed")
     
@@ -200,8 +308,12 @@ def docker_installation(install_dir, start=False, components="all"):
     logger.info("- Prometheus: http://localhost:9090")
 
 
-def direct_installation(install_dir, start=False, components="all"):
-    """Perform direct installation of Dev-Server-Workflow"""
+def direct_installation(install_dir, start=False, components="all", state=None):
+    """Perform direct installation of Dev-Server-Workflow
+
+    With an InstallState, the installation is skipped while the requirements
+    and setup script are unchanged; the services are always started.
+    """
     logger.info("Performing direct installation")
     
     # Check Python version
@@ -211,14 +323,20 @@ def direct_installation(install_dir, start=False, components="all"):
         logger.info("Please install Python 3.8+ or use Docker installation")
         sys.exit(1)
     
-    # Install dependencies
-    logger.info("Installing dependencies")
     requirements_file = os.path.join(install_dir, "requirements.txt")
-    run_command(["pip", "install", "-r", requirements_file])
-    
-    # Run setup script
     setup_script = os.path.join(install_dir, "setup.py")
-    run_command(["python", setup_script, "install"])
+
+    def install():
+        # Install dependencies
+        logger.info("Installing dependencies")
+        run_command(["pip", "install", "-r", requirements_file])
+
+        # Run setup script
+        run_command(["python", setup_script, "install"])
+
+    run_step(state, "direct-install", install,
+             inputs={"requirements": fingerprint(requirements_file),
+                     "setup": fingerprint(setup_script)})
     
     # Start services if requested
     if start:
@@ -274,8 +392,7 @@ def integrate_with_openhands(install_dir):
         logger.info("Make sure OpenHands is running on port 17244")
     
     # Create integration directory in OpenHands workspace
-    openhands_workspace = os.path.expanduser("~/openhands-workspace")
-    integration_dir = os.path.join(openhands_workspace, "dev-server-integration")
+    integration_dir = OPENHANDS_INTEGRATION_DIR
     os.makedirs(integration_dir, exist_ok=True)
     
     # Create integration config
@@ -302,27 +419,50 @@ def integrate_with_openhands(install_dir):
 def main():
     """Main function"""
     args = parse_args()
-    
-    # Clone repository
-    clone_repository(args.install_dir)
-    
-    # Create .env file
-    create_env_file(args.install_dir, args.env_file)
+
+    # Set up the non-blocking logging pipeline
+    setup_logging("dev-server-installer", log_file=args.log_file)
+    
+    # Steps whose inputs and outputs are unchanged since the last run are skipped
+    state = InstallState(f"dev-server-installer:{os.path.realpath(args.install_dir)}",
+                         force=args.force)
+    
+    # Clone repository (again only if the remote has new commits)
+    run_step(state, "clone",
+             lambda: clone_repository(args.install_dir, args.mirror, args.clone_depth),
+             inputs={"repo": DEV_SERVER_REPO, "head": remote_head(DEV_SERVER_REPO)},
+             outputs=[args.install_dir])
+    
+    # Create .env file; an existing one counts as done however it was edited, a missing one
+    # is created again
+    env_path = os.path.join(args.install_dir, ".env")
+    run_step(state if os.path.exists(env_path) else None, "env-file",
+             lambda: create_env_file(args.install_dir, args.env_file),
+             inputs={"env_file": args.env_file, "custom": fingerprint(args.env_file),
+                     "template": fingerprint(
+                         os.path.join(args.install_dir, "src", "env-template"))})
     
     # Perform installation
     if args.docker:
-        docker_installation(args.install_dir, args.start, args.components)
+        docker_installation(args.install_dir, args.start, args.components, args.ready_timeout,
+                            state)
     else:
-        direct_installation(args.install_dir, args.start, args.components)
+        direct_installation(args.install_dir, args.start, args.components, state)
     
     # Setup CLI if requested
     if args.setup_cli:
-        setup_cli(args.install_dir)
+        run_step(state, "cli", lambda: setup_cli(args.install_dir),
+                 inputs={"script": fingerprint(
+                     os.path.join(args.install_dir, "cli", "install.sh"))},
+                 outputs=lambda: {"dev-server": shutil.which("dev-server")})
     
     # Integrate with OpenHands
-    integrate_with_openhands(args.install_dir)
+    run_step(state, "openhands-integration", lambda: integrate_with_openhands(args.install_dir),
+             inputs={"install_dir": args.install_dir, "repo": DEV_SERVER_REPO},
+             outputs=[os.path.join(OPENHANDS_INTEGRATION_DIR, "config.json")])
     
-    logger.info("Installation completed successfully")
+    logger.info(f"Installation completed successfully ({len(state.ran)} steps run, "
+                f"{len(state.skipped)} unchanged)")
     
     return 0
 
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Failure Index
+
+This module recognizes test failures that already have an open fix-me
+issue. A failure is fingerprinted by its test ID, the normalized exception
+type and the normalized frames of its traceback (file and function names
+without line numbers, addresses or temporary paths), so the same failure
+gets the same fingerprint across runs. The fingerprint is embedded in the
+issue body, and a local fingerprint -> issue index is rebuilt from the open
+fix-me issues before it is used, so closed issues drop out and issues
+created elsewhere are picked up.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+from github_limits import run_gh
+from json_state import load_json, save_json
+
+# Constants
+INDEX_FILE = os.path.expanduser("~/.cache/openhands-workflow/failure_index.json")
+MARKER = "<!-- failure-fingerprint: {} -->"
+MARKER_PATTERN = re.compile(r"<!-- failure-fingerprint: ([0-9a-f]{16}) -->")
+MAX_FRAMES = 5
+
+PYTHON_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+PYTEST_FRAME = re.compile(r"^([\w./\\-]+\.py):\d+: (?:in (\S+)|(\w+))", re.MULTILINE)
+JS_FRAME = re.compile(r"at (?:(\S+) )?\(?([^\s()]+?):\d+:\d+\)?")
+EXCEPTION = re.compile(r"\b([A-Z]\w*(?:Error|Exception|Failure|Exit|Interrupt))\b")
+
+
+def _normalize_path(path):
+    """Drop absolute prefixes that differ between checkouts"""
+    path = path.replace("\\", "/")
+    for anchor in ("/site-packages/", "/node_modules/"):
+        if anchor in path:
+            return anchor.strip("/") + "/" + path.split(anchor, 1)[1]
+    # Keep the last three path components; checkouts live in different places
+    return "/".join(path.split("/")[-3:])
+
+
+def exception_type(failure):
+    """Return the exception type of a failure, or an empty string"""
+    for text in (failure.get("message", ""), failure.get("traceback", "")):
+        match = EXCEPTION.search(text or "")
+        if match:
+            return match.group(1)
+    return ""
+
+
+def frames(traceback):
+    """Return the normalized (file, function) frames of a traceback"""
+    found = []
+    for match in PYTHON_FRAME.finditer(traceback or ""):
+        found.append((_normalize_path(match.group(1)), match.group(2)))
+    for match in PYTEST_FRAME.finditer(traceback or ""):
+        found.append((_normalize_path(match.group(1)), match.group(2) or match.group(3)))
+    for match in JS_FRAME.finditer(traceback or ""):
+        found.append((_normalize_path(match.group(2)), match.group(1) or ""))
+    # The innermost frames identify the failure; outer ones are runner plumbing
+    return found[-MAX_FRAMES:]
+
+
+def normalize_message(message):
+    """Replace the volatile parts of a message (numbers, addresses, paths, quotes)"""
+    message = re.sub(r"0x[0-9a-fA-F]+", "0x?", message or "")
+    message = re.sub(r"(/[\w.-]+)+", "<path>", message)
+    message = re.sub(r"\d+", "N", message)
+    return " ".join(message.split())[:200]
+
+
+def fingerprint(failure):
+    """Return the fingerprint of a failure dict (see report_parser)"""
+    parts = [failure.get("test_id", ""), exception_type(failure)]
+    stack = frames(failure.get("traceback", ""))
+    if stack:
+        parts += [f"{file}:{function}" for file, function in stack]
+    else:
+        # Without frames, the normalized message is the best identifier left
+        parts.append(normalize_message(failure.get("message", "")))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def marker(fingerprint_value):
+    """Return the hidden marker that ties an issue to a fingerprint"""
+    return MARKER.format(fingerprint_value)
+
+
+class FailureIndex:
+    """Local fingerprint -> open issue index for one repository."""
+
+    def __init__(self, repo_path, index_file=None):
+        """Initialize the index.
+
+        Args:
+            repo_path: Repository whose failures are indexed
+            index_file: Index file (defaults to INDEX_FILE)
+        """
+        self.repo_path = str(repo_path)
+        self.index_file = index_file or INDEX_FILE
+        self.entries = self._load().get(self.repo_path, {})
+
+    def _load(self):
+        return load_json(self.index_file)
+
+    def save(self):
+        """Write the index back to disk"""
+        data = self._load()
+        data[self.repo_path] = self.entries
+        save_json(data, self.index_file)
+
+    def sync(self, label="fix-me"):
+        """Rebuild the index from the open issues with the given label
+
+        Returns:
+            True if the open issues could be listed
+        """
+        result = run_gh(
+            ['gh', 'issue', 'list', '--state', 'open', '--label', label,
+             '--limit', '1000', '--json', 'number,body'],
+            cwd=self.repo_path
+        )
+        if result.returncode != 0:
+            print(f"Error listing open issues: {result.stderr}")
+            return False
+        try:
+            issues = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            print(f"Error parsing issue list: {result.stdout}")
+            return False
+
+        open_issues = {}
+        for issue in issues:
+            for value in MARKER_PATTERN.findall(issue.get("body") or ""):
+                open_issues[value] = issue["number"]
+
+        # Closed issues drop out, so a failure that comes back gets a new issue
+        entries = {}
+        for value, number in open_issues.items():
+            entry = self.entries.get(value, {})
+            entry["issue"] = number
+            entries[value] = entry
+        self.entries = entries
+        return True
+
+    def lookup(self, fingerprint_value):
+        """Return the open issue number of a fingerprint, or None"""
+        entry = self.entries.get(fingerprint_value)
+        return entry.get("issue") if entry else None
+
+    def record(self, fingerprint_value, issue_number, test_id=""):
+        """Record that a fingerprint was seen and which issue tracks it"""
+        now = time.time()
+        entry = self.entries.setdefault(fingerprint_value, {"first_seen": now, "count": 0})
+        entry["issue"] = int(issue_number)
+        entry["test_id"] = test_id or entry.get("test_id", "")
+        entry["last_seen"] = now
+        entry["count"] = entry.get("count", 0) + 1
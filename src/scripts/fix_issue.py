@@ -10,9 +10,12 @@ import requests
 import json
 import os
 import sys
+import time
 import argparse
 from pathlib import Path
 
+import tracing
+
 # Constants
 OPENHANDS_API_URL = "http://localhost:17244/api/tasks"
 
@@ -91,15 +94,20 @@ def trigger_openhands(issue_number, repo_path):
         return None
 
 
-def wait_for_completion(task_id):
+def wait_for_completion(task_id, trace_id=None):
     """Wait for OpenHands to complete the task"""
     print(f"Waiting for OpenHands to complete task {task_id}...")
 
     status_url = f"{OPENHANDS_API_URL}/{task_id}"
+    if trace_id is None:
+        # No issue known: give the task a trace of its own
+        trace_id = tracing.issue_trace_id(f"task-{task_id}")
     
     while True:
         try:
-            response = requests.get(status_url)
+            with tracing.span("poll", trace_id, task_id=task_id) as current:
+                response = requests.get(status_url)
+                current["attributes"]["status_code"] = response.status_code
             
             if response.status_code == 200:
                 result = response.json()
@@ -121,7 +129,6 @@ def wait_for_completion(task_id):
                 return False
                 
             # Wait before checking again
-            import time
             time.sleep(5)
             
         except Exception as e:
@@ -140,15 +147,24 @@ def main():
         print(f"Error: Repository path {repo_path} does not exist or is not a directory")
         return 1
 
+    # All spans of this run belong to the issue's trace
+    trace_id = tracing.issue_trace_id(issue_number, get_repo_info(repo_path) or "")
+
     # Trigger OpenHands
-    task_id = trigger_openhands(issue_number, repo_path)
+    with tracing.span("trigger", trace_id, issue=issue_number) as current:
+        task_id = trigger_openhands(issue_number, repo_path)
+        current["attributes"]["task_id"] = task_id or ""
     if not task_id:
         print("Failed to trigger OpenHands. Exiting.")
         return 1
 
     # Wait for completion if requested
     if args.wait:
-        if not wait_for_completion(task_id):
+        triggered_at = time.time()
+        completed = wait_for_completion(task_id, trace_id)
+        tracing.record_span("openhands_runtime", trace_id, triggered_at, time.time(),
+                            attributes={"task_id": task_id, "completed": completed})
+        if not completed:
             print("OpenHands failed to fix the issue. Exiting.")
             return 1
         print("OpenHands successfully fixed the issue!")
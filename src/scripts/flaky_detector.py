@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Flaky Test Detector
+
+This module confirms test failures before they are reported. Each failing
+test is rerun on its own a configurable number of times, with the reruns
+running in parallel. A test that fails every rerun is a confirmed
+(deterministic) failure; a test that passes at least once is flaky. The
+outcome is added to a per-test history, so tests that flake repeatedly
+can be spotted; concurrent runs merge their outcomes under a file lock.
+"""
+
+import os
+import re
+import time
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+
+from json_state import locked, load_json, save_json
+from output_capture import new_log_path, run_streaming
+from shard_runner import detect_framework, restrict_command
+
+# Constants
+HISTORY_FILE = os.path.expanduser("~/.cache/openhands-workflow/flaky_history.json")
+RERUNS = 2
+RERUN_JOBS = 4
+
+
+def rerun_command(test_command, repo_path, test_id):
+    """Return the command running only the given test, or None if unsupported"""
+    framework = detect_framework(test_command, repo_path)
+    if framework == "pytest" and "::" in test_id:
+        return restrict_command(test_command, repo_path, [test_id])
+    if framework == "jest" and " > " in test_id:
+        file, name = test_id.split(" > ", 1)
+        command = restrict_command(test_command, repo_path, [file])
+        return f"{command} -t {shlex.quote('^' + re.escape(name) + '$')}"
+    return None
+
+
+def _rerun(command, repo_path, attempt, env=None, timeout=None):
+    """Run one isolated rerun and return whether it passed"""
+    env = dict(os.environ if env is None else env)
+    # Parallel reruns of the same test can isolate their resources by index
+    env["TEST_SHARD_INDEX"] = str(attempt)
+    result = run_streaming(command, cwd=repo_path, env=env, timeout=timeout,
+                           log_path=new_log_path("rerun"))
+    try:
+        os.remove(result.log_path)
+    except OSError:
+        pass
+    return result.returncode == 0
+
+
+def confirm_failures(failures, test_command, repo_path, reruns=RERUNS, jobs=RERUN_JOBS,
+                     env=None, timeout=None):
+    """Rerun failing tests in isolation and split them into confirmed and flaky
+
+    Failures that can't be rerun on their own (unknown framework or no test
+    ID) count as confirmed. env and timeout apply to each rerun.
+
+    Returns:
+        (confirmed, flaky) lists of failures; each failure gets a
+        "reruns_passed" count
+    """
+    if reruns <= 0 or not failures:
+        return list(failures), []
+
+    runs = []
+    for failure in failures:
+        command = rerun_command(test_command, str(repo_path), failure.get("test_id", ""))
+        if command:
+            runs += [(failure["test_id"], command, attempt) for attempt in range(reruns)]
+
+    passed = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = executor.map(
+            lambda run: (run[0], _rerun(run[1], str(repo_path), run[2], env, timeout)), runs)
+        for test_id, ok in results:
+            passed[test_id] = passed.get(test_id, 0) + int(ok)
+
+    confirmed = []
+    flaky = []
+    for failure in failures:
+        failure = dict(failure, reruns_passed=passed.get(failure.get("test_id"), 0))
+        if failure["reruns_passed"]:
+            print(f"Flaky: {failure['test_id']} passed {failure['reruns_passed']} of "
+                  f"{reruns} reruns")
+            flaky.append(failure)
+        else:
+            confirmed.append(failure)
+    return confirmed, flaky
+
+
+class FlakyHistory:
+    """Per-test record of confirmed and flaky failures for one repository."""
+
+    def __init__(self, repo_path, history_file=None):
+        """Initialize the history.
+
+        Args:
+            repo_path: Repository whose tests are tracked
+            history_file: History file (defaults to HISTORY_FILE)
+        """
+        self.repo_path = str(repo_path)
+        self.history_file = history_file or HISTORY_FILE
+        self.tests = load_json(self.history_file).get(self.repo_path, {})
+        self._pending = []
+
+    @staticmethod
+    def _apply(tests, outcomes):
+        for test_id, status, now in outcomes:
+            entry = tests.setdefault(test_id, {"confirmed": 0, "flaky": 0, "first_seen": now})
+            entry[status] += 1
+            entry["last_status"] = status
+            entry["last_seen"] = now
+
+    def record(self, confirmed, flaky):
+        """Add the outcome of a confirmation run; save writes it to disk"""
+        now = time.time()
+        outcomes = ([(f.get("test_id", ""), "confirmed", now) for f in confirmed]
+                    + [(f.get("test_id", ""), "flaky", now) for f in flaky])
+        self._apply(self.tests, outcomes)
+        self._pending.extend(outcomes)
+
+    def flake_rate(self, test_id):
+        """Return the share of this test's failures that turned out to be flaky"""
+        entry = self.tests.get(test_id)
+        if not entry:
+            return 0.0
+        return entry["flaky"] / float(entry["flaky"] + entry["confirmed"])
+
+    def save(self):
+        """Merge the recorded outcomes into the history on disk"""
+        with locked(self.history_file):
+            data = load_json(self.history_file)
+            tests = data.setdefault(self.repo_path, {})
+            self._apply(tests, self._pending)
+            save_json(data, self.history_file)
+        self.tests = tests
+        self._pending = []
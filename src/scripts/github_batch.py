@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+GitHub Write Batcher
+
+This module coalesces GitHub write operations (comments, comment edits,
+closes, approvals and labels) into GraphQL documents with one aliased mutation per item.
+Writes are queued from any thread and flushed when the queue reaches the
+batch size or when the oldest queued item has waited for the flush delay.
+Every item reports its own outcome, so one failed mutation does not hide
+the others.
+"""
+
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from github_limits import MAX_RETRIES, RATE_LIMITED, run_gh
+
+logger = logging.getLogger("github-batch")
+
+# Constants
+MAX_BATCH = 20
+MAX_DELAY = 2.0  # seconds
+
+# GraphQL mutation per write kind; placeholders are replaced by variable names
+MUTATIONS = {
+    "comment": "addComment(input: {{subjectId: {node}, body: {body}}}) {{ clientMutationId }}",
+    "edit": "updateIssueComment(input: {{id: {node}, body: {body}}}) {{ clientMutationId }}",
+    "close": "closeIssue(input: {{issueId: {node}}}) {{ clientMutationId }}",
+    "approve": ("addPullRequestReview(input: {{pullRequestId: {node}, event: APPROVE, "
+                "body: {body}}}) {{ clientMutationId }}"),
+    "label": ("addLabelsToLabelable(input: {{labelableId: {node}, labelIds: {labels}}}) "
+              "{{ clientMutationId }}"),
+}
+
+
+class WriteItem:
+    """A queued GitHub mutation and its outcome."""
+
+    def __init__(self, kind: str, number: int, body: Optional[str] = None,
+                 labels: Optional[List[str]] = None,
+                 callback: Optional[Callable[["WriteItem"], None]] = None,
+                 node_id: Optional[str] = None):
+        """Initialize the write item.
+
+        Args:
+            kind: One of "comment", "edit", "close", "approve" or "label"
+            number: Issue or pull request number
+            body: Comment or review body
+            labels: Label names for "label" items
+            callback: Called with the item once its outcome is known
+            node_id: Node ID of the written object if it is not the issue or
+                pull request itself (the comment of "edit" items)
+        """
+        if kind not in MUTATIONS:
+            raise ValueError(f"Unknown write kind: {kind}")
+        self.kind = kind
+        self.number = int(number)
+        self.body = body or ""
+        self.labels = labels or []
+        self.callback = callback
+        self.node_id = node_id
+        self.queued_at = time.time()
+        self.ok = None
+        self.error = None
+        self._done = threading.Event()
+
+    def resolve(self, ok: bool, error: Optional[str] = None) -> None:
+        """Record the outcome of the write."""
+        self.ok = ok
+        self.error = error
+        self._done.set()
+        if self.callback:
+            try:
+                self.callback(self)
+            except Exception as e:
+                logger.error(f"Write callback failed for {self.kind} on #{self.number}: {e}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the outcome and return whether the write succeeded."""
+        self._done.wait(timeout)
+        return bool(self.ok)
+
+    def __repr__(self) -> str:
+        return f"WriteItem({self.kind} #{self.number}, ok={self.ok})"
+
+
+def build_mutation(items: List[WriteItem], node_ids: Dict[int, str],
+                   label_ids: Dict[str, str]) -> Tuple[str, Dict[str, Any], Dict[str, WriteItem]]:
+    """Build one GraphQL document with an aliased mutation per item.
+
+    Args:
+        items: Items to write; all must have a node ID or a resolved number
+        node_ids: Issue/PR node IDs by number
+        label_ids: Label node IDs by name
+
+    Returns:
+        Query, variables and the items by alias
+    """
+    declarations = []
+    fields = []
+    variables: Dict[str, Any] = {}
+    aliases = {}
+
+    for index, item in enumerate(items):
+        alias = f"m{index}"
+        declarations.append(f"$node{index}: ID!")
+        variables[f"node{index}"] = item.node_id or node_ids[item.number]
+
+        if item.kind in ("comment", "edit", "approve"):
+            declarations.append(f"$body{index}: String!")
+            variables[f"body{index}"] = item.body
+        if item.kind == "label":
+            declarations.append(f"$labels{index}: [ID!]!")
+            variables[f"labels{index}"] = [label_ids[name] for name in item.labels]
+
+        mutation = MUTATIONS[item.kind].format(node=f"$node{index}", body=f"$body{index}",
+                                               labels=f"$labels{index}")
+        fields.append(f"  {alias}: {mutation}")
+        aliases[alias] = item
+
+    query = f"mutation({', '.join(declarations)}) {{\n" + "\n".join(fields) + "\n}"
+    return query, variables, aliases
+
+
+def repository_for_path(repo_path: str) -> Optional[str]:
+    """Return the owner/name of the GitHub repository checked out at repo_path."""
+    result = run_gh(
+        ['gh', 'repo', 'view', '--json', 'nameWithOwner', '-q', '.nameWithOwner'],
+        cwd=repo_path
+    )
+    if result.returncode != 0:
+        logger.error(f"Could not determine repository for {repo_path}: {result.stderr.strip()}")
+        return None
+    return result.stdout.strip()
+
+
+class GitHubWriteBatcher:
+    """Queue GitHub mutations and flush them as batched GraphQL documents."""
+
+    def __init__(self, repository: str, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY,
+                 cwd: Optional[str] = None, background: bool = True):
+        """Initialize the batcher.
+
+        Args:
+            repository: Repository name (owner/repo)
+            max_batch: Flush as soon as this many writes are queued
+            max_delay: Flush once the oldest queued write has waited this long (seconds)
+            cwd: Working directory for the gh CLI
+            background: Flush from a background thread; otherwise only flush() writes
+        """
+        self.owner, self.name = repository.split("/", 1)
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.cwd = cwd
+        self.background = background
+        self._queue: List[WriteItem] = []
+        self._cond = threading.Condition()
+        self._cache_lock = threading.Lock()
+        self._node_ids: Dict[int, str] = {}
+        self._label_ids: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # Queueing
+
+    def comment(self, number: int, body: str, callback=None) -> WriteItem:
+        """Queue a comment on an issue or pull request."""
+        return self.enqueue(WriteItem("comment", number, body=body, callback=callback))
+
+    def edit_comment(self, number: int, node_id: str, body: str, callback=None) -> WriteItem:
+        """Queue replacing the body of a comment on an issue or pull request."""
+        return self.enqueue(WriteItem("edit", number, body=body, callback=callback,
+                                      node_id=node_id))
+
+    def close_issue(self, number: int, callback=None) -> WriteItem:
+        """Queue closing an issue."""
+        return self.enqueue(WriteItem("close", number, callback=callback))
+
+    def approve(self, number: int, body: str, callback=None) -> WriteItem:
+        """Queue an approving review on a pull request."""
+        return self.enqueue(WriteItem("approve", number, body=body, callback=callback))
+
+    def add_labels(self, number: int, labels: List[str], callback=None) -> WriteItem:
+        """Queue adding labels to an issue or pull request."""
+        return self.enqueue(WriteItem("label", number, labels=labels, callback=callback))
+
+    def enqueue(self, item: WriteItem) -> WriteItem:
+        """Queue a write item."""
+        with self._cond:
+            self._queue.append(item)
+            if self.background and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="github-batch", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return item
+
+    # Flushing
+
+    def _run(self) -> None:
+        """Background flusher: write a batch when it is full or old enough"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0].queued_at + self.max_delay
+                while len(self._queue) < self.max_batch and not self._stopping:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            self._execute(batch)
+
+    def flush(self) -> List[WriteItem]:
+        """Write everything queued so far and return the written items."""
+        with self._cond:
+            items = self._queue[:]
+            self._queue.clear()
+        for start in range(0, len(items), self.max_batch):
+            self._execute(items[start:start + self.max_batch])
+        return items
+
+    def close(self) -> List[WriteItem]:
+        """Stop the background flusher and write the remaining items."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # GraphQL
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Run a GraphQL request through the gh CLI and return (response, stderr)"""
+        result = run_gh(
+            ['gh', 'api', 'graphql', '--input', '-'],
+            input=json.dumps({"query": query, "variables": variables}),
+            cwd=self.cwd
+        )
+        # gh exits non-zero when some fields failed but still prints the response
+        try:
+            return json.loads(result.stdout), result.stderr.strip()
+        except json.JSONDecodeError:
+            return {}, result.stderr.strip() or f"gh exited with code {result.returncode}"
+
+    def _resolve_ids(self, items: List[WriteItem]) -> None:
+        """Look up node IDs of issues, pull requests and labels not cached yet"""
+        with self._cache_lock:
+            numbers = sorted({item.number for item in items if not item.node_id}
+                             - set(self._node_ids))
+            labels = sorted({name for item in items for name in item.labels} - set(self._label_ids))
+        if not numbers and not labels:
+            return
+
+        fields = [f"n{number}: issueOrPullRequest(number: {number}) "
+                  "{ ... on Issue { id } ... on PullRequest { id } }" for number in numbers]
+        fields += [f"l{index}: label(name: {json.dumps(name)}) {{ id }}"
+                   for index, name in enumerate(labels)]
+        query = ("query($owner: String!, $name: String!) {\n"
+                 "  repository(owner: $owner, name: $name) {\n    "
+                 + "\n    ".join(fields) + "\n  }\n}")
+        response, error = self._graphql(query, {"owner": self.owner, "name": self.name})
+        repository = (response.get("data") or {}).get("repository") or {}
+        if error and not repository:
+            logger.error(f"Failed to look up node IDs: {error}")
+
+        with self._cache_lock:
+            for number in numbers:
+                node = repository.get(f"n{number}")
+                if node and node.get("id"):
+                    self._node_ids[number] = node["id"]
+            for index, name in enumerate(labels):
+                node = repository.get(f"l{index}")
+                if node and node.get("id"):
+                    self._label_ids[name] = node["id"]
+
+    def _execute(self, items: List[WriteItem]) -> None:
+        """Write one batch and resolve every item with its own outcome"""
+        if not items:
+            return
+
+        self._resolve_ids(items)
+        writable = []
+        for item in items:
+            if not item.node_id and item.number not in self._node_ids:
+                item.resolve(False, f"#{item.number} not found in {self.owner}/{self.name}")
+            elif any(name not in self._label_ids for name in item.labels):
+                item.resolve(False, f"Unknown label in {item.labels}")
+            else:
+                writable.append(item)
+
+        # A rate-limited document may be partly applied: only re-send the items that failed
+        for attempt in range(MAX_RETRIES + 1):
+            if not writable:
+                break
+            query, variables, aliases = build_mutation(writable, self._node_ids, self._label_ids)
+            response, error = self._graphql(query, variables)
+            data = response.get("data") or {}
+            errors = {}
+            for entry in response.get("errors") or []:
+                path = entry.get("path") or []
+                if path:
+                    errors[path[0]] = entry.get("message", "unknown error")
+
+            writable = []
+            for alias, item in aliases.items():
+                if alias not in errors and data.get(alias) is not None:
+                    item.resolve(True)
+                    continue
+                message = errors.get(alias) or error or "no result returned"
+                if RATE_LIMITED.search(message) and attempt < MAX_RETRIES:
+                    writable.append(item)
+                else:
+                    item.resolve(False, message)
+            if writable:
+                logger.warning(f"GitHub rate limit hit; re-sending {len(writable)} of "
+                               f"{len(aliases)} writes")
+
+        logger.info(f"Flushed {len(items)} GitHub writes in one batch")
+        for item in items:
+            if item.ok:
+                logger.info(f"GitHub {item.kind} on #{item.number}: ok")
+            else:
+                logger.error(f"GitHub {item.kind} on #{item.number} failed: {item.error}")
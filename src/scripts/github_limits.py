@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+GitHub Rate Limits
+
+This module runs gh CLI commands within GitHub's rate limits, shared by
+all scripts and processes on the machine. The remaining budget of each
+API resource (core, graphql) is kept in one state file under a file lock.
+It is taken from the X-RateLimit-* headers of `gh api` calls and otherwise
+from the rate_limit endpoint, which doesn't count against the limit.
+
+Writes (comments, closes, approvals) are on the critical path: they may
+use the whole remaining budget, but are spaced at least WRITE_INTERVAL
+apart to stay clear of the secondary rate limits. Reads leave a reserve
+for writes and are smoothed with a token bucket that spreads the rest of
+the budget until the next reset, allowing short bursts. A command that
+hits a primary or secondary rate limit anyway blocks all processes until
+the limit resets (or for the Retry-After time). Reads and idempotent writes
+are then retried, so a cycle waits instead of failing. Other writes, above
+all GraphQL mutation documents, are returned as failed: part of them may
+already have been applied, so the caller re-sends only what failed (see
+GitHubWriteBatcher).
+
+Running this module as a script shows the current budget.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import subprocess
+
+from json_state import locked, load_json, save_json
+
+# Constants
+STATE_FILE = os.environ.get(
+    "GITHUB_LIMITS_FILE",
+    os.path.expanduser("~/.cache/openhands-workflow/github_limits.json")
+)
+READ_RESERVE = 0.1  # share of the limit that only writes may use
+BURST = 20  # reads that may run back to back
+WRITE_INTERVAL = 1.0  # seconds between writes (secondary rate limits)
+REFRESH_SECONDS = 60  # re-read the budget from GitHub after this long
+SECONDARY_BACKOFF = 60  # seconds to wait after a secondary rate limit, doubled per retry
+MAX_RETRIES = 5
+# gh commands that talk to the API; others (e.g. --version, auth) run directly
+API_COMMANDS = ("api", "issue", "pr", "repo", "label", "release", "run", "workflow", "search")
+WRITE_SUBCOMMANDS = ("create", "comment", "close", "reopen", "edit", "review", "merge",
+                     "delete", "lock", "unlock", "ready")
+# Writes that leave the same state when applied twice
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "PATCH", "DELETE")
+IDEMPOTENT_SUBCOMMANDS = ("close", "reopen", "edit", "lock", "unlock", "ready")
+RATE_LIMITED = re.compile(r"rate limit|HTTP 429|abuse detection|submitted too quickly",
+                          re.IGNORECASE)
+SECONDARY = re.compile(r"secondary rate limit|HTTP 429|abuse detection|submitted too quickly",
+                       re.IGNORECASE)
+
+
+def _api_method(args):
+    """Return the HTTP method of a REST `gh api` call"""
+    method = "GET"
+    for index, arg in enumerate(args):
+        if arg in ("-X", "--method") and index + 1 < len(args):
+            method = args[index + 1].upper()
+        elif arg.startswith("--method="):
+            method = arg.split("=", 1)[1].upper()
+        elif method == "GET" and arg in ("-f", "-F", "--field", "--raw-field", "--input"):
+            # gh api switches to POST when parameters are given
+            method = "POST"
+    return method
+
+
+def _mutation(args, input=None):
+    return "mutation" in (input or "") or any("mutation" in arg for arg in args)
+
+
+def classify(command, input=None):
+    """Return (resource, write) for a gh command, or (None, False) if it needs no budget"""
+    args = command[1:]
+    if not args or args[0] not in API_COMMANDS:
+        return None, False
+    if args[0] == "api":
+        if "graphql" in args:
+            return "graphql", _mutation(args, input)
+        resource = "search" if any(arg.startswith("search/") for arg in args) else "core"
+        return resource, _api_method(args) != "GET"
+    # issue/pr/repo commands use the GraphQL API
+    return "graphql", len(args) > 1 and args[1] in WRITE_SUBCOMMANDS
+
+
+def idempotent(command, input=None):
+    """Return True if running a gh command twice has the same effect as running it once"""
+    args = command[1:]
+    if not args or args[0] not in API_COMMANDS:
+        return True
+    if args[0] == "api":
+        if "graphql" in args:
+            return not _mutation(args, input)
+        return _api_method(args) in IDEMPOTENT_METHODS
+    return len(args) < 2 or args[1] not in WRITE_SUBCOMMANDS or args[1] in IDEMPOTENT_SUBCOMMANDS
+
+
+def _reserve(state, resource, write, now):
+    """Take one request from the budget; returns 0 or the seconds to wait first"""
+    if state.get("blocked_until", 0) > now:
+        return state["blocked_until"] - now
+    bucket = state.setdefault("resources", {}).setdefault(resource, {})
+    if "limit" not in bucket or bucket.get("reset", 0) <= now:
+        # Unknown budget or a new window: only the write spacing applies
+        bucket.pop("remaining", None)
+        available, window = None, 1.0
+    else:
+        reserve = 0 if write else READ_RESERVE * bucket["limit"]
+        available = bucket["remaining"] - reserve
+        window = max(bucket["reset"] - now, 1.0)
+        if available < 1:
+            return window
+
+    if write:
+        if state.get("next_write", 0) > now:
+            return state["next_write"] - now
+        state["next_write"] = now + WRITE_INTERVAL
+    elif available is not None:
+        # Token bucket refilled at the rate that spends the budget by the reset
+        rate = available / window
+        refill = (now - bucket.get("filled_at", now)) * rate
+        tokens = min(BURST, bucket.get("tokens", BURST) + refill)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        bucket["tokens"] = tokens - 1
+        bucket["filled_at"] = now
+    if available is not None:
+        bucket["remaining"] -= 1
+    return 0
+
+
+def read_limits():
+    """Return the current budget per resource from the rate_limit endpoint, or {}"""
+    result = subprocess.run(['gh', 'api', 'rate_limit'], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {}
+    try:
+        resources = json.loads(result.stdout).get("resources", {})
+    except json.JSONDecodeError:
+        return {}
+    return {name: {key: values[key] for key in ("limit", "remaining", "reset")}
+            for name, values in resources.items() if name in ("core", "graphql", "search")}
+
+
+def _update(resource, values, state_file):
+    """Store a fresh budget for a resource"""
+    with locked(state_file):
+        state = load_json(state_file)
+        bucket = state.setdefault("resources", {}).setdefault(resource, {})
+        bucket.update(values)
+        bucket["checked"] = time.time()
+        save_json(state, state_file)
+
+
+def acquire(resource, write, state_file=None):
+    """Wait until a request of this kind fits into the budget and take it"""
+    state_file = state_file or STATE_FILE
+    while True:
+        bucket = load_json(state_file).get("resources", {}).get(resource, {})
+        if time.time() - bucket.get("checked", 0) > REFRESH_SECONDS:
+            limits = read_limits()
+            for name, values in limits.items():
+                _update(name, values, state_file)
+            if resource not in limits:
+                _update(resource, {}, state_file)
+        with locked(state_file):
+            state = load_json(state_file)
+            wait = _reserve(state, resource, write, time.time())
+            save_json(state, state_file)
+        if wait <= 0:
+            return
+        if wait > 5:
+            kind = "write" if write else "read"
+            print(f"GitHub rate limit: waiting {wait:.0f}s before the next {resource} {kind}")
+        # Re-check at least every minute; the budget may be refreshed meanwhile
+        time.sleep(min(wait, 60))
+
+
+def _split_headers(stdout):
+    """Split the output of `gh api --include` into lower-cased headers and body"""
+    if not stdout.startswith("HTTP/"):
+        return {}, stdout
+    separator = re.search(r"\r?\n\r?\n", stdout)
+    if separator:
+        head, body = stdout[:separator.start()], stdout[separator.end():]
+    else:
+        head, body = stdout, ""
+    headers = {}
+    for line in head.splitlines()[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers, body
+
+
+def _block(wait, state_file):
+    """Hold all requests of all processes back for `wait` seconds"""
+    with locked(state_file):
+        state = load_json(state_file)
+        state["blocked_until"] = max(state.get("blocked_until", 0), time.time() + wait)
+        save_json(state, state_file)
+
+
+def run_gh(command, cwd=None, input=None, env=None, write=None, state_file=None, retry=None):
+    """Run a gh command within the shared rate limit budget
+
+    Args:
+        command: gh command line, starting with "gh"
+        cwd: Working directory
+        input: Text passed on stdin
+        env: Environment of the command
+        write: Whether the command writes (default: derived from the command)
+        state_file: Budget state file (defaults to STATE_FILE)
+        retry: Whether to retry after a rate limit (default: only reads and
+            idempotent writes, since a rate-limited mutation document may be
+            partly applied)
+
+    Returns:
+        The CompletedProcess of the last attempt; `gh api` output has the
+        response headers removed
+    """
+    state_file = state_file or STATE_FILE
+    resource, derived = classify(command, input)
+    if resource is None:
+        return subprocess.run(command, cwd=cwd, input=input, env=env,
+                              capture_output=True, text=True)
+    write = derived if write is None else write
+    retry = idempotent(command, input) if retry is None else retry
+
+    # Single `gh api` calls return the rate limit headers along with the body
+    include = command[1] == "api" and not any(arg in command for arg in (
+        "--paginate", "--jq", "-q", "--template", "-t", "--silent", "-i", "--include"))
+    if include:
+        command = command[:2] + ["--include"] + command[2:]
+
+    for attempt in range(MAX_RETRIES + 1):
+        acquire(resource, write, state_file)
+        result = subprocess.run(command, cwd=cwd, input=input, env=env,
+                                capture_output=True, text=True)
+        headers = {}
+        if include:
+            headers, result.stdout = _split_headers(result.stdout)
+        if "x-ratelimit-remaining" in headers:
+            _update(headers.get("x-ratelimit-resource", resource),
+                    {"limit": int(headers.get("x-ratelimit-limit", 0)),
+                     "remaining": int(headers["x-ratelimit-remaining"]),
+                     "reset": int(headers.get("x-ratelimit-reset", 0))}, state_file)
+
+        limited = result.returncode != 0 and RATE_LIMITED.search(result.stderr + result.stdout)
+        if not limited:
+            return result
+
+        if "retry-after" in headers:
+            wait = float(headers["retry-after"])
+        elif SECONDARY.search(result.stderr + result.stdout):
+            wait = SECONDARY_BACKOFF * 2 ** attempt
+        else:
+            # Primary limit: wait for the reset of the window
+            limits = read_limits().get(resource)
+            wait = max(limits["reset"] - time.time(), 0) + 1 if limits else SECONDARY_BACKOFF
+            if limits:
+                _update(resource, dict(limits, remaining=0), state_file)
+        _block(wait, state_file)
+        if not retry or attempt == MAX_RETRIES:
+            print(f"GitHub rate limit hit ({result.stderr.strip()[:200]}); "
+                  f"blocking requests for {wait:.0f}s")
+            return result
+        print(f"GitHub rate limit hit ({result.stderr.strip()[:200]}); retrying in {wait:.0f}s")
+    return result
+
+
+def main():
+    """Show the shared budget"""
+    state = load_json(STATE_FILE)
+    now = time.time()
+    for name, bucket in sorted(state.get("resources", {}).items()):
+        if "limit" in bucket:
+            print(f"{name}: {bucket.get('remaining')}/{bucket['limit']} left, "
+                  f"resets in {max(bucket.get('reset', 0) - now, 0):.0f}s")
+        else:
+            print(f"{name}: unknown")
+    if state.get("blocked_until", 0) > now:
+        print(f"Blocked for another {state['blocked_until'] - now:.0f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
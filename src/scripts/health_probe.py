@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Health Probes
+
+This module checks the health of all Dev-Server components in-process
+instead of forking a status script. Every component is probed concurrently:
+a TCP connect to its port, then an HTTP request to its health endpoint,
+each with a timeout and a measured latency. A component is "up" if the HTTP
+endpoint answers without a server error, "degraded" if only the port is
+open and "down" otherwise.
+
+Results are cached in a small JSON file for a few seconds, so the workflow
+loop, the CLI wrapper and other readers in separate processes share one
+round of probes instead of probing again each.
+
+Running this module as a script prints the health of all components, as a
+table or as JSON with --json.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from json_state import load_json, save_json
+from startup_orchestrator import COMPONENTS, DEFAULT_PORTS, load_env
+
+# Constants
+HEALTH_FILE = os.path.expanduser("~/.cache/openhands-workflow/health.json")
+DEV_SERVER_DIR = os.path.expanduser("~/Dev-Server-Workflow")
+CACHE_TTL = 10  # seconds a probe result is reused
+PROBE_TIMEOUT = 2.0
+HOST = "localhost"
+
+
+def component_env(install_dir=None):
+    """Return the port settings of an installation: its .env over the defaults"""
+    return dict(DEFAULT_PORTS, **load_env(os.path.join(install_dir or DEV_SERVER_DIR, ".env")))
+
+
+def check_tcp(host, port, timeout=PROBE_TIMEOUT):
+    """Return (open, latency in ms, error) of a TCP connect"""
+    started = time.monotonic()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True, round((time.monotonic() - started) * 1000, 1), None
+    except OSError as e:
+        return False, round((time.monotonic() - started) * 1000, 1), str(e)
+
+
+def check_http(url, timeout=PROBE_TIMEOUT):
+    """Return (HTTP status or None, latency in ms, error) of a GET request"""
+    started = time.monotonic()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            status, error = response.status, None
+    except urllib.error.HTTPError as e:
+        status, error = e.code, None
+    except (urllib.error.URLError, OSError) as e:
+        status, error = None, str(getattr(e, "reason", e))
+    return status, round((time.monotonic() - started) * 1000, 1), error
+
+
+def probe_component(name, env, host=HOST, timeout=PROBE_TIMEOUT):
+    """Probe one component over TCP and HTTP
+
+    Returns:
+        A dict with the component's state ("up", "degraded" or "down"), port,
+        HTTP status, TCP and HTTP latency in milliseconds and the last error
+    """
+    spec = COMPONENTS[name]
+    port = int(env[spec["port"]])
+    result = {"component": name, "port": port, "checked": time.time(),
+              "http_status": None, "http_ms": None}
+    tcp_open, result["tcp_ms"], result["error"] = check_tcp(host, port, timeout)
+    if not tcp_open:
+        result["state"] = "down"
+        return result
+
+    status, result["http_ms"], error = check_http(f"http://{host}:{port}{spec['path']}", timeout)
+    result["http_status"] = status
+    if status is not None and status < 500:
+        result["state"] = "up"
+    else:
+        result["state"] = "degraded"
+        result["error"] = error or f"HTTP {status}"
+    return result
+
+
+def check_health(install_dir=None, components=None, env=None, ttl=CACHE_TTL,
+                 timeout=PROBE_TIMEOUT, cache_file=None):
+    """Return the health of the components, probing those without a fresh result
+
+    Args:
+        install_dir: Installation whose .env sets the ports
+        components: Components to check (default: all)
+        env: Port settings (defaults to those of install_dir)
+        ttl: Seconds a cached result is reused (0 always probes)
+        timeout: Timeout of each TCP connect and HTTP request
+        cache_file: Shared result cache (defaults to HEALTH_FILE)
+
+    Returns:
+        {name: result} as returned by probe_component
+
+    Raises:
+        ValueError: If a component is unknown
+    """
+    unknown = [name for name in components or () if name not in COMPONENTS]
+    if unknown:
+        raise ValueError(f"Unknown components: {', '.join(unknown)} "
+                         f"(known: {', '.join(COMPONENTS)})")
+    cache_file = cache_file or HEALTH_FILE
+    env = env or component_env(install_dir)
+    names = list(components or COMPONENTS)
+    cached = load_json(cache_file)
+    now = time.time()
+
+    def fresh(name):
+        entry = cached.get(name)
+        return (entry and now - entry["checked"] < ttl
+                and entry["port"] == int(env[COMPONENTS[name]["port"]]))
+
+    stale = [name for name in names if not fresh(name)]
+    if stale:
+        with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+            probed = list(executor.map(
+                lambda name: probe_component(name, env, timeout=timeout), stale))
+        cached.update((result["component"], result) for result in probed)
+        save_json(cached, cache_file)
+    return {name: cached[name] for name in names}
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Check the health of the Dev-Server components')
+    parser.add_argument('--install-dir', type=str, default=DEV_SERVER_DIR,
+                        help='Installation directory for Dev-Server-Workflow (for the ports)')
+    parser.add_argument('--components', type=str, default="all",
+                        help='Comma-separated list of components to check (default: all)')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT,
+                        help=f'Timeout of each probe in seconds (default: {PROBE_TIMEOUT})')
+    parser.add_argument('--max-age', type=float, default=CACHE_TTL,
+                        help=f'Reuse results up to this many seconds old '
+                             f'(default: {CACHE_TTL}, 0 to always probe)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    return parser.parse_args()
+
+
+def print_health(health):
+    """Print one line per component"""
+    for name, result in health.items():
+        latency = result["http_ms"] if result["http_ms"] is not None else result["tcp_ms"]
+        line = f"{name:<12} {result['state']:<9} port {result['port']:<6} {latency:>7.1f} ms"
+        if result["http_status"] is not None:
+            line += f"  HTTP {result['http_status']}"
+        if result["error"]:
+            line += f"  ({result['error']})"
+        print(line)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    components = None if args.components == "all" else args.components.split(",")
+    try:
+        health = check_health(args.install_dir, components, ttl=args.max_age,
+                              timeout=args.timeout)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(health, indent=2, sort_keys=True))
+    else:
+        print_health(health)
+    return 0 if all(result["state"] == "up" for result in health.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Install State
+
+This module makes the installer scripts incremental. Every installation
+step records a fingerprint of its inputs (options, the content of the files
+it reads) and of its outputs (the files and checkouts it produces) in one
+state file. When the installer runs again, a step is skipped if its inputs
+are unchanged and its outputs still look the way the step left them; steps
+whose inputs changed, whose outputs drifted (e.g. a deleted config or a
+checkout at another commit) or that failed last time run again.
+
+Files are fingerprinted by content and mode, git checkouts by their HEAD
+commit. Starting services is not a step: it runs every time.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import subprocess
+
+from json_state import locked, load_json, save_json
+
+logger = logging.getLogger("install-state")
+
+# Constants
+STATE_FILE = os.environ.get(
+    "INSTALL_STATE_FILE",
+    os.path.expanduser("~/.cache/openhands-workflow/install_state.json")
+)
+
+
+def fingerprint(path):
+    """Return a fingerprint of a file, git checkout or directory, or None if it is missing"""
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, ".git")):
+            result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=path,
+                                    capture_output=True, text=True)
+            return "git:" + result.stdout.strip() if result.returncode == 0 else None
+        return "dir:" + ",".join(sorted(os.listdir(path)))
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}:{os.stat(path).st_mode & 0o777:o}"
+
+
+def remote_head(repo_url):
+    """Return the commit of the remote HEAD of a repository, or None if unreachable"""
+    result = subprocess.run(['git', 'ls-remote', repo_url, 'HEAD'], capture_output=True, text=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+
+def _digest(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class InstallState:
+    """Recorded fingerprints of the installation steps of one installation."""
+
+    def __init__(self, scope, state_file=None, force=False):
+        """Initialize the state.
+
+        Args:
+            scope: Name of the installation, e.g. the script and install directory
+            state_file: State file (defaults to STATE_FILE)
+            force: Run all steps, but still record them
+        """
+        self.scope = scope
+        self.state_file = state_file or STATE_FILE
+        self.force = force
+        self.skipped = []
+        self.ran = []
+
+    def _outputs(self, outputs):
+        paths = outputs() if callable(outputs) else outputs
+        if not isinstance(paths, dict):
+            paths = {str(path): path for path in paths}
+        # Missing outputs keep their name with a None fingerprint
+        return {str(name): fingerprint(path) for name, path in paths.items()}
+
+    def _record(self, step, entry):
+        with locked(self.state_file):
+            data = load_json(self.state_file)
+            data.setdefault(self.scope, {})[step] = entry
+            save_json(data, self.state_file)
+
+    def is_current(self, step, inputs=None, outputs=()):
+        """Return True if the step completed with these inputs and its outputs are unchanged"""
+        entry = load_json(self.state_file).get(self.scope, {}).get(step)
+        if (not entry or entry.get("status") != "done"
+                or entry.get("inputs") != _digest(inputs or {})):
+            return False
+        recorded = entry.get("outputs", {})
+        current = self._outputs(outputs)
+        # Outputs that are missing or only resolve after the step ran (e.g. installed
+        # commands) count as changed
+        return set(recorded) == set(current) and all(
+            digest is not None and recorded[name] == digest for name, digest in current.items())
+
+    def run(self, step, action, inputs=None, outputs=()):
+        """Run a step unless it is current
+
+        Args:
+            step: Name of the step
+            action: Callable performing the step; returning False or raising
+                marks it as failed
+            inputs: JSON-serializable values the step depends on, including
+                fingerprints of the files it reads
+            outputs: Paths the step produces, or {name: path or None} for
+                outputs that are looked up (e.g. installed commands), or a
+                callable returning either after the step ran
+
+        Returns:
+            The result of the action, or True if the step was skipped
+        """
+        if not self.force and self.is_current(step, inputs, outputs):
+            logger.info(f"Skipping {step} (unchanged)", extra={"stage": "install", "step": step})
+            self.skipped.append(step)
+            return True
+
+        started = time.time()
+        entry = {"inputs": _digest(inputs or {}), "status": "failed", "time": started}
+        try:
+            result = action()
+            if result is not False:
+                entry.update(status="done", outputs=self._outputs(outputs))
+            return result
+        finally:
+            entry["duration"] = round(time.time() - started, 3)
+            self._record(step, entry)
+            self.ran.append(step)
+            logger.debug(f"Step {step}: {entry['status']}",
+                         extra={"stage": "install", "step": step, "status": entry["status"],
+                                "duration": entry["duration"]})
+
+
+def run_step(state, step, action, inputs=None, outputs=()):
+    """Run a step through the install state, or directly if there is none"""
+    if state is None:
+        return action()
+    return state.run(step, action, inputs, outputs)
@@ -9,16 +9,17 @@ It sets up the necessary configuration and starts the workflow loop.
 import os
 import sys
 import subprocess
+import time
 import argparse
 import json
+import shutil
 import logging
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+from structured_logging import setup_logging
+from install_state import InstallState, run_step, fingerprint
+
+# Logging is configured in main() (queue-based, optional JSON log file)
 logger = logging.getLogger("integrate-dev-server")
 
 # Constants
@@ -38,8 +39,12 @@ def parse_args():
                         help='Start the workflow loop after integration')
     parser.add_argument('--install-cli', action='store_true',
                         help='Install the Dev-Server CLI')
+    parser.add_argument('--force', action='store_true',
+                        help='Run all integration steps, even those unchanged since the last run')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose logging')
+    parser.add_argument('--log-file', type=str,
+                        help='Also write JSON logs to this file (rotated and compressed)')
     return parser.parse_args()
 
 
@@ -51,6 +56,7 @@ def run_command(command, cwd=None, shell=False):
         command = command.split()
     
     try:
+        started = time.time()
         result = subprocess.run(
             command,
             cwd=cwd,
@@ -59,15 +65,18 @@ def run_command(command, cwd=None, shell=False):
             capture_output=True,
             text=True
         )
+        logger.debug("Command finished", extra={"stage": "command", "command": str(command),
+                                                 "duration": round(time.time() - started, 3)})
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed with exit code {e.returncode}")
+        logger.error(f"Command failed with exit code {e.returncode}",
+                     extra={"stage": "command", "command": str(command), "exit_code": e.returncode})
         logger.error(f"Error output: {e.stderr}")
         raise
 
 
-def install_dev_server(install_dir):
-    """Install Dev-Server-Workflow"""
+def install_dev_server(install_dir, force=False):
+    """Install Dev-Server-Workflow (the installer skips unchanged steps itself)"""
     logger.info(f"Installing Dev-Server-Workflow to {install_dir}")
     
     # Run the installer script
@@ -82,7 +91,7 @@ def install_dev_server(install_dir):
             "--install-dir", install_dir,
             "--docker",
             "--start"
-        ])
+        ] + (["--force"] if force else []))
         
         logger.info("Dev-Server-Workflow installed successfully")
         return True
@@ -91,7 +100,7 @@ def install_dev_server(install_dir):
         return False
 
 
-def install_dev_server_cli(install_dir):
+def install_dev_server_cli(install_dir, force=False):
     """Install Dev-Server CLI"""
     logger.info("Installing Dev-Server CLI")
     
@@ -105,7 +114,7 @@ def install_dev_server_cli(install_dir):
             os.path.join(script_dir, "dev_server_installer.py"),
             "--install-dir", install_dir,
             "--setup-cli"
-        ])
+        ] + (["--force"] if force else []))
         
         logger.info("Dev-Server CLI installed successfully")
         return True
@@ -114,8 +123,12 @@ def install_dev_server_cli(install_dir):
         return False
 
 
-def setup_openhands_integration(install_dir, openhands_workspace):
-    """Set up integration with OpenHands"""
+def setup_openhands_integration(install_dir, openhands_workspace, state=None):
+    """Set up integration with OpenHands
+
+    With an InstallState, the registration with the OpenHands API is only
+    repeated if the config or prompt template changed or it failed before.
+    """
     logger.info("Setting up integration with OpenHands")
     
     # Create integration directory in OpenHands workspace
@@ -177,6 +190,15 @@ Be thorough, accurate, and helpful.
     logger.info(f"Prompt template created at {prompt_path}")
     
     # Register with OpenHands
+    run_step(state, "openhands-registration",
+             lambda: register_with_openhands(config_path, prompt_path),
+             inputs={"config": fingerprint(config_path), "prompt": fingerprint(prompt_path)})
+    
+    return True
+
+
+def register_with_openhands(config_path, prompt_path):
+    """Register the integration with the OpenHands API; returns True on success"""
     try:
         # Check if OpenHands API is accessible
         import requests
@@ -199,14 +221,15 @@ Be thorough, accurate, and helpful.
             
             if response.status_code == 200:
                 logger.info("Registered with OpenHands API")
-            else:
-                logger.warning(f"Failed to register with OpenHands API: {response.status_code} - {response.text}")
+                return True
+            logger.warning(f"Failed to register with OpenHands API: "
+                           f"{response.status_code} - {response.text}")
         else:
             logger.warning(f"OpenHands API not accessible: {response.status_code}")
     except Exception as e:
         logger.warning(f"Failed to register with OpenHands API: {e}")
     
-    return True
+    return False
 
 
 def setup_gpt_cli_integration():
@@ -260,27 +283,32 @@ def start_workflow_loop(install_dir):
 def main():
     """Main function"""
     args = parse_args()
+
+    # Set up the non-blocking logging pipeline
+    setup_logging("integrate-dev-server", log_file=args.log_file,
+                  level=logging.DEBUG if args.verbose else logging.INFO)
     
-    # Set log level
-    if args.verbose:
-        logger.setLevel(logging.DEBUG)
+    # Steps whose inputs and outputs are unchanged since the last run are skipped
+    state = InstallState(f"integrate-dev-server:{os.path.realpath(args.install_dir)}",
+                         force=args.force)
     
     # Install Dev-Server-Workflow
-    if not install_dev_server(args.install_dir):
+    if not install_dev_server(args.install_dir, args.force):
         logger.error("Failed to install Dev-Server-Workflow")
         return 1
     
     # Install Dev-Server CLI if requested
     if args.install_cli:
-        if not install_dev_server_cli(args.install_dir):
+        if not install_dev_server_cli(args.install_dir, args.force):
             logger.warning("Failed to install Dev-Server CLI")
     
     # Set up integration with OpenHands
-    if not setup_openhands_integration(args.install_dir, args.openhands_workspace):
+    if not setup_openhands_integration(args.install_dir, args.openhands_workspace, state):
         logger.warning("Failed to set up integration with OpenHands")
     
     # Set up integration with GPT-CLI
-    if not setup_gpt_cli_integration():
+    if not run_step(state, "gpt-cli", setup_gpt_cli_integration,
+                    outputs=lambda: {"gpt": shutil.which("gpt")}):
         logger.warning("Failed to set up integration with GPT-CLI")
     
     # Start workflow loop if requested
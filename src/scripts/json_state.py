@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+JSON State Files
+
+This module holds the helpers shared by the scripts that keep state in
+files under ~/.cache/openhands-workflow: an exclusive file lock that is
+held across a read-modify-write by all processes, and loading and
+atomically replacing JSON files so readers never see a partial file.
+
+Every writer uses its own temporary file (per process and thread), so
+concurrent writers don't collide before the final rename.
+"""
+
+import os
+import json
+import fcntl
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on path (a file, directory or cache entry) while the block runs"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_json(path):
+    """Return the parsed content of a JSON file, or {} if it can't be read"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_json(data, path):
+    """Replace a JSON file atomically"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
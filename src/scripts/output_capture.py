@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Output Capture
+
+This module runs test commands without holding their whole output in
+memory. Output is streamed line by line into a log file on disk while only
+the first and last lines are kept in memory, so the returned result holds a
+bounded excerpt plus the location of the full log. Excerpts that go into
+GitHub comments are cut to stay below GitHub's comment size limit; the log
+location is only printed locally, never posted.
+
+Each command runs in its own process group, so a timeout kills the whole
+process tree, and the result carries the wall-clock time, CPU time and peak
+memory of the run.
+"""
+
+import os
+import time
+import signal
+import threading
+import subprocess
+from collections import deque
+
+# Constants
+LOG_DIR = os.environ.get(
+    "TEST_LOG_DIR",
+    os.path.expanduser("~/.cache/openhands-workflow/test-logs")
+)
+HEAD_LINES = 100
+TAIL_LINES = 400
+MAX_LINE = 2000  # characters kept in memory per line
+READ_SIZE = 64 * 1024
+COMMENT_LIMIT = 60000  # GitHub rejects bodies above 65536 characters
+KEEP_LOGS = 50
+PRUNE_MIN_AGE = 3600  # seconds before a log may be pruned (e.g. shard logs still being merged)
+KILL_GRACE = 10  # seconds between SIGTERM and SIGKILL on timeout
+
+
+class OutputExcerpt:
+    """Keep the first and last lines of a stream in bounded memory."""
+
+    def __init__(self, head_lines=HEAD_LINES, tail_lines=TAIL_LINES, max_line=MAX_LINE):
+        self.head_lines = head_lines
+        self.max_line = max_line
+        self.head = []
+        self.tail = deque(maxlen=tail_lines)
+        self.lines = 0
+
+    def add(self, line):
+        """Add one line of output"""
+        if len(line) > self.max_line:
+            line = line[:self.max_line] + " [...]\n"
+        self.lines += 1
+        if len(self.head) < self.head_lines:
+            self.head.append(line)
+        else:
+            self.tail.append(line)
+
+    @property
+    def omitted(self):
+        """Number of lines that are only in the log file"""
+        return self.lines - len(self.head) - len(self.tail)
+
+    def text(self):
+        """Return the excerpt, marking where lines were left out"""
+        marker = [f"\n[... {self.omitted} lines omitted ...]\n\n"] if self.omitted else []
+        return "".join(self.head + marker + list(self.tail))
+
+
+def new_log_path(name="test", log_dir=None):
+    """Return a new log file path and remove old logs"""
+    log_dir = log_dir or LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)
+    prune_logs(log_dir)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(log_dir, f"{name}-{stamp}-{os.urandom(4).hex()}.log")
+
+
+def prune_logs(log_dir=None, keep=KEEP_LOGS, min_age=PRUNE_MIN_AGE):
+    """Remove log files beyond the newest `keep` that are older than min_age seconds
+
+    Logs of runs in progress (of this or a concurrent process) are newer and
+    are never removed.
+    """
+    log_dir = log_dir or LOG_DIR
+    try:
+        logs = [(os.path.getmtime(path), path) for path in
+                (os.path.join(log_dir, name) for name in os.listdir(log_dir)
+                 if name.endswith(".log"))]
+    except OSError:
+        return
+    logs.sort(reverse=True)
+    cutoff = time.time() - min_age
+    for mtime, path in logs[keep:]:
+        if mtime >= cutoff:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _pump(stream, excerpt, log, lock):
+    """Copy a pipe to the log file and the excerpt line by line"""
+    for raw in iter(lambda: stream.readline(READ_SIZE), b""):
+        line = raw.decode("utf-8", errors="replace")
+        with lock:
+            log.write(line)
+        excerpt.add(line)
+    stream.close()
+
+
+def _kill_group(process, grace=KILL_GRACE):
+    """Terminate the process group of a process, killing it if it doesn't exit"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            return
+        deadline = time.time() + grace
+        while time.time() < deadline:
+            if process.poll() is not None:
+                return
+            time.sleep(0.1)
+
+
+def _wait(process):
+    """Wait for a process and return (returncode, resource usage or None)"""
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Already reaped (e.g. by the poll of _kill_group)
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, usage
+
+
+def run_streaming(command, cwd=None, env=None, log_path=None, shell=True, timeout=None):
+    """Run a command, streaming its output to a log file
+
+    Args:
+        command: Command to run
+        cwd: Working directory
+        env: Environment (defaults to the current one)
+        log_path: Log file for the combined stdout/stderr (defaults to a new file in LOG_DIR)
+        shell: Run the command through the shell
+        timeout: Kill the command's process group after this many seconds
+
+    Returns:
+        A CompletedProcess whose stdout/stderr hold bounded excerpts; the full
+        output is in the file named by its log_path attribute. duration,
+        cpu_time (seconds), max_rss (KiB) and timed_out describe the run.
+    """
+    log_path = log_path or new_log_path()
+    stdout = OutputExcerpt()
+    stderr = OutputExcerpt()
+    lock = threading.Lock()
+    timed_out = threading.Event()
+
+    start = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        # A new session makes the command the leader of its own process group
+        process = subprocess.Popen(command, shell=shell, cwd=cwd, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   start_new_session=True)
+        threads = [
+            threading.Thread(target=_pump, args=(process.stdout, stdout, log, lock), daemon=True),
+            threading.Thread(target=_pump, args=(process.stderr, stderr, log, lock), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        def expire():
+            timed_out.set()
+            _kill_group(process)
+
+        timer = threading.Timer(timeout, expire) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        try:
+            returncode, usage = _wait(process)
+        except BaseException:
+            # Don't leave the tests running when the caller is interrupted
+            _kill_group(process, grace=1)
+            raise
+        finally:
+            if timer:
+                timer.cancel()
+        for thread in threads:
+            # Processes that left the group may still hold the pipes open
+            thread.join(KILL_GRACE if timed_out.is_set() else None)
+
+        if timed_out.is_set():
+            note = f"\n[Timed out after {timeout} seconds; process group killed]\n"
+            with lock:
+                log.write(note)
+            stderr.add(note)
+
+    result = subprocess.CompletedProcess(command, returncode,
+                                         stdout=stdout.text(), stderr=stderr.text())
+    result.log_path = log_path
+    result.duration = time.time() - start
+    result.cpu_time = usage.ru_utime + usage.ru_stime if usage else None
+    result.max_rss = usage.ru_maxrss if usage else None
+    result.timed_out = timed_out.is_set()
+    return result
+
+
+def excerpt_text(text, limit=COMMENT_LIMIT):
+    """Cut text to at most about `limit` characters, keeping its start and end
+
+    The end of test output usually holds the failures and totals, so it
+    gets the larger share.
+    """
+    text = text or ""
+    if len(text) <= limit:
+        return text
+    head = limit // 4
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return text[:head] + f"\n[... {omitted} characters omitted ...]\n" + text[-tail:]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+PR Worktrees
+
+This module checks out pull requests into cached git worktrees instead of
+switching branches in the user's repository. Every PR gets its own
+worktree below the cache directory, so several PRs can be checked at the
+same time without touching the primary checkout. All worktrees share the
+object store of the repository they were created from, so a fetch only
+downloads the objects that are new. Worktrees are reused across runs
+(keeping ignored files such as installed dependencies) and pruned when
+they have not been used for a while.
+"""
+
+import os
+import time
+import fcntl
+import shutil
+import hashlib
+import subprocess
+from contextlib import contextmanager
+
+from json_state import locked
+
+# Constants
+WORKTREE_DIR = os.environ.get(
+    "PR_WORKTREE_DIR",
+    os.path.expanduser("~/.cache/openhands-workflow/worktrees")
+)
+KEEP_DAYS = 7
+
+
+def _git(args, cwd):
+    """Run a git command and return the completed process"""
+    return subprocess.run(['git'] + args, cwd=cwd, capture_output=True, text=True)
+
+
+def repository_cache_dir(repo_path, worktree_dir=None):
+    """Return the directory holding the worktrees of a repository"""
+    repo_path = os.path.realpath(str(repo_path))
+    digest = hashlib.sha256(repo_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(worktree_dir or WORKTREE_DIR, f"{os.path.basename(repo_path)}-{digest}")
+
+
+def worktree_path(repo_path, pr_number, worktree_dir=None):
+    """Return the worktree path of a pull request"""
+    return os.path.join(repository_cache_dir(repo_path, worktree_dir), f"pr-{pr_number}")
+
+
+def fetch_pr(pr_number, repo_path):
+    """Fetch the head of a pull request into refs/pr-worktrees/<number>
+
+    Returns the fetched ref, or None if the fetch failed.
+    """
+    ref = f"refs/pr-worktrees/{pr_number}"
+    # Concurrent fetches must not race on the shared FETCH_HEAD file
+    result = _git(['fetch', '--no-write-fetch-head', 'origin', f'+pull/{pr_number}/head:{ref}'],
+                  repo_path)
+    if result.returncode != 0:
+        print(f"Error fetching PR: {result.stderr}")
+        return None
+    return ref
+
+
+def _is_worktree(path):
+    return os.path.isfile(os.path.join(path, ".git"))
+
+
+def prepare_worktree(pr_number, repo_path, worktree_dir=None):
+    """Check out the current head of a pull request into its worktree
+
+    Must be called while holding the worktree lock (see checkout_worktree).
+
+    Returns:
+        The worktree path, or None on failure
+    """
+    repo_path = str(repo_path)
+    path = worktree_path(repo_path, pr_number, worktree_dir)
+
+    ref = fetch_pr(pr_number, repo_path)
+    if ref is None:
+        return None
+
+    if _is_worktree(path):
+        # Reuse the worktree: reset it to the new head, keep ignored files
+        result = _git(['checkout', '--force', '--detach', ref], path)
+        if result.returncode == 0:
+            result = _git(['clean', '-fd'], path)
+        if result.returncode == 0:
+            os.utime(path)
+            return path
+        print(f"Cached worktree {path} is broken, recreating it: {result.stderr}")
+        _git(['worktree', 'remove', '--force', path], repo_path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    # Forget worktrees whose directory was removed by hand
+    _git(['worktree', 'prune'], repo_path)
+    result = _git(['worktree', 'add', '--force', '--detach', path, ref], repo_path)
+    if result.returncode != 0:
+        print(f"Error creating worktree for PR: {result.stderr}")
+        return None
+    return path
+
+
+@contextmanager
+def checkout_worktree(pr_number, repo_path, worktree_dir=None):
+    """Check out a pull request into its worktree and lock it for the block
+
+    Yields the worktree path, or None if the checkout failed. Checks of the
+    same PR wait for each other; checks of different PRs run in parallel.
+    """
+    path = worktree_path(repo_path, pr_number, worktree_dir)
+    with locked(path):
+        yield prepare_worktree(pr_number, repo_path, worktree_dir)
+
+
+def prune_worktrees(repo_path, keep_days=KEEP_DAYS, worktree_dir=None):
+    """Remove worktrees of a repository that were not used for keep_days
+
+    Worktrees in use by another check are skipped.
+
+    Returns:
+        The removed worktree paths
+    """
+    repo_path = str(repo_path)
+    cache_dir = repository_cache_dir(repo_path, worktree_dir)
+    removed = []
+    if not os.path.isdir(cache_dir):
+        return removed
+
+    cutoff = time.time() - keep_days * 86400
+    for name in sorted(os.listdir(cache_dir)):
+        path = os.path.join(cache_dir, name)
+        if not os.path.isdir(path) or os.path.getmtime(path) >= cutoff:
+            continue
+        with open(path + ".lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                continue
+            _git(['worktree', 'remove', '--force', path], repo_path)
+            shutil.rmtree(path, ignore_errors=True)
+            _git(['update-ref', '-d', f"refs/pr-worktrees/{name[len('pr-'):]}"], repo_path)
+        os.remove(path + ".lock")
+        removed.append(path)
+
+    _git(['worktree', 'prune'], repo_path)
+    return removed
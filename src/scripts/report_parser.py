@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Test Report Parser
+
+This module turns machine-readable test reports into individual failures.
+JUnit XML (pytest --junitxml and most other runners), pytest-json-report
+and jest --json reports are supported. Each failure is a dict with the
+test ID, the test file, a one-line message and a trimmed traceback, small
+enough to create one focused issue and one focused fix task per failure.
+
+report_command() adds the report options to pytest and jest commands, so
+reports are produced without changing the configured test command.
+collect_results() returns the outcome and duration of every test instead,
+for the test history (see run_history).
+"""
+
+import os
+import json
+import glob
+import shlex
+import xml.etree.ElementTree as ET
+
+from shard_runner import detect_framework
+
+# Constants
+MAX_TRACEBACK_LINES = 40
+MAX_TRACEBACK_CHARS = 4000
+MAX_MESSAGE_CHARS = 300
+
+
+def report_command(test_command, report_dir, repo_path=None):
+    """Return the test command extended to write a report into report_dir
+
+    The report file name contains the shard index, so sharded runs write
+    one report per shard. Unsupported commands are returned unchanged; with
+    repo_path, so are npm/yarn scripts whose package.json doesn't run jest.
+    """
+    framework = detect_framework(test_command, repo_path)
+    shard = "${TEST_SHARD_INDEX:-0}"
+    if framework == "pytest":
+        return f"{test_command} --junitxml={shlex.quote(report_dir)}/junit-{shard}.xml"
+    if framework == "jest":
+        options = f"--json --outputFile={shlex.quote(report_dir)}/jest-{shard}.json"
+        words = shlex.split(test_command)
+        # npm only forwards arguments after "--" to the test script
+        if words[0] == "npm" and "--" not in words:
+            return f"{test_command} -- {options}"
+        return f"{test_command} {options}"
+    return test_command
+
+
+def has_report_option(test_command):
+    """Return whether a test command already writes a report of its own"""
+    words = shlex.split(test_command)
+    return any(word.startswith(("--junitxml", "--junit-xml", "--json-report", "--outputFile"))
+               or word == "--json" for word in words)
+
+
+def trim_traceback(text, max_lines=MAX_TRACEBACK_LINES, max_chars=MAX_TRACEBACK_CHARS):
+    """Keep the end of a traceback, where the failing frame and the error are"""
+    lines = (text or "").strip().splitlines()
+    if len(lines) > max_lines:
+        lines = [f"[... {len(lines) - max_lines} lines omitted ...]"] + lines[-max_lines:]
+    trimmed = "\n".join(lines)
+    if len(trimmed) > max_chars:
+        trimmed = "[...]\n" + trimmed[-max_chars:]
+    return trimmed
+
+
+def _message(text):
+    """Return the first non-empty line of a failure message, shortened"""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if line:
+            return line[:MAX_MESSAGE_CHARS]
+    return ""
+
+
+def _failure(test_id, file, message, traceback):
+    return {
+        "test_id": test_id,
+        "file": file or "",
+        "message": _message(message) or _message(traceback) or "Test failed",
+        "traceback": trim_traceback(traceback),
+    }
+
+
+def _junit_test(case):
+    """Return the test ID and file of a JUnit XML test case"""
+    classname = case.get("classname", "")
+    name = case.get("name", "")
+    file = case.get("file") or ""
+    # pytest writes the module path and the test classes as the dotted class name
+    module = classname.split(".") if classname else []
+    classes = []
+    while module and module[-1][:1].isupper():
+        classes.insert(0, module.pop())
+    if not file and module:
+        file = "/".join(module) + ".py"
+    # A pytest node ID: tests/test_x.py::TestClass::test_name
+    test_id = "::".join([file] + classes + [name]) if file else f"{classname}.{name}".strip(".")
+    return test_id, file
+
+
+def _result(test_id, file, outcome, duration):
+    return {"test_id": test_id, "file": file or "", "outcome": outcome,
+            "duration": float(duration or 0)}
+
+
+def parse_junit_xml(path):
+    """Return the failures and errors of a JUnit XML report"""
+    failures = []
+    root = ET.parse(path).getroot()
+    for case in root.iter("testcase"):
+        problem = case.find("failure")
+        if problem is None:
+            problem = case.find("error")
+        if problem is None:
+            continue
+        test_id, file = _junit_test(case)
+        failures.append(_failure(test_id, file, problem.get("message"), problem.text))
+    return failures
+
+
+def junit_results(path):
+    """Return the outcome and duration of every test case of a JUnit XML report"""
+    results = []
+    for case in ET.parse(path).getroot().iter("testcase"):
+        test_id, file = _junit_test(case)
+        if case.find("failure") is not None or case.find("error") is not None:
+            outcome = "failed"
+        elif case.find("skipped") is not None:
+            outcome = "skipped"
+        else:
+            outcome = "passed"
+        results.append(_result(test_id, file, outcome, case.get("time")))
+    return results
+
+
+def parse_pytest_json(data):
+    """Return the failures of a pytest-json-report report"""
+    failures = []
+    for test in data.get("tests", []):
+        if test.get("outcome") not in ("failed", "error"):
+            continue
+        phase = next((test[name] for name in ("setup", "call", "teardown")
+                      if test.get(name, {}).get("outcome") == "failed"), {})
+        crash = phase.get("crash") or {}
+        longrepr = phase.get("longrepr") or ""
+        test_id = test.get("nodeid", "")
+        failures.append(_failure(test_id, test_id.split("::")[0], crash.get("message"), longrepr))
+    return failures
+
+
+def pytest_json_results(data):
+    """Return the outcome and duration of every test of a pytest-json-report report"""
+    results = []
+    for test in data.get("tests", []):
+        test_id = test.get("nodeid", "")
+        outcome = "failed" if test.get("outcome") in ("failed", "error") else test.get("outcome")
+        duration = sum(test.get(name, {}).get("duration", 0)
+                       for name in ("setup", "call", "teardown"))
+        results.append(_result(test_id, test_id.split("::")[0], outcome, duration))
+    return results
+
+
+def parse_jest_json(data, repo_path=None):
+    """Return the failures of a jest --json report"""
+    failures = []
+    for suite in data.get("testResults", []):
+        file = suite.get("name", "")
+        if repo_path and os.path.isabs(file):
+            file = os.path.relpath(file, repo_path)
+        failed = [test for test in suite.get("assertionResults", [])
+                  if test.get("status") == "failed"]
+        for test in failed:
+            traceback = "\n".join(test.get("failureMessages") or [])
+            test_id = f"{file} > {test.get('fullName') or test.get('title', '')}"
+            failures.append(_failure(test_id, file, traceback, traceback))
+        # A suite that fails to load has no assertion results, only a message
+        if not failed and suite.get("status") == "failed" and suite.get("message"):
+            failures.append(_failure(file, file, suite["message"], suite["message"]))
+    return failures
+
+
+def jest_json_results(data, repo_path=None):
+    """Return the outcome and duration of every test of a jest --json report"""
+    results = []
+    for suite in data.get("testResults", []):
+        file = suite.get("name", "")
+        if repo_path and os.path.isabs(file):
+            file = os.path.relpath(file, repo_path)
+        for test in suite.get("assertionResults", []):
+            status = test.get("status")
+            outcome = status if status in ("passed", "failed") else "skipped"
+            test_id = f"{file} > {test.get('fullName') or test.get('title', '')}"
+            # jest reports milliseconds
+            results.append(_result(test_id, file, outcome, (test.get("duration") or 0) / 1000.0))
+    return results
+
+
+def parse_report(path, repo_path=None):
+    """Parse one report file, detecting its format; returns a list of failures"""
+    if path.endswith(".xml"):
+        return parse_junit_xml(path)
+    with open(path) as f:
+        data = json.load(f)
+    if "testResults" in data:
+        return parse_jest_json(data, repo_path)
+    return parse_pytest_json(data)
+
+
+def _report_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "*.xml")) +
+                            glob.glob(os.path.join(path, "*.json")))
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def collect_failures(paths, repo_path=None):
+    """Parse report files and directories into one list of failures
+
+    Reports that are missing or can't be parsed are skipped; duplicate
+    test IDs (e.g. from overlapping reports) are reported once.
+    """
+    failures = []
+    seen = set()
+    for path in _report_files(paths):
+        try:
+            parsed = parse_report(path, repo_path)
+        except (OSError, ValueError, ET.ParseError) as e:
+            print(f"Could not parse test report {path}: {e}")
+            continue
+        for failure in parsed:
+            if failure["test_id"] not in seen:
+                seen.add(failure["test_id"])
+                failures.append(failure)
+    return failures
+
+
+def collect_results(paths, repo_path=None):
+    """Parse report files and directories into the results of all tests
+
+    Each result is a dict with the test ID, the test file, the outcome
+    ("passed", "failed" or "skipped") and the duration in seconds. Reports
+    that are missing or can't be parsed are skipped.
+    """
+    results = []
+    for path in _report_files(paths):
+        try:
+            if path.endswith(".xml"):
+                results += junit_results(path)
+                continue
+            with open(path) as f:
+                data = json.load(f)
+            if "testResults" in data:
+                results += jest_json_results(data, repo_path)
+            else:
+                results += pytest_json_results(data)
+        except (OSError, ValueError, ET.ParseError) as e:
+            print(f"Could not parse test report {path}: {e}")
+    return results
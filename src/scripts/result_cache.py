@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Test Result Cache
+
+This module caches test results by the content of the tested tree. The
+cache key combines the git tree hash of the working tree (including
+uncommitted and untracked files), the test command, the runner options
+that change the outcome (shards, timeout, fail-fast, ...) and a fingerprint
+of the environment, so a tree that was already tested, for example by a PR
+check, is not tested again when a fix for the same commit is verified.
+
+Each entry stores the exit code, a one-line summary, the location of the
+test log and a copy of the pytest/jest reports, which are restored on a
+cache hit so failing tests can still be listed and rerun. Runs that timed
+out are not stored. Reuse is opt-in through a policy:
+
+    off           Always run the tests and don't touch the cache
+    reuse-passed  Reuse passing results only, re-run failures
+    reuse-all     Reuse passing and failing results
+    refresh       Always run the tests and replace the cached result
+
+Running this module as a script lists or clears cache entries.
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# Constants
+CACHE_DIR = os.environ.get(
+    "TEST_RESULT_CACHE_DIR",
+    os.path.expanduser("~/.cache/openhands-workflow/test-results")
+)
+POLICIES = ("off", "reuse-passed", "reuse-all", "refresh")
+MAX_AGE_HOURS = 24 * 7
+# Environment variables that change how a suite behaves
+FINGERPRINT_ENV = ("CI", "NODE_ENV", "NODE_OPTIONS", "PYTHONPATH", "VIRTUAL_ENV",
+                   "TEST_SHARD_INDEX", "TEST_SHARD_COUNT")
+# run_tests options that change the outcome of a run
+RESULT_OPTIONS = ("shards", "timeout", "cpu_limit", "memory_limit", "clean_env", "pass_env",
+                  "prioritize", "fail_fast")
+
+
+def tree_hash(repo_path):
+    """Return the git tree hash of the working tree, or None outside a git repository
+
+    Uncommitted changes and untracked files that are not ignored are part
+    of the hash; they are staged into a temporary index, so the real index
+    is left alone.
+    """
+    def git(args, env=None):
+        return subprocess.run(['git'] + args, cwd=repo_path, env=env,
+                              capture_output=True, text=True)
+
+    status = git(['status', '--porcelain'])
+    if status.returncode != 0:
+        return None
+    if not status.stdout.strip():
+        head = git(['rev-parse', 'HEAD^{tree}'])
+        return head.stdout.strip() if head.returncode == 0 else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp, "index"))
+        # Start from HEAD so unchanged files don't have to be hashed again
+        git(['read-tree', 'HEAD'], env)
+        if git(['add', '-A'], env).returncode != 0:
+            return None
+        tree = git(['write-tree'], env)
+        return tree.stdout.strip() if tree.returncode == 0 else None
+
+
+def environment_fingerprint(test_command):
+    """Return a hash of the parts of the environment that affect test results"""
+    words = shlex.split(test_command)
+    executable = shutil.which(words[0]) if words else None
+    parts = [
+        platform.system(),
+        platform.machine(),
+        platform.python_version(),
+        os.path.realpath(executable) if executable else "",
+    ]
+    parts += [f"{name}={os.environ.get(name, '')}" for name in FINGERPRINT_ENV]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(tree, test_command, fingerprint, options=None):
+    """Return the cache key of a tested tree
+
+    Only the options named in RESULT_OPTIONS are part of the key.
+    """
+    options = {name: value for name, value in (options or {}).items()
+               if name in RESULT_OPTIONS}
+    key = "\0".join([tree, test_command, fingerprint, json.dumps(options, sort_keys=True)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def summarize_output(stdout, stderr):
+    """Return the last non-empty output line, which usually holds the test totals"""
+    for text in (stdout, stderr):
+        lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+        if lines:
+            return lines[-1][:200]
+    return ""
+
+
+def _write_atomic(path, content):
+    """Write a file so concurrent readers never see a partial file"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def lookup(key, cache_dir=None, max_age_hours=MAX_AGE_HOURS):
+    """Return the cached entry for a key, or None if missing or expired"""
+    path = os.path.join(cache_dir or CACHE_DIR, f"{key}.json")
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if max_age_hours and time.time() - entry.get("created", 0) > max_age_hours * 3600:
+        return None
+    if not os.path.exists(entry.get("log", "")):
+        return None
+    if entry.get("reports") and not os.path.isdir(entry["reports"]):
+        return None
+    return entry
+
+
+def store(key, tree, test_command, fingerprint, result, cache_dir=None, report_dir=None):
+    """Store a test result, its log and the reports in report_dir; returns the entry"""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(os.path.join(cache_dir, "logs"), exist_ok=True)
+    log = os.path.join(cache_dir, "logs", f"{key}.log")
+    stderr_log = os.path.join(cache_dir, "logs", f"{key}.stderr.log")
+    _write_atomic(log, result.stdout or "")
+    _write_atomic(stderr_log, result.stderr or "")
+    reports = None
+    if report_dir and os.path.isdir(report_dir):
+        reports = os.path.join(cache_dir, "reports", key)
+        shutil.rmtree(reports, ignore_errors=True)
+        shutil.copytree(report_dir, reports)
+
+    entry = {
+        "key": key,
+        "tree": tree,
+        "test_command": test_command,
+        "fingerprint": fingerprint,
+        "returncode": result.returncode,
+        "summary": summarize_output(result.stdout, result.stderr),
+        "log": log,
+        "stderr_log": stderr_log,
+        "full_log": getattr(result, "log_path", None),
+        "reports": reports,
+        "created": time.time(),
+    }
+    _write_atomic(os.path.join(cache_dir, f"{key}.json"), json.dumps(entry, indent=2))
+    return entry
+
+
+def cached_run(test_command, repo_path, run, policy="off", max_age_hours=MAX_AGE_HOURS,
+               cache_dir=None, options=None, report_dir=None):
+    """Run the tests through the result cache
+
+    Args:
+        test_command: Test command, part of the cache key
+        repo_path: Repository whose working tree is tested
+        run: Callable running the tests and returning a CompletedProcess (or None)
+        policy: One of POLICIES
+        max_age_hours: Ignore cached results older than this (0: no limit)
+        cache_dir: Cache directory (defaults to CACHE_DIR)
+        options: run_tests options of the run; those in RESULT_OPTIONS are part of the key
+        report_dir: Report directory of the run; its files are stored with the result
+            and copied back into it on a cache hit
+
+    Returns:
+        The CompletedProcess of the test run or of the cached result
+    """
+    if policy == "off":
+        return run()
+
+    tree = tree_hash(str(repo_path))
+    if tree is None:
+        print("Test result cache: not a git repository, running tests")
+        return run()
+    fingerprint = environment_fingerprint(test_command)
+    key = cache_key(tree, test_command, fingerprint, options)
+
+    if policy in ("reuse-passed", "reuse-all"):
+        entry = lookup(key, cache_dir, max_age_hours)
+        # A failure is only useful with its reports, which list the failing tests
+        if entry and report_dir and entry["returncode"] != 0 and not entry.get("reports"):
+            entry = None
+        if entry and (entry["returncode"] == 0 or policy == "reuse-all"):
+            age = (time.time() - entry["created"]) / 60
+            print(f"Test result cache: reusing result for tree {tree[:12]} from "
+                  f"{age:.0f} minutes ago (exit code {entry['returncode']}, log {entry['log']})")
+            with open(entry["log"]) as f:
+                stdout = f.read()
+            try:
+                with open(entry["stderr_log"]) as f:
+                    stderr = f.read()
+            except OSError:
+                stderr = ""
+            cached = subprocess.CompletedProcess(test_command, entry["returncode"],
+                                                 stdout=stdout, stderr=stderr)
+            full_log = entry.get("full_log")
+            cached.log_path = full_log if full_log and os.path.exists(full_log) else entry["log"]
+            if report_dir and entry.get("reports"):
+                shutil.copytree(entry["reports"], report_dir, dirs_exist_ok=True)
+            return cached
+
+    result = run()
+    if result is not None and getattr(result, "timed_out", False):
+        print("Test result cache: not storing a run that timed out")
+    elif result is not None:
+        try:
+            entry = store(key, tree, test_command, fingerprint, result, cache_dir, report_dir)
+            print(f"Test result cache: stored result for tree {tree[:12]} ({entry['summary']})")
+        except OSError as e:
+            print(f"Test result cache: could not store result: {e}")
+    return result
+
+
+def list_entries(cache_dir=None):
+    """Return all cache entries, newest first"""
+    cache_dir = cache_dir or CACHE_DIR
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(cache_dir, name)) as f:
+                entries.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return sorted(entries, key=lambda entry: entry.get("created", 0), reverse=True)
+
+
+def clear(cache_dir=None, older_than_hours=0):
+    """Remove cache entries (all, or those older than the given age); returns the count"""
+    cache_dir = cache_dir or CACHE_DIR
+    cutoff = time.time() - older_than_hours * 3600
+    removed = 0
+    for entry in list_entries(cache_dir):
+        if older_than_hours and entry.get("created", 0) >= cutoff:
+            continue
+        for path in (entry.get("log"), entry.get("stderr_log"),
+                     os.path.join(cache_dir, f"{entry['key']}.json")):
+            if path and os.path.exists(path):
+                os.remove(path)
+        if entry.get("reports"):
+            shutil.rmtree(entry["reports"], ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Manage the test result cache')
+    parser.add_argument('command', choices=['list', 'clear'], help='Command to run')
+    parser.add_argument('--cache-dir', type=str, default=CACHE_DIR,
+                        help='Cache directory')
+    parser.add_argument('--older-than-hours', type=float, default=0,
+                        help='Only clear entries older than this many hours')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'clear':
+        removed = clear(args.cache_dir, args.older_than_hours)
+        print(f"Removed {removed} cached test results")
+        return 0
+
+    entries = list_entries(args.cache_dir)
+    if not entries:
+        print(f"No cached test results in {args.cache_dir}")
+        return 0
+    for entry in entries:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("created", 0)))
+        print(f"{created}  {entry['tree'][:12]}  exit {entry['returncode']:<3}  "
+              f"{entry['test_command']}  {entry['summary']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
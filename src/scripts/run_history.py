@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test Run History
+
+This module keeps the duration and outcome of every test across the runs
+of test_and_report, check_pr and verify_fix, and uses them to order pytest
+test files so that failures show up early: files with recently failing
+tests, new files and files affected by the current change run first, and
+among files that are equally likely to fail the faster ones run first
+(jest runs the files in the order of its own test sequencer). Together
+with fail-fast (pytest -x, jest --bail) a failing run stops at its first
+failure within seconds instead of at the end of the suite.
+
+The history is kept per repository (worktrees share the history of their
+repository) in one JSON file; concurrent runs merge their results under a
+file lock.
+"""
+
+import os
+import time
+import shlex
+import subprocess
+
+from json_state import locked, load_json, save_json
+from shard_runner import detect_framework
+from affected_tests import merge_base, changed_files, import_graph, dependents
+
+# Constants
+HISTORY_FILE = os.path.expanduser("~/.cache/openhands-workflow/test_history.json")
+DECAY = 0.7  # weight of earlier runs in the failure score and the average duration
+NEW_FILE_SCORE = 0.5  # failure score of test files without history
+AFFECTED_SCORE = 0.3  # added failure score of test files affected by the change
+MAX_AGE_DAYS = 90
+DEFAULT_DURATION = 1.0
+
+
+def repo_key(repo_path):
+    """Return the path identifying a repository, the same for all its worktrees"""
+    result = subprocess.run(['git', 'rev-parse', '--git-common-dir'], cwd=str(repo_path),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return os.path.realpath(str(repo_path))
+    common = os.path.realpath(os.path.join(str(repo_path), result.stdout.strip()))
+    return os.path.dirname(common) if os.path.basename(common) == ".git" else common
+
+
+def fail_fast_command(test_command, repo_path=None):
+    """Return the test command extended to stop at the first failure
+
+    Unsupported commands are returned unchanged.
+    """
+    framework = detect_framework(test_command, repo_path)
+    if framework == "pytest":
+        return f"{test_command} -x"
+    if framework == "jest":
+        words = shlex.split(test_command)
+        # npm only forwards arguments after "--" to the test script
+        if words[0] == "npm" and "--" not in words:
+            return f"{test_command} -- --bail"
+        return f"{test_command} --bail"
+    return test_command
+
+
+def affected_files(repo_path, files, base_ref=None):
+    """Return the test files among files that depend on the current change"""
+    repo_path = str(repo_path)
+    base = merge_base(repo_path, base_ref)
+    if base is None:
+        return set()
+    changed = [path for path in changed_files(repo_path, base)
+               if os.path.exists(os.path.join(repo_path, path))]
+    return dependents(import_graph(repo_path), changed) & set(files)
+
+
+class RunHistory:
+    """Per-test durations and failure scores for one repository."""
+
+    def __init__(self, repo_path, history_file=None):
+        """Initialize the history.
+
+        Args:
+            repo_path: Repository or worktree whose tests are tracked
+            history_file: History file (defaults to HISTORY_FILE)
+        """
+        self.repo = repo_key(repo_path)
+        self.history_file = history_file or HISTORY_FILE
+        self.tests = self._load().get(self.repo, {})
+
+    def _load(self):
+        return load_json(self.history_file)
+
+    def record(self, results):
+        """Add the results of a run (see report_parser.collect_results) and save"""
+        now = time.time()
+        with locked(self.history_file):
+            data = self._load()
+            tests = data.setdefault(self.repo, {})
+            for result in results:
+                if result["outcome"] == "skipped":
+                    continue
+                failed = result["outcome"] == "failed"
+                entry = tests.setdefault(result["test_id"], {
+                    "file": result["file"], "duration": result["duration"],
+                    "failure_score": 0.0, "runs": 0, "failures": 0,
+                })
+                entry["file"] = result["file"]
+                entry["duration"] = DECAY * entry["duration"] + (1 - DECAY) * result["duration"]
+                entry["failure_score"] = DECAY * entry["failure_score"] + int(failed)
+                entry["runs"] += 1
+                entry["failures"] += int(failed)
+                entry["last_run"] = now
+                if failed:
+                    entry["last_failure"] = now
+            # Forget tests that no longer run
+            for test_id in [test_id for test_id, entry in tests.items()
+                            if now - entry.get("last_run", now) > MAX_AGE_DAYS * 86400]:
+                del tests[test_id]
+            save_json(data, self.history_file)
+        self.tests = tests
+
+    def file_stats(self):
+        """Return {file: (duration, failure probability)} aggregated over its tests"""
+        stats = {}
+        for entry in self.tests.values():
+            duration, passing = stats.get(entry["file"], (0.0, 1.0))
+            stats[entry["file"]] = (duration + entry["duration"],
+                                    passing * (1 - min(1.0, entry["failure_score"])))
+        return {path: (duration, 1 - passing) for path, (duration, passing) in stats.items()}
+
+    def order(self, files, affected=()):
+        """Return the test files ordered to reach the first failure as early as possible
+
+        Files are sorted by failure probability per second of run time, so
+        likely failures run first and fast files come before slow ones.
+        """
+        stats = self.file_stats()
+        durations = sorted(stats[path][0] for path in files if path in stats)
+        default = durations[len(durations) // 2] if durations else DEFAULT_DURATION
+
+        def priority(path):
+            duration, probability = stats.get(path, (default, NEW_FILE_SCORE))
+            if path in affected:
+                probability = 1 - (1 - probability) * (1 - AFFECTED_SCORE)
+            return -(probability + 0.01) / max(duration, 0.01), duration
+
+        return sorted(files, key=priority)
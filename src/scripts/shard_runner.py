@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Shard Runner
+
+This module runs a pytest or jest test suite in parallel shards. The test
+files are discovered in the repository, split into shards of roughly equal
+size and each shard runs the test command restricted to its files in a
+separate process. The shard results are merged into one result with a
+combined exit code and output, so callers can treat it like a single run.
+"""
+
+import os
+import re
+import json
+import time
+import shlex
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from output_capture import new_log_path, run_streaming
+
+# Directories that never contain the project's own tests
+SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "env", ".tox", "__pycache__",
+             "dist", "build", "coverage", ".next"}
+JEST_SUFFIXES = (".test.js", ".test.jsx", ".test.ts", ".test.tsx", ".test.mjs",
+                 ".spec.js", ".spec.jsx", ".spec.ts", ".spec.tsx", ".spec.mjs")
+JEST_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs")
+
+
+def package_test_script(repo_path):
+    """Return the test script of the repository's package.json, or None"""
+    try:
+        with open(os.path.join(str(repo_path), "package.json")) as f:
+            return json.load(f).get("scripts", {}).get("test")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def detect_framework(test_command, repo_path=None):
+    """Return "pytest" or "jest" for test commands that can be sharded, else None
+
+    npm/yarn test scripts are taken for jest; with repo_path only if the test
+    script in package.json actually runs jest.
+    """
+    words = shlex.split(test_command)
+    if "pytest" in words or "py.test" in words:
+        return "pytest"
+    if "jest" in words or any(word.endswith("/jest") for word in words):
+        return "jest"
+    if words[:2] in (["npm", "test"], ["npm", "t"], ["yarn", "test"]) or \
+            words[:3] == ["npm", "run", "test"]:
+        if repo_path is None:
+            return "jest"
+        script = package_test_script(repo_path) or ""
+        return "jest" if re.search(r"\bjest\b|react-scripts test", script) else None
+    return None
+
+
+def discover_test_files(repo_path, framework):
+    """Return the test files of the repository, relative to repo_path"""
+    files = []
+    for root, dirs, names in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        in_tests_dir = "__tests__" in os.path.relpath(root, repo_path).split(os.sep)
+        for name in sorted(names):
+            if framework == "pytest":
+                match = name.endswith(".py") and (name.startswith("test_") or
+                                                  name.endswith("_test.py"))
+            else:
+                match = name.endswith(JEST_SUFFIXES) or (in_tests_dir and
+                                                         name.endswith(JEST_EXTENSIONS))
+            if match:
+                files.append(os.path.relpath(os.path.join(root, name), repo_path))
+    return files
+
+
+def split_targets(test_command, framework, repo_path):
+    """Split path arguments off a pytest command
+
+    Returns the command without the paths and the paths themselves, so the
+    shards only run the test files below the requested paths.
+    """
+    if framework != "pytest":
+        return test_command, []
+    words = shlex.split(test_command)
+    targets = [word for word in words[1:]
+               if not word.startswith("-") and os.path.exists(os.path.join(repo_path, word))]
+    # Cut the paths out of the command string, leaving shell syntax such as $VAR intact
+    base = test_command
+    for target in targets:
+        base = re.sub(r"(?<!\S)" + re.escape(target) + r"(?!\S)", "", base)
+    return " ".join(base.split()), targets
+
+
+def split_into_shards(files, shards, repo_path="."):
+    """Split files into at most `shards` groups of roughly equal total size
+
+    Files are assigned largest first to the currently smallest shard, using
+    the file size as an estimate of the test duration. Within a shard the
+    files keep their input order.
+    """
+    def size(path):
+        try:
+            return os.path.getsize(os.path.join(repo_path, path))
+        except OSError:
+            return 0
+
+    groups = [[] for _ in range(min(shards, len(files)))]
+    totals = [0] * len(groups)
+    for path in sorted(files, key=size, reverse=True):
+        index = totals.index(min(totals))
+        groups[index].append(path)
+        totals[index] += size(path)
+    position = {path: index for index, path in enumerate(files)}
+    return [sorted(group, key=position.get) for group in groups]
+
+
+def shard_command(test_command, framework, files, in_band=True):
+    """Return the test command restricted to the given files"""
+    paths = " ".join(shlex.quote(path) for path in files)
+    if framework == "jest":
+        # Each shard gets one core; the shards are the parallelism
+        extra = f"--runInBand {paths}" if in_band else paths
+        words = shlex.split(test_command)
+        # npm only forwards arguments after "--" to the test script
+        if words[0] == "npm" and "--" not in words:
+            return f"{test_command} -- {extra}"
+        return f"{test_command} {extra}"
+    return f"{test_command} {paths}"
+
+
+def suite_files(test_command, repo_path):
+    """Return the test files a pytest/jest command runs, or None for other commands
+
+    Path arguments of pytest commands limit the files to those below them.
+    """
+    framework = detect_framework(test_command, repo_path)
+    if framework is None:
+        return None
+    _, targets = split_targets(test_command, framework, str(repo_path))
+    files = discover_test_files(str(repo_path), framework)
+    if targets:
+        prefixes = [os.path.normpath(target) for target in targets]
+        files = [path for path in files
+                 if any(path == prefix or path.startswith(prefix + os.sep)
+                        for prefix in prefixes)]
+    return files
+
+
+def restrict_command(test_command, repo_path, files):
+    """Return the test command restricted to the given test files, or None if unsupported"""
+    framework = detect_framework(test_command, repo_path)
+    if framework is None:
+        return None
+    base_command, _ = split_targets(test_command, framework, str(repo_path))
+    return shard_command(base_command, framework, files, in_band=False)
+
+
+def _run_shard(command, repo_path, index, count, env=None, timeout=None):
+    """Run one shard and return (result, duration)"""
+    env = dict(os.environ if env is None else env)
+    # Let suites isolate per-shard resources such as databases or ports
+    env["TEST_SHARD_INDEX"] = str(index)
+    env["TEST_SHARD_COUNT"] = str(count)
+    result = run_streaming(command, cwd=repo_path, env=env, timeout=timeout,
+                           log_path=new_log_path(f"shard{index + 1}"))
+    return result, result.duration
+
+
+def run_sharded(test_command, repo_path, shards, files=None, env=None, timeout=None, wrap=None):
+    """Run the test command in parallel shards and merge the results
+
+    Args:
+        test_command: Test command as passed with --test-command
+        repo_path: Repository to run the tests in
+        shards: Number of shards (0 uses one shard per CPU)
+        files: Test files to run (defaults to all test files of the suite)
+        env: Environment of the shards (defaults to the current one)
+        timeout: Kill a shard after this many seconds
+        wrap: Function applied to each shard command before it runs
+
+    Returns:
+        A CompletedProcess with the combined exit code and output, or None if
+        the suite cannot be sharded and should run as a single process
+    """
+    framework = detect_framework(test_command, repo_path)
+    if framework is None:
+        print(f"Cannot shard '{test_command}': only pytest and jest suites are supported")
+        return None
+
+    shards = shards or os.cpu_count() or 1
+    base_command, _ = split_targets(test_command, framework, str(repo_path))
+    if files is None:
+        files = suite_files(test_command, repo_path)
+    if shards < 2 or len(files) < 2:
+        return None
+
+    groups = split_into_shards(files, shards, str(repo_path))
+    print(f"Running {len(files)} {framework} test files in {len(groups)} shards")
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = [
+            executor.submit(_run_shard,
+                            (wrap or str)(shard_command(base_command, framework, group)),
+                            str(repo_path), index, len(groups), env, timeout)
+            for index, group in enumerate(groups)
+        ]
+        results = [future.result() for future in futures]
+
+    summary = []
+    stdout = []
+    stderr = []
+    returncode = 0
+    for index, (group, (result, duration)) in enumerate(zip(groups, results)):
+        status = "passed" if result.returncode == 0 else f"failed (exit code {result.returncode})"
+        header = (f"Shard {index + 1}/{len(groups)} ({len(group)} files): "
+                  f"{status} in {duration:.1f}s")
+        summary.append(header)
+        stdout.append(f"===== {header} =====\n{result.stdout}")
+        if result.stderr:
+            stderr.append(f"===== Shard {index + 1}/{len(groups)} =====\n{result.stderr}")
+        if result.returncode != 0 and returncode == 0:
+            returncode = result.returncode
+
+    failed = sum(1 for result, _ in results if result.returncode != 0)
+    overall = "passed" if failed == 0 else f"{failed} of {len(groups)} shards failed"
+    report = "\n".join([f"Sharded test run: {overall}"] + summary) + "\n\n"
+    print(report.strip())
+
+    # Concatenate the shard logs into one full log without reading them into memory
+    log_path = new_log_path("sharded")
+    with open(log_path, "w", encoding="utf-8") as log:
+        log.write(report)
+        for header, (result, _) in zip(summary, results):
+            log.write(f"===== {header} =====\n")
+            with open(result.log_path, encoding="utf-8") as shard_log:
+                shutil.copyfileobj(shard_log, log)
+            os.remove(result.log_path)
+
+    merged = subprocess.CompletedProcess(test_command, returncode,
+                                         stdout=report + "\n".join(stdout),
+                                         stderr="\n".join(stderr))
+    merged.log_path = log_path
+    merged.duration = time.time() - start
+    cpu_times = [result.cpu_time for result, _ in results if result.cpu_time is not None]
+    merged.cpu_time = sum(cpu_times) if cpu_times else None
+    merged.max_rss = max((result.max_rss or 0 for result, _ in results), default=None)
+    merged.timed_out = any(result.timed_out for result, _ in results)
+    return merged
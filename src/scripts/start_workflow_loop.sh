@@ -21,7 +21,20 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 # Default values
 INSTALL_DIR="$HOME/Dev-Server-Workflow"
 CHECK_INTERVAL=300
+MIN_INTERVAL=30
+MAX_INTERVAL=1800
+BACKOFF_FACTOR=2.0
+FIXED_INTERVAL=""
+POLL_INTERVAL=60
 MAX_RETRIES=3
+VERIFY_WORKERS=2
+TEST_SHARDS=1
+TEST_TIMEOUT=0
+TEST_CACHE=off
+INSTALL_DEPS=""
+WARM_WORKER=""
+FAIL_FAST=""
+STICKY_COMMENTS=""
 LOG_FILE="$HOME/workflow_loop.log"
 PID_FILE="$HOME/workflow_loop.pid"
 
@@ -39,11 +52,71 @@ while [[ $# -gt 0 ]]; do
             shift
             shift
             ;;
+        --min-interval)
+            MIN_INTERVAL="$2"
+            shift
+            shift
+            ;;
+        --max-interval)
+            MAX_INTERVAL="$2"
+            shift
+            shift
+            ;;
+        --backoff-factor)
+            BACKOFF_FACTOR="$2"
+            shift
+            shift
+            ;;
+        --fixed-interval)
+            FIXED_INTERVAL=1
+            shift
+            ;;
+        --poll-interval)
+            POLL_INTERVAL="$2"
+            shift
+            shift
+            ;;
         --max-retries)
             MAX_RETRIES="$2"
             shift
             shift
             ;;
+        --verify-workers)
+            VERIFY_WORKERS="$2"
+            shift
+            shift
+            ;;
+        --test-shards)
+            TEST_SHARDS="$2"
+            shift
+            shift
+            ;;
+        --test-timeout)
+            TEST_TIMEOUT="$2"
+            shift
+            shift
+            ;;
+        --test-cache)
+            TEST_CACHE="$2"
+            shift
+            shift
+            ;;
+        --install-deps)
+            INSTALL_DEPS=1
+            shift
+            ;;
+        --warm-worker)
+            WARM_WORKER=1
+            shift
+            ;;
+        --fail-fast)
+            FAIL_FAST=1
+            shift
+            ;;
+        --sticky-comments)
+            STICKY_COMMENTS=1
+            shift
+            ;;
         --log-file)
             LOG_FILE="$2"
             shift
@@ -59,8 +132,21 @@ while [[ $# -gt 0 ]]; do
             echo ""
             echo "Options:"
             echo "  --install-dir DIR     Installation directory for Dev-Server-Workflow (default: $INSTALL_DIR)"
-            echo "  --check-interval SEC  Interval between checks in seconds (default: $CHECK_INTERVAL)"
+            echo "  --check-interval SEC  Initial interval between checks in seconds (default: $CHECK_INTERVAL)"
+            echo "  --min-interval SEC    Shortest adaptive check interval (default: $MIN_INTERVAL)"
+            echo "  --max-interval SEC    Longest adaptive check interval (default: $MAX_INTERVAL)"
+            echo "  --backoff-factor NUM  Growth of the check interval per idle check (default: $BACKOFF_FACTOR)"
+            echo "  --fixed-interval      Always wait --check-interval between checks"
+            echo "  --poll-interval SEC   Interval between task status checks in seconds (default: $POLL_INTERVAL)"
             echo "  --max-retries NUM     Maximum number of retries for failed operations (default: $MAX_RETRIES)"
+            echo "  --verify-workers NUM  Number of parallel fix verifications (default: $VERIFY_WORKERS)"
+            echo "  --test-shards NUM     Parallel test shards per verification, 0 = one per CPU (default: $TEST_SHARDS)"
+            echo "  --test-timeout SEC    Kill a verification test run after SEC seconds, 0 = no timeout (default: $TEST_TIMEOUT)"
+            echo "  --test-cache MODE     Test result cache: off, reuse-passed, reuse-all or refresh (default: $TEST_CACHE)"
+            echo "  --install-deps        Install dependencies through the dependency cache before verifying"
+            echo "  --warm-worker         Run pytest verifications in a warm test worker"
+            echo "  --fail-fast           Run likely failures first and stop verifications at the first failure"
+            echo "  --sticky-comments     Update one result comment per issue instead of adding new ones"
             echo "  --log-file FILE       Log file (default: $LOG_FILE)"
             echo "  --pid-file FILE       PID file (default: $PID_FILE)"
             echo "  --help                Show this help message"
@@ -91,9 +177,24 @@ echo -e "${YELLOW}Starting workflow loop...${NC}"
 nohup python "$SCRIPT_DIR/workflow_loop.py" \
     --install-dir "$INSTALL_DIR" \
     --check-interval "$CHECK_INTERVAL" \
+    --min-interval "$MIN_INTERVAL" \
+    --max-interval "$MAX_INTERVAL" \
+    --backoff-factor "$BACKOFF_FACTOR" \
+    ${FIXED_INTERVAL:+--fixed-interval} \
+    --poll-interval "$POLL_INTERVAL" \
     --max-retries "$MAX_RETRIES" \
+    --verify-workers "$VERIFY_WORKERS" \
+    --test-shards "$TEST_SHARDS" \
+    --test-timeout "$TEST_TIMEOUT" \
+    --test-cache "$TEST_CACHE" \
+    ${INSTALL_DEPS:+--install-deps} \
+    ${WARM_WORKER:+--warm-worker} \
+    ${FAIL_FAST:+--fail-fast} \
+    ${STICKY_COMMENTS:+--sticky-comments} \
+    --log-file "$LOG_FILE" \
+    --no-console-log \
     --verbose \
-    > "$LOG_FILE" 2>&1 &
+    > "${LOG_FILE%.log}.err" 2>&1 &
 
 # Save PID
 echo $! > "$PID_FILE"
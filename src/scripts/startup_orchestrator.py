@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Startup Orchestrator
+
+This module brings up the Dev-Server components in dependency order. The
+components form a small graph (Grafana reads from Prometheus, the MCP-Hub
+talks to n8n, the frontend talks to the MCP-Hub); every component is started
+as soon as all of its dependencies answer their readiness probe, so
+independent components start in parallel and a dependent never starts
+against a service that is still booting.
+
+Each component is started with its own `docker-start.sh start <component>`
+call and then probed over HTTP until it answers or the readiness timeout
+passes. Components whose dependencies failed are not started. The time to
+readiness of every component is logged, so slow components stand out.
+"""
+
+import time
+import logging
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("dev-server-installer.startup")
+
+# Constants
+READY_TIMEOUT = 180  # seconds a component may take to answer its probe
+PROBE_INTERVAL = 1.0
+PROBE_TIMEOUT = 2.0
+# Dependencies, port variable and readiness endpoint of every component
+COMPONENTS = {
+    "prometheus": {"depends": [], "port": "PROMETHEUS_PORT", "path": "/-/ready"},
+    "grafana": {"depends": ["prometheus"], "port": "GRAFANA_PORT", "path": "/api/health"},
+    "n8n": {"depends": [], "port": "N8N_PORT", "path": "/healthz"},
+    "mcp-hub": {"depends": ["n8n"], "port": "MCP_HUB_PORT", "path": "/"},
+    "frontend": {"depends": ["mcp-hub"], "port": "FRONTEND_PORT", "path": "/"},
+}
+# Ports of the components unless the .env of the installation sets them
+DEFAULT_PORTS = {
+    "N8N_PORT": "5678",
+    "MCP_HUB_PORT": "3000",
+    "FRONTEND_PORT": "8080",
+    "GRAFANA_PORT": "3001",
+    "PROMETHEUS_PORT": "9090",
+}
+
+
+def load_env(env_path):
+    """Return the KEY=VALUE pairs of a .env file, or {} if it can't be read"""
+    values = {}
+    try:
+        with open(env_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, _, value = line.partition("=")
+                values[key.strip()] = value.strip().strip("\"'")
+    except OSError:
+        pass
+    return values
+
+
+def resolve(names, graph=None):
+    """Return the components to start, with their dependencies, in dependency order
+
+    Components missing from the graph have no dependencies.
+
+    Raises:
+        ValueError: If the dependencies form a cycle
+    """
+    graph = COMPONENTS if graph is None else graph
+    order = []
+    visiting = set()
+
+    def visit(name, path):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dependency in graph.get(name, {}).get("depends", []):
+            visit(dependency, path + [name])
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+    return order
+
+
+def component_url(name, env, graph=None):
+    """Return the readiness URL of a component, or None if it has no probe"""
+    graph = COMPONENTS if graph is None else graph
+    spec = graph.get(name)
+    if not spec or not env.get(spec["port"]):
+        return None
+    return f"http://localhost:{env[spec['port']]}{spec['path']}"
+
+
+def http_probe(url, timeout=PROBE_TIMEOUT):
+    """Return True if the URL answers with anything but a server error"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        # 401/404 still means the service is up and serving requests
+        return e.code < 500
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def _bring_up(name, start, probe, ready_timeout, interval, started_at):
+    """Start one component and wait for its probe; returns its result dict"""
+    began = time.monotonic()
+    result = {"component": name, "queued": round(began - started_at, 3)}
+    try:
+        start(name)
+    except (OSError, subprocess.CalledProcessError) as e:
+        result.update(status="failed", error=str(e), seconds=round(time.monotonic() - began, 3))
+        return result
+    result["start_seconds"] = round(time.monotonic() - began, 3)
+
+    deadline = began + ready_timeout
+    while True:
+        if probe(name):
+            status = "ready"
+            break
+        if time.monotonic() >= deadline:
+            status = "timeout"
+            break
+        time.sleep(interval)
+    result.update(status=status, seconds=round(time.monotonic() - began, 3),
+                  ready_at=round(time.monotonic() - started_at, 3))
+    return result
+
+
+def start_components(names, start, probe, graph=None, ready_timeout=READY_TIMEOUT,
+                     interval=PROBE_INTERVAL):
+    """Start components in parallel, each once its dependencies are ready
+
+    Args:
+        names: Components to start; their dependencies are started as well
+        start: Callable (name) starting a component; raises OSError or
+            CalledProcessError on errors
+        probe: Callable (name) returning True once the component is ready
+        graph: Component graph (defaults to COMPONENTS)
+        ready_timeout: Seconds each component may take to become ready
+        interval: Seconds between probes
+
+    Returns:
+        {name: result} with status "ready", "timeout", "failed" or "blocked"
+        and the seconds from its start to readiness
+    """
+    graph = COMPONENTS if graph is None else graph
+    pending = resolve(names, graph)
+    results = {}
+    running = {}
+    started_at = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        while pending or running:
+            for name in list(pending):
+                dependencies = graph.get(name, {}).get("depends", [])
+                failed = [dependency for dependency in dependencies
+                          if dependency in results and results[dependency]["status"] != "ready"]
+                if failed:
+                    pending.remove(name)
+                    results[name] = {"component": name, "status": "blocked",
+                                     "error": f"{', '.join(failed)} not ready"}
+                elif all(dependency in results for dependency in dependencies):
+                    pending.remove(name)
+                    logger.info(f"Starting {name}", extra={"stage": "startup", "component": name})
+                    running[executor.submit(_bring_up, name, start, probe, ready_timeout,
+                                            interval, started_at)] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                logger.info(f"{name}: {results[name]['status']} "
+                            f"after {results[name]['seconds']:.1f}s",
+                            extra={"stage": "startup", "component": name,
+                                   "status": results[name]["status"],
+                                   "duration": results[name]["seconds"]})
+
+    results["total_seconds"] = round(time.monotonic() - started_at, 3)
+    return results
+
+
+def log_report(results):
+    """Log the time to readiness of every component; returns True if all are ready"""
+    logger.info("Component startup:")
+    ok = True
+    for name, result in results.items():
+        if name == "total_seconds":
+            continue
+        if result["status"] == "ready":
+            logger.info(f"- {name}: ready after {result['seconds']:.1f}s "
+                        f"({result['ready_at']:.1f}s into the startup)")
+        else:
+            ok = False
+            detail = result.get("error") or f"no answer after {result.get('seconds', 0):.1f}s"
+            logger.error(f"- {name}: {result['status']} ({detail})")
+    logger.info(f"All components handled after {results['total_seconds']:.1f}s",
+                extra={"stage": "startup", "duration": results["total_seconds"]})
+    return ok
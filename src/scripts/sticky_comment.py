@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Sticky Result Comments
+
+This module keeps one result comment per issue or pull request instead of
+adding a new comment on every run. The comment carries a hidden marker
+naming the tool that wrote it and a hidden copy of the last results; each
+run replaces the body with the current status, a compact diff against the
+previous run (status change, newly failing, fixed and still failing tests)
+and a short output excerpt.
+
+The comment ID and the last results are also cached locally, so a run
+normally makes a single small write. On a cache miss the comments are
+searched for the marker once; a deleted comment is posted again.
+"""
+
+import os
+import re
+import json
+import time
+
+from json_state import locked, load_json, save_json
+from output_capture import excerpt_text
+from github_limits import run_gh
+
+# Constants
+STATE_FILE = os.path.expanduser("~/.cache/openhands-workflow/sticky_comments.json")
+MARKER = "<!-- openhands-workflow:{kind} -->"
+STATE = re.compile(r"<!-- openhands-workflow-state: (\{.*?\}) -->")
+OUTPUT_CHARS = 3000
+MAX_LISTED = 20  # test IDs listed per diff line
+
+
+def _cache_key(number, kind, repo_path):
+    return f"{os.path.realpath(str(repo_path))}#{number}:{kind}"
+
+
+def _store(key, entry, state_file):
+    with locked(state_file):
+        data = load_json(state_file)
+        data[key] = entry
+        save_json(data, state_file)
+
+
+def _gh_api(args, repo_path, body=None):
+    """Run gh api and return its parsed JSON output, or None on errors"""
+    result = run_gh(
+        ['gh', 'api'] + args + (['--input', '-'] if body is not None else []),
+        input=json.dumps({"body": body}) if body is not None else None,
+        cwd=repo_path
+    )
+    if result.returncode != 0:
+        print(f"GitHub API error: {result.stderr.strip()}")
+        return None
+    try:
+        return json.loads(result.stdout or "{}")
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_state(body):
+    """Return the results stored in a comment body, or None"""
+    match = STATE.search(body or "")
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+def find_comment(number, kind, repo_path):
+    """Search the comments of an issue or PR for the sticky comment of `kind`
+
+    Returns:
+        A dict with the comment's id, node_id and stored results, or None
+    """
+    marker = MARKER.format(kind=kind)
+    result = run_gh(
+        ['gh', 'api', '--paginate', f'repos/{{owner}}/{{repo}}/issues/{number}/comments',
+         '--jq', f'.[] | select(.body | contains({json.dumps(marker)})) '
+                 '| {id, node_id, body} | @json'],
+        cwd=repo_path
+    )
+    if result.returncode != 0:
+        print(f"Could not list comments of #{number}: {result.stderr.strip()}")
+        return None
+    lines = [line for line in result.stdout.splitlines() if line.strip()]
+    if not lines:
+        return None
+    # The most recent sticky comment wins if there are several
+    comment = json.loads(lines[-1])
+    return {"id": comment["id"], "node_id": comment["node_id"],
+            "state": parse_state(comment["body"])}
+
+
+def result_diff(previous, current):
+    """Return the lines describing how the results changed since the previous run"""
+    if not previous:
+        return ["First run."]
+    lines = []
+    if previous.get("status") != current["status"]:
+        lines.append(f"Status: {previous.get('status')} → {current['status']}")
+    before = set(previous.get("failing") or [])
+    after = set(current["failing"])
+
+    def listed(tests):
+        tests = sorted(tests)
+        shown = ", ".join(f"`{test_id}`" for test_id in tests[:MAX_LISTED])
+        more = len(tests) - MAX_LISTED
+        return shown + (f" and {more} more" if more > 0 else "")
+
+    if after - before:
+        lines.append(f"Newly failing ({len(after - before)}): {listed(after - before)}")
+    if before - after:
+        lines.append(f"Fixed ({len(before - after)}): {listed(before - after)}")
+    if after & before:
+        lines.append(f"Still failing: {len(after & before)}")
+    return lines or ["No change since the last run."]
+
+
+def render(kind, summary, current, previous, output):
+    """Return the body of the sticky comment"""
+    head = f" on `{current['head'][:7]}`" if current.get("head") else ""
+    diff = "\n".join(f"- {line}" for line in result_diff(previous, current))
+    run_time = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(current['time']))
+    return f"""{MARKER.format(kind=kind)}
+{summary}
+
+Run {current['runs']} at {run_time}{head}
+
+### Changes since the last run
+{diff}
+
+<details><summary>Test output</summary>
+
+```
+{excerpt_text(output, limit=OUTPUT_CHARS)}
+```
+</details>
+<!-- openhands-workflow-state: {json.dumps(current, sort_keys=True)} -->
+"""
+
+
+def post_sticky_comment(number, kind, summary, status, output, repo_path, failing=(),
+                        head=None, writer=None, state_file=None):
+    """Create or update the sticky comment of `kind` on an issue or pull request
+
+    Args:
+        number: Issue or pull request number
+        kind: Name of the writing tool, e.g. "check-pr"
+        summary: First line(s) of the comment
+        status: "passed", "failed" or "flaky"
+        output: Test output; only a short excerpt is kept
+        repo_path: Repository for the gh CLI
+        failing: IDs of the failing tests
+        head: Tested commit
+        writer: GitHubWriteBatcher to queue the write on
+        state_file: Local cache of comment IDs (defaults to STATE_FILE)
+
+    Returns:
+        True if the comment was written (or queued)
+    """
+    state_file = state_file or STATE_FILE
+    key = _cache_key(number, kind, repo_path)
+    cached = load_json(state_file).get(key) or find_comment(number, kind, repo_path)
+    previous = (cached or {}).get("state")
+    current = {
+        "status": status,
+        "failing": sorted(failing),
+        "head": head,
+        "time": time.time(),
+        "runs": (previous or {}).get("runs", 0) + 1,
+    }
+    body = render(kind, summary, current, previous, output)
+
+    def remember(comment_id, node_id):
+        _store(key, {"id": comment_id, "node_id": node_id, "state": current}, state_file)
+
+    # Queue the write if writes are batched
+    if writer:
+        if cached:
+            def edited(item):
+                if item.ok:
+                    remember(cached["id"], cached["node_id"])
+            writer.edit_comment(number, cached["node_id"], body, callback=edited)
+        else:
+            # The new comment's ID is looked up by its marker on the next run
+            writer.comment(number, body)
+        return True
+
+    if cached:
+        path = f'repos/{{owner}}/{{repo}}/issues/comments/{cached["id"]}'
+        comment = _gh_api(['-X', 'PATCH', path], repo_path, body)
+        if comment is not None:
+            remember(comment["id"], comment["node_id"])
+            print(f"Updated the result comment on #{number}")
+            return True
+        # The comment was probably deleted
+        print(f"Could not update comment {cached['id']}, posting a new one")
+        current["runs"] = 1
+        body = render(kind, summary, current, None, output)
+
+    comment = _gh_api(['-X', 'POST', f'repos/{{owner}}/{{repo}}/issues/{number}/comments'],
+                      repo_path, body)
+    if comment is None:
+        return False
+    remember(comment["id"], comment["node_id"])
+    print(f"Posted the result comment on #{number}")
+    return True
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Structured Logging
+
+This module sets up the logging pipeline shared by the long-running scripts.
+Log calls only put the record on an in-memory queue; a listener thread
+writes it to the console and, optionally, to a log file as one JSON object
+per line. The log file is rotated by size and age, and rotated files are
+gzip-compressed by the listener thread, so slow disks never stall the caller.
+
+Structured fields are passed with ``extra``:
+
+    logger.info("Task created", extra={"issue": 12, "task_id": "abc", "stage": "trigger"})
+"""
+
+import os
+import sys
+import copy
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+# Constants
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+MAX_BYTES = 10 * 1024 * 1024  # 10 MB
+BACKUP_COUNT = 5
+ROTATE_INTERVAL = 24 * 3600  # 1 day
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; everything else was passed in through extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "taskName"
+}
+
+_listener = None
+_queue_handler = None
+_previous = None  # Root handlers and level before setup_logging, restored on shutdown
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects including extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRIBUTES or key.startswith("_"):
+                continue
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                value = str(value)
+            entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate on size or age and gzip-compress rotated files."""
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 rotate_interval=ROTATE_INTERVAL):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.rotate_interval = rotate_interval
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        self._opened_at = self._file_start()
+
+    def _file_start(self):
+        try:
+            if os.path.getsize(self.baseFilename):
+                return os.path.getmtime(self.baseFilename)
+        except OSError:
+            pass
+        return time.time()
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.rotate_interval and time.time() - self._opened_at >= self.rotate_interval:
+            try:
+                if os.path.getsize(self.baseFilename) > 0:
+                    return True
+            except OSError:
+                pass
+            # Nothing written yet: start a new interval instead of rotating an empty file
+            self._opened_at = time.time()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+    def prepare(self, record):
+        """Merge the arguments into the message but keep the traceback separate
+
+        The default implementation appends the traceback to the message and
+        drops exc_info; here it is pre-formatted into exc_text instead, which
+        the console formatter prints and the JSON formatter stores as "exception".
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(name, log_file=None, level=logging.INFO, console=True,
+                  max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, rotate_interval=ROTATE_INTERVAL):
+    """Route all logging through a queue and return the named logger
+
+    Args:
+        name: Name of the logger to return
+        log_file: Optional JSON log file, rotated and compressed
+        level: Log level of the root logger
+        console: Also log human-readable lines to stderr
+        max_bytes: Rotate the log file when it grows beyond this size (0 disables)
+        backup_count: Number of compressed log files to keep
+        rotate_interval: Rotate the log file after this many seconds (0 disables)
+    """
+    global _listener, _queue_handler, _previous
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+    if log_file:
+        log_dir = os.path.dirname(os.path.abspath(log_file))
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = CompressingRotatingFileHandler(log_file, max_bytes=max_bytes,
+                                                      backup_count=backup_count,
+                                                      rotate_interval=rotate_interval)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    if _listener:
+        _listener.stop()
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    root = logging.getLogger()
+    if _previous is None:
+        _previous = (root.handlers[:], root.level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    return logging.getLogger(name)
+
+
+def shutdown_logging():
+    """Flush queued records, stop the listener thread and restore the root handlers"""
+    global _listener, _queue_handler, _previous
+    if _listener:
+        _listener.stop()
+        _listener = None
+    root = logging.getLogger()
+    if _queue_handler:
+        root.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _previous is not None:
+        handlers, level = _previous
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        _previous = None
+    if DroppingQueueHandler.dropped:
+        sys.stderr.write(f"Logging queue was full, "
+                         f"dropped {DroppingQueueHandler.dropped} records\n")
+        DroppingQueueHandler.dropped = 0
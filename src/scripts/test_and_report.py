@@ -12,12 +12,26 @@ import json
 import os
 import sys
 import time
+import shutil
 import argparse
+import tempfile
 from pathlib import Path
+from contextlib import ExitStack
+
+from output_capture import excerpt_text
+from github_limits import run_gh
+from result_cache import POLICIES, MAX_AGE_HOURS, cached_run
+from test_runner import (add_runner_arguments, runner_options, run_tests,
+                         install_dependencies, isolated_environment)
+from report_parser import collect_failures
+from failure_index import FailureIndex, fingerprint, marker
+from flaky_detector import RERUNS, RERUN_JOBS, FlakyHistory, confirm_failures, rerun_command
+from bisect_commits import BISECT_JOBS, Bisector, good_commit, record_good
 
 # Constants
 OPENHANDS_API_URL = "http://localhost:17244/api/tasks"
 GITHUB_LABEL = "fix-me"
+MAX_ISSUES = 10
 
 
 def parse_args():
@@ -27,44 +41,43 @@ def parse_args():
                         help='Path to the repository to test')
     parser.add_argument('--test-command', type=str, default='npm test',
                         help='Command to run tests')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Run pytest/jest test files in N parallel processes (0: one per CPU)')
+    parser.add_argument('--test-cache', choices=POLICIES, default='off',
+                        help='Reuse test results of identical trees: off, reuse-passed, '
+                             'reuse-all or refresh (default: off)')
+    parser.add_argument('--test-cache-max-age', type=float, default=MAX_AGE_HOURS,
+                        help='Ignore cached test results older than this many hours')
     parser.add_argument('--skip-openhands', action='store_true',
                         help='Skip triggering OpenHands')
+    parser.add_argument('--report', type=str, action='append',
+                        help='Test report to parse (JUnit XML, pytest JSON or jest JSON); '
+                             'by default pytest/jest are run with a report option')
+    parser.add_argument('--max-issues', type=int, default=MAX_ISSUES,
+                        help='Maximum number of issues created for individual failures')
+    parser.add_argument('--single-issue', action='store_true',
+                        help='Create one issue with the raw test output instead of one per failure')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='Create issues even for failures that already have an open issue')
+    parser.add_argument('--reruns', type=int, default=RERUNS,
+                        help='Rerun each failing test N times in isolation and only report '
+                             'failures that fail every time (0: report all failures)')
+    parser.add_argument('--rerun-jobs', type=int, default=RERUN_JOBS,
+                        help='Number of reruns running in parallel')
+    parser.add_argument('--bisect', action='store_true',
+                        help='Find the commit that introduced each new failure and attach its '
+                             'diff to the issue and the fix task')
+    parser.add_argument('--bisect-good', type=str,
+                        help='Commit known to pass (default: the last commit whose tests passed, '
+                             'or the merge base with the default branch)')
+    parser.add_argument('--bisect-jobs', type=int, default=BISECT_JOBS,
+                        help='Number of commits tested at once during bisection')
+    add_runner_arguments(parser)
     return parser.parse_args()
 
 
-def run_tests(repo_path, test_command):
-    """Run tests in the specified repository"""
-    print(f"Running tests in {repo_path} with command: {test_command}")
-
-    # Change to the repository directory
-    original_dir = os.getcwd()
-    os.chdir(repo_path)
-
-    try:
-        # Run the test command
-        test_result = subprocess.run(
-            test_command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-
-        # Change back to the original directory
-        os.chdir(original_dir)
-
-        return test_result
-    except Exception as e:
-        print(f"Error running tests: {e}")
-        # Change back to the original directory
-        os.chdir(original_dir)
-        return None
-
-
-def create_github_issue(test_output, error_message, repo_path):
-    """Create a GitHub issue with test failure details"""
-    print("Creating GitHub issue...")
-
-    # Get repository name from git config
+def get_repo_name(repo_path):
+    """Get the owner/repo name from the git remote"""
     try:
         repo_url = subprocess.run(
             ['git', 'config', '--get', 'remote.origin.url'],
@@ -74,10 +87,33 @@ def create_github_issue(test_output, error_message, repo_path):
         ).stdout.strip()
 
         # Extract owner/repo from URL
-        repo_name = repo_url.split('/')[-2] + '/' + repo_url.split('/')[-1].replace('.git', '')
+        return repo_url.split('/')[-2] + '/' + repo_url.split('/')[-1].replace('.git', '')
     except Exception as e:
         print(f"Error getting repository name: {e}")
-        repo_name = "unknown/repository"
+        return "unknown/repository"
+
+
+def culprit_section(culprit):
+    """Return the issue section describing the commit found by bisection"""
+    if not culprit:
+        return ""
+    return f"""
+## Likely Culprit
+Bisection found `{culprit['commit'][:12]}` ({culprit['subject']}) by {culprit['author']} as the
+first failing commit; `{culprit['good'][:12]}` passes.
+
+```diff
+{culprit['diff']}
+```
+"""
+
+
+def create_github_issue(test_output, error_message, repo_path, failure_fingerprint=None,
+                        culprit=None):
+    """Create a GitHub issue with test failure details"""
+    print("Creating GitHub issue...")
+
+    repo_name = get_repo_name(repo_path)
 
     # Format the issue body
     issue_body = f"""
@@ -88,27 +124,96 @@ def create_github_issue(test_output, error_message, repo_path):
 ```
 {test_output}
 ```
+{culprit_section(culprit)}
+## Repository Information
+- **Repository**: {repo_name}
+- **Path**: {repo_path}
+- **Test Command**: {args.test_command}
 
+## Metadata
+- **Label**: {GITHUB_LABEL}
+- **Priority**: high
+- **Run ID**: {time.strftime('%Y%m%d%H%M%S')}
+"""
+    if failure_fingerprint:
+        issue_body += marker(failure_fingerprint) + "\n"
+
+    return open_issue(f'Test Failure: {error_message[:50]}...', issue_body, repo_path)
+
+
+def create_failure_issue(failure, repo_path, failure_fingerprint=None, culprit=None):
+    """Create a GitHub issue for a single failing test"""
+    print(f"Creating GitHub issue for {failure['test_id']}...")
+
+    repo_name = get_repo_name(repo_path)
+
+    # Format the issue body
+    issue_body = f"""
+## Test Failure
+`{failure['test_id']}`
+
+{failure['message']}
+
+## Traceback
+```
+{failure['traceback']}
+```
+{culprit_section(culprit)}
 ## Repository Information
 - **Repository**: {repo_name}
 - **Path**: {repo_path}
+- **Test File**: {failure['file']}
 - **Test Command**: {args.test_command}
 
 ## Metadata
 - **Label**: {GITHUB_LABEL}
 - **Priority**: high
 - **Run ID**: {time.strftime('%Y%m%d%H%M%S')}
+"""
+    if failure_fingerprint:
+        issue_body += marker(failure_fingerprint) + "\n"
+
+    title = f"Test Failure: {failure['test_id']}"
+    if len(title) > 120:
+        title = title[:117] + "..."
+    return open_issue(title, issue_body, repo_path)
+
+
+def comment_recurrence(issue_number, failure, repo_path):
+    """Comment on the open issue of a failure that occurred again"""
+    print(f"Failure {failure['test_id'] or 'of the test run'} is already tracked in "
+          f"issue #{issue_number}, adding a comment...")
+
+    comment_body = f"""
+🔁 This failure occurred again.
+
+- **Test**: `{failure['test_id'] or args.test_command}`
+- **Message**: {failure['message'][:300]}
+- **Run ID**: {time.strftime('%Y%m%d%H%M%S')}
 """
 
-    # Create the issue using GitHub CLI
-    result = subprocess.run(
+    result = run_gh(
+        ['gh', 'issue', 'comment', str(issue_number), '--body-file', '-'],
+        input=comment_body,
+        cwd=repo_path
+    )
+
+    if result.returncode != 0:
+        print(f"Error commenting on issue #{issue_number}: {result.stderr}")
+        return False
+    return True
+
+
+def open_issue(title, body, repo_path):
+    """Open an issue with the fix-me label and return its number"""
+    # Create the issue using GitHub CLI; the body is passed on stdin to stay clear of ARG_MAX
+    result = run_gh(
         ['gh', 'issue', 'create',
-         '--title', f'Test Failure: {error_message[:50]}...',
-         '--body', issue_body,
+         '--title', title,
+         '--body-file', '-',
          '--label', GITHUB_LABEL],
-        cwd=repo_path,
-        capture_output=True,
-        text=True
+        input=body,
+        cwd=repo_path
     )
 
     if result.returncode != 0:
@@ -123,33 +228,29 @@ def create_github_issue(test_output, error_message, repo_path):
     return issue_number
 
 
-def trigger_openhands(issue_number, repo_path):
-    """Trigger OpenHands API to fix the issue"""
-    print(f"Triggering OpenHands to fix issue #{issue_number}...")
+def trigger_openhands(issue_number, repo_path, failure=None, culprit=None):
+    """Trigger OpenHands API to fix the issue
 
-    # Get repository name from git config
-    try:
-        repo_url = subprocess.run(
-            ['git', 'config', '--get', 'remote.origin.url'],
-            cwd=repo_path,
-            capture_output=True,
-            text=True
-        ).stdout.strip()
+    If a parsed failure is given, the task context only carries that
+    failure, so the fix targets one test. A culprit commit found by
+    bisection is passed along with its diff.
+    """
+    print(f"Triggering OpenHands to fix issue #{issue_number}...")
 
-        # Extract owner/repo from URL
-        repo_name = repo_url.split('/')[-2] + '/' + repo_url.split('/')[-1].replace('.git', '')
-    except Exception as e:
-        print(f"Error getting repository name: {e}")
-        repo_name = "unknown/repository"
+    repo_name = get_repo_name(repo_path)
 
     payload = {
         'command': 'fix-test-errors',
         'context': {
             'issue_number': issue_number,
             'repository': repo_name,
-            'repo_path': repo_path
+            'repo_path': str(repo_path)
         }
     }
+    if failure:
+        payload['context']['failure'] = failure
+    if culprit:
+        payload['context']['culprit'] = culprit
 
     try:
         response = requests.post(
@@ -169,6 +270,28 @@ def trigger_openhands(issue_number, repo_path):
         return False
 
 
+def open_bisector(repo_path, stack):
+    """Set up parallel bisection from the last good commit
+
+    Returns the Bisector (closed with the stack), or False if there is no
+    good commit to start from.
+    """
+    good = good_commit(repo_path, args.bisect_good)
+    if not good:
+        print("Bisect: no known good commit; pass --bisect-good")
+        return False
+
+    def run(test_command, worktree):
+        env = install_dependencies(worktree, args)
+        if env is None:
+            return None
+        # Runs of older commits don't belong in the test history
+        return run_tests(test_command, worktree, env=env,
+                         **dict(runner_options(args), prioritize=False, record_history=False))
+
+    return stack.enter_context(Bisector(repo_path, good, run, args.bisect_jobs))
+
+
 def main():
     global args
     args = parse_args()
@@ -179,8 +302,43 @@ def main():
         print(f"Error: Repository path {repo_path} does not exist or is not a directory")
         return 1
 
-    # Run the tests
-    test_result = run_tests(repo_path, args.test_command)
+    # Install dependencies, reusing cached environments
+    deps_env = install_dependencies(repo_path, args)
+    if deps_env is None:
+        print("Failed to install dependencies. Exiting.")
+        return 1
+
+    # Run the tests, letting pytest/jest write a report unless one is given
+    report_dir = tempfile.mkdtemp(prefix="test-reports-")
+    run_report_dir = None if args.report or args.single_issue else report_dir
+    try:
+        test_result = cached_run(args.test_command, repo_path,
+                                 lambda: run_tests(args.test_command, repo_path, args.shards,
+                                                   env=deps_env, report_dir=run_report_dir,
+                                                   **runner_options(args)),
+                                 args.test_cache, args.test_cache_max_age,
+                                 options=dict(runner_options(args), shards=args.shards),
+                                 report_dir=run_report_dir)
+        failures = []
+        if test_result is not None and test_result.returncode != 0 and not args.single_issue:
+            failures = collect_failures((args.report or []) + [report_dir], str(repo_path))
+        # Flaky tests pass on a rerun; only confirmed failures are worth a fix task
+        if failures and args.reruns > 0:
+            failures, flaky = confirm_failures(failures, args.test_command, repo_path,
+                                               args.reruns, args.rerun_jobs,
+                                               dict(isolated_environment(args.clean_env,
+                                                                         args.pass_env),
+                                                    **deps_env),
+                                               args.timeout or None)
+            history = FlakyHistory(repo_path)
+            history.record(failures, flaky)
+            history.save()
+            if flaky and not failures:
+                print(f"All {len(flaky)} failing tests are flaky; not reporting them.")
+                return 0
+    finally:
+        shutil.rmtree(report_dir, ignore_errors=True)
+
     if test_result is None:
         print("Failed to run tests. Exiting.")
         return 1
@@ -188,26 +346,89 @@ def main():
     # If tests pass, exit with success
     if test_result.returncode == 0:
         print("Tests passed successfully!")
+        # Later bisections start from the last commit that passed
+        record_good(repo_path)
         return 0
 
-    # Tests failed, extract error message
-    error_message = test_result.stderr if test_result.stderr else test_result.stdout
-    print(f"Tests failed with error: {error_message}")
-
-    # Create GitHub issue
-    issue_number = create_github_issue(test_result.stdout, error_message, repo_path)
-    if not issue_number:
-        print("Failed to create GitHub issue. Exiting.")
+    # One focused issue and fix task per failure if the report could be parsed
+    if failures:
+        print(f"Tests failed: {len(failures)} failing tests")
+        raw_output = None
+    else:
+        # Tests failed, extract error message
+        error_message = test_result.stderr if test_result.stderr else test_result.stdout
+        print(f"Tests failed with error: {error_message}")
+        if getattr(test_result, "log_path", None):
+            print(f"Full test output: {test_result.log_path}")
+        raw_output = (excerpt_text(test_result.stdout, limit=45000),
+                      excerpt_text(error_message, limit=10000))
+        failures = [{"test_id": "", "message": error_message.strip()[-1000:],
+                     "traceback": error_message[-10000:]}]
+
+    # Recurring failures are tracked by their open issue instead of a new issue and fix task
+    index = None
+    if not args.no_dedupe:
+        index = FailureIndex(repo_path)
+        if not index.sync(GITHUB_LABEL):
+            print("Could not sync the failure index with open issues, using the local index")
+
+    issues = []
+    recurring = 0
+    bisector = None
+    with ExitStack() as stack:
+        for failure in failures:
+            value = fingerprint(failure)
+            existing = index.lookup(value) if index else None
+            if existing:
+                if comment_recurrence(existing, failure, repo_path):
+                    index.record(value, existing, failure["test_id"])
+                    recurring += 1
+                continue
+            if len(issues) >= args.max_issues:
+                print(f"Not creating an issue for {failure['test_id']}: --max-issues reached")
+                continue
+
+            # Pin the new failure to the commit that introduced it
+            culprit = None
+            if args.bisect:
+                if bisector is None:
+                    bisector = open_bisector(repo_path, stack)
+                if bisector:
+                    command = (rerun_command(args.test_command, str(repo_path), failure["test_id"])
+                               or args.test_command)
+                    culprit = bisector.find(command)
+
+            if raw_output:
+                issue_number = create_github_issue(*raw_output, repo_path, value, culprit)
+            else:
+                issue_number = create_failure_issue(failure, repo_path, value, culprit)
+            if not issue_number:
+                print(f"Failed to create GitHub issue for {failure['test_id'] or 'the test run'}.")
+                continue
+            if index:
+                index.record(value, issue_number, failure["test_id"])
+            issues.append((issue_number, None if raw_output else failure, culprit))
+
+    if index:
+        index.save()
+    if recurring:
+        print(f"{recurring} failure(s) already have an open issue; commented there instead.")
+    if not issues:
+        if recurring:
+            return 0
+        print("Failed to create GitHub issues. Exiting.")
         return 1
 
     # Trigger OpenHands if not skipped
     if not args.skip_openhands:
-        if not trigger_openhands(issue_number, repo_path):
+        triggered = [trigger_openhands(issue_number, repo_path, failure, culprit)
+                     for issue_number, failure, culprit in issues]
+        if not all(triggered):
             print("Failed to trigger OpenHands. Exiting.")
             return 1
-        print("Workflow completed successfully. OpenHands is now working on fixing the issue.")
+        print("Workflow completed successfully. OpenHands is now working on fixing the issues.")
     else:
-        print("OpenHands triggering skipped. Issue created successfully.")
+        print(f"OpenHands triggering skipped. {len(issues)} issue(s) created successfully.")
 
     return 0
 
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Test Runner
+
+This module runs test commands for test_and_report, check_pr and verify_fix.
+The working directory and environment are passed per call instead of being
+changed for the whole process, so several test runs can safely run at the
+same time from different threads. Each run can be limited in wall-clock
+time (killing the whole process group), CPU time and memory, gets its own
+temporary directory and doesn't see the workflow's own credentials. The
+result carries timing data alongside the output.
+
+With --install-deps, dependencies are installed through the dependency
+cache (see deps_cache) before the tests run. With --warm-worker, plain
+pytest commands run in a resident worker with pre-loaded imports (see
+test_worker).
+
+pytest and jest runs write a report that is added to the test history
+(see run_history). With --prioritize, pytest test files run in the order
+that reaches a failure soonest (jest picks its own order); --fail-fast
+stops at the first failure.
+"""
+
+import os
+import shutil
+import tempfile
+
+from output_capture import run_streaming
+from shard_runner import detect_framework, run_sharded, restrict_command, suite_files
+from report_parser import report_command, has_report_option, collect_results
+from run_history import RunHistory, fail_fast_command, affected_files
+from deps_cache import BUDGET_MB, ensure_dependencies
+from test_worker import run_in_worker
+
+# Environment variables that hold credentials of the workflow, not of the tests
+WORKFLOW_CREDENTIALS = ("GITHUB_TOKEN", "GH_TOKEN", "GH_ENTERPRISE_TOKEN", "GITLAB_TOKEN",
+                        "OPENHANDS_API_KEY", "OPENPROJECT_API_KEY")
+# Variables kept by --clean-env
+BASE_ENV = ("PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "LANGUAGE", "TERM", "TZ",
+            "CI", "VIRTUAL_ENV", "CONDA_PREFIX", "PYTHONPATH", "NODE_ENV", "NODE_OPTIONS",
+            "NODE_PATH", "NVM_DIR", "JAVA_HOME", "GOPATH", "GOROOT", "CARGO_HOME", "RUSTUP_HOME")
+
+
+def add_runner_arguments(parser):
+    """Add the timeout, resource limit and environment options to a parser"""
+    parser.add_argument('--timeout', type=float, default=0,
+                        help='Kill the tests (and all processes they started) after this many '
+                             'seconds (0: no timeout)')
+    parser.add_argument('--cpu-limit', type=int, default=0,
+                        help='CPU time limit per test process in seconds (0: no limit)')
+    parser.add_argument('--memory-limit', type=int, default=0,
+                        help='Virtual memory limit per test process in MiB (0: no limit)')
+    parser.add_argument('--clean-env', action='store_true',
+                        help='Only pass basic variables (PATH, HOME, locale, toolchain) to the '
+                             'tests')
+    parser.add_argument('--pass-env', type=str, action='append', default=[],
+                        help='Environment variable passed to the tests even if it would be '
+                             'removed (can be repeated)')
+    parser.add_argument('--warm-worker', action='store_true',
+                        help='Run plain pytest commands in a resident worker with pre-loaded '
+                             'imports instead of a new interpreter')
+    parser.add_argument('--install-deps', action='store_true',
+                        help='Install dependencies (npm, yarn, poetry, pip) from the lockfile '
+                             'through the dependency cache before running the tests')
+    parser.add_argument('--deps-cache-size', type=int, default=BUDGET_MB,
+                        help='Size budget of the dependency cache in MiB')
+    parser.add_argument('--prioritize', action='store_true',
+                        help='Run recently failing, new, affected and fast test files first, '
+                             'using the test history (pytest only)')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Stop the tests at the first failure (pytest -x, jest --bail)')
+    parser.add_argument('--no-test-history', action='store_true',
+                        help='Do not add the test durations and outcomes to the test history')
+
+
+def runner_options(args):
+    """Return the run_tests keyword arguments for parsed runner options"""
+    return {
+        "timeout": getattr(args, "timeout", 0),
+        "cpu_limit": getattr(args, "cpu_limit", 0),
+        "memory_limit": getattr(args, "memory_limit", 0),
+        "clean_env": getattr(args, "clean_env", False),
+        "pass_env": getattr(args, "pass_env", []),
+        "warm_worker": getattr(args, "warm_worker", False),
+        "prioritize": getattr(args, "prioritize", False),
+        "fail_fast": getattr(args, "fail_fast", False),
+        "record_history": not getattr(args, "no_test_history", False),
+    }
+
+
+def install_dependencies(repo_path, args):
+    """Install dependencies if --install-deps was given
+
+    Returns:
+        Environment variables for run_tests (empty without --install-deps),
+        or None if the installation failed
+    """
+    if not getattr(args, "install_deps", False):
+        return {}
+    return ensure_dependencies(str(repo_path), budget_mb=args.deps_cache_size)
+
+
+def isolated_environment(clean_env=False, pass_env=(), base=None):
+    """Return the environment for a test run
+
+    The workflow's own credentials (WORKFLOW_CREDENTIALS) are removed; other
+    variables, including credentials the tests may need, are kept. With
+    clean_env only BASE_ENV and locale variables are kept. Variables named in
+    pass_env are always kept.
+    """
+    base = os.environ if base is None else base
+    env = {}
+    for name, value in base.items():
+        if name in pass_env:
+            env[name] = value
+        elif clean_env:
+            if name in BASE_ENV or name.startswith("LC_"):
+                env[name] = value
+        elif name not in WORKFLOW_CREDENTIALS:
+            env[name] = value
+    return env
+
+
+def limit_command(command, cpu_limit=0, memory_limit=0):
+    """Prefix a shell command with ulimit calls for the CPU time and memory limits
+
+    The limits apply to every process the command starts. They are set by the
+    shell rather than in the forked child, which is not safe in threaded
+    callers.
+    """
+    limits = []
+    if cpu_limit:
+        limits.append(f"ulimit -t {int(cpu_limit)}")
+    if memory_limit:
+        limits.append(f"ulimit -v {int(memory_limit) * 1024}")
+    if not limits:
+        return command
+    return " && ".join(limits) + " || exit 125\n" + command
+
+
+def prioritized_files(test_command, repo_path, test_files=None):
+    """Return the test files of a pytest run in fail-fast order, or None
+
+    Without test_files the whole suite is ordered; files affected by the
+    current change then count as likely failures. jest sorts the files it
+    is given with its own test sequencer, so other runs are left unordered.
+    """
+    if detect_framework(test_command, repo_path) != "pytest":
+        print("Not ordering the test files: --prioritize only supports pytest")
+        return None
+    files = test_files or suite_files(test_command, repo_path)
+    if not files:
+        return None
+    affected = set() if test_files else affected_files(repo_path, files)
+    ordered = RunHistory(repo_path).order(files, affected)
+    print(f"Running {len(ordered)} test files in fail-fast order, starting with "
+          f"{', '.join(ordered[:3])}")
+    return ordered
+
+
+def record_results(repo_path, report_dir):
+    """Add the results in report_dir to the test history; errors are only printed"""
+    try:
+        results = collect_results([report_dir], repo_path)
+        if results:
+            RunHistory(repo_path).record(results)
+    except Exception as e:
+        print(f"Could not update the test history: {e}")
+
+
+def run_tests(test_command, repo_path, shards=1, test_files=None, timeout=0, cpu_limit=0,
+              memory_limit=0, clean_env=False, pass_env=(), env=None, warm_worker=False,
+              prioritize=False, fail_fast=False, record_history=True, report_dir=None):
+    """Run a test command in a repository
+
+    Args:
+        test_command: Test command
+        repo_path: Repository to run the tests in (the process cwd is not changed)
+        shards: Run pytest/jest test files in this many parallel processes
+        test_files: Only run these test files
+        timeout: Kill the tests after this many seconds (0: no timeout)
+        cpu_limit: CPU time limit per process in seconds (0: no limit)
+        memory_limit: Virtual memory limit per process in MiB (0: no limit)
+        clean_env: Only pass basic variables to the tests
+        pass_env: Variables that are always passed
+        env: Additional variables for the tests
+        warm_worker: Run plain pytest commands in a warm worker (see test_worker)
+        prioritize: Run pytest test files in fail-fast order (see run_history)
+        fail_fast: Stop at the first failure
+        record_history: Add the results to the test history
+        report_dir: Let pytest/jest write their report into this directory
+
+    Returns:
+        A CompletedProcess with bounded output excerpts, log_path and the
+        duration, cpu_time, max_rss and timed_out of the run, or None if the
+        tests could not be started
+    """
+    repo_path = str(repo_path)
+    print(f"Running tests in {repo_path} with command: {test_command}")
+
+    run_env = isolated_environment(clean_env, pass_env)
+    run_env.update(env or {})
+    # A private temporary directory keeps concurrent runs from colliding
+    tmp = tempfile.mkdtemp(prefix="test-run-")
+    run_env["TMPDIR"] = tmp
+
+    def limited(command):
+        return limit_command(command, cpu_limit, memory_limit)
+
+    # Let pytest/jest write a report for the caller and the test history; other
+    # commands (e.g. a mocha `npm test`) are left unchanged
+    reported = report_command(test_command, report_dir or os.path.join(tmp, "reports"), repo_path)
+    if (report_dir or record_history) and not has_report_option(test_command) \
+            and reported != test_command:
+        report_dir = report_dir or os.path.join(tmp, "reports")
+        os.makedirs(report_dir, exist_ok=True)
+        test_command = reported
+    else:
+        report_dir = None
+    if fail_fast:
+        test_command = fail_fast_command(test_command, repo_path)
+
+    try:
+        if prioritize:
+            test_files = prioritized_files(test_command, repo_path, test_files) or test_files
+
+        # Run pytest/jest suites in parallel shards if requested
+        test_result = None
+        if shards != 1:
+            test_result = run_sharded(test_command, repo_path, shards, test_files,
+                                      env=run_env, timeout=timeout or None, wrap=limited)
+
+        if test_result is None:
+            # Only run the selected test files
+            if test_files:
+                test_command = restrict_command(test_command, repo_path, test_files)
+                print(f"Running {len(test_files)} selected test files: {test_command}")
+            if warm_worker:
+                test_result = run_in_worker(test_command, repo_path, run_env,
+                                            timeout=timeout or None, cpu_limit=cpu_limit,
+                                            memory_limit=memory_limit)
+                if test_result is not None:
+                    print("Ran the tests in a warm test worker")
+        if test_result is None:
+            # Stream the output to a log file, keeping only an excerpt in memory
+            test_result = run_streaming(limited(test_command), cwd=repo_path, env=run_env,
+                                        timeout=timeout or None)
+        if record_history and report_dir:
+            record_results(repo_path, report_dir)
+    except Exception as e:
+        print(f"Error running tests: {e}")
+        return None
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    cpu = f", {test_result.cpu_time:.1f}s CPU" if test_result.cpu_time is not None else ""
+    print(f"Tests finished in {test_result.duration:.1f}s{cpu} "
+          f"(exit code {test_result.returncode}); output written to {test_result.log_path}")
+    if test_result.timed_out:
+        print(f"Tests timed out after {timeout} seconds")
+    return test_result
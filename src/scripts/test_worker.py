@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Warm Test Worker
+
+This module keeps a resident pytest worker per interpreter and set of
+dependencies, so small suites don't pay for interpreter startup and the
+import of the whole test stack on every run. The worker imports pytest and
+the third-party packages the tests import once, then forks a fresh child
+for every run: each run starts from the pre-loaded state and nothing leaks
+from one run into the next. The repository's own modules are never
+pre-loaded, so code changes are always picked up.
+
+Workers are keyed by the interpreter and the dependency files of the
+repository (requirements, lockfiles, pyproject.toml, setup.py) and the
+interpreter's installed packages. When those change, a new worker is
+started; workers exit after being idle for a while.
+
+Only plain "pytest ..." and "python -m pytest ..." commands can use a
+worker; other commands run as usual.
+"""
+
+import os
+import sys
+import ast
+import json
+import time
+import fcntl
+import shlex
+import signal
+import socket
+import shutil
+import hashlib
+import argparse
+import selectors
+import subprocess
+import tempfile
+
+# Constants
+WORKER_DIR = os.environ.get(
+    "TEST_WORKER_DIR",
+    os.path.expanduser("~/.cache/openhands-workflow/workers")
+)
+IDLE_SECONDS = 30 * 60
+START_TIMEOUT = 60
+DEPENDENCY_FILES = ("requirements.txt", "requirements-dev.txt", "requirements-test.txt",
+                    "poetry.lock", "Pipfile.lock", "pyproject.toml", "setup.py", "setup.cfg")
+SHELL_CHARACTERS = set("|&;<>$`(){}*?[]\n")
+SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "env", ".tox", "__pycache__"}
+
+
+def pytest_invocation(test_command, env=None):
+    """Return (interpreter, pytest arguments, module mode) for a plain pytest command, or None
+
+    In module mode ("python -m pytest") the working directory is put on sys.path.
+    """
+    env = os.environ if env is None else env
+    # The report option of report_parser uses the shard index; resolve it here
+    test_command = test_command.replace("${TEST_SHARD_INDEX:-0}", env.get("TEST_SHARD_INDEX", "0"))
+    if SHELL_CHARACTERS & set(test_command):
+        return None
+    try:
+        words = shlex.split(test_command)
+    except ValueError:
+        return None
+    if not words:
+        return None
+
+    path = env.get("PATH")
+    if os.path.basename(words[0]) in ("pytest", "py.test"):
+        script = shutil.which(words[0], path=path)
+        if not script:
+            return None
+        try:
+            with open(script, "rb") as f:
+                shebang = f.readline().decode("utf-8", errors="replace")
+        except OSError:
+            return None
+        words_shebang = shebang[2:].split() if shebang.startswith("#!") else []
+        if words_shebang[:1] == ["/usr/bin/env"] and len(words_shebang) > 1:
+            words_shebang = [shutil.which(words_shebang[1], path=path) or ""]
+        interpreter = words_shebang[0] if words_shebang else ""
+        if "python" not in os.path.basename(interpreter):
+            return None
+        return interpreter, words[1:], False
+    if os.path.basename(words[0]).startswith("python") and words[1:3] == ["-m", "pytest"]:
+        interpreter = shutil.which(words[0], path=path)
+        return (interpreter, words[3:], True) if interpreter else None
+    return None
+
+
+def _site_packages_stamp(interpreter):
+    """Return the modification times of the interpreter's package directories"""
+    result = subprocess.run(
+        [interpreter, '-c',
+         'import site, sys; print("\\n".join(site.getsitepackages() + [sys.prefix]))'],
+        capture_output=True, text=True
+    )
+    stamps = []
+    for line in result.stdout.splitlines():
+        try:
+            stamps.append(f"{line}:{os.stat(line).st_mtime_ns}")
+        except OSError:
+            pass
+    return stamps
+
+
+def worker_key(interpreter, repo_path):
+    """Return the key of the worker for an interpreter and the repository's dependencies"""
+    digest = hashlib.sha256(os.path.realpath(interpreter).encode("utf-8"))
+    digest.update(interpreter.encode("utf-8"))
+    for name in DEPENDENCY_FILES:
+        try:
+            with open(os.path.join(repo_path, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+        except OSError:
+            pass
+    for stamp in _site_packages_stamp(interpreter):
+        digest.update(stamp.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def socket_path(key, worker_dir=None):
+    """Return the socket path of a worker"""
+    worker_dir = worker_dir or WORKER_DIR
+    path = os.path.join(worker_dir, f"{key}.sock")
+    # Unix socket paths are limited to about 100 bytes
+    if len(path) > 100:
+        path = os.path.join(tempfile.gettempdir(), f"test-worker-{key}.sock")
+    return path
+
+
+def third_party_imports(repo_path):
+    """Return the top-level modules imported by the tests that are not part of the repository"""
+    names = set()
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        for file in files:
+            if not (file.startswith("test") or file == "conftest.py") or not file.endswith(".py"):
+                continue
+            try:
+                with open(os.path.join(root, file), encoding="utf-8") as f:
+                    tree = ast.parse(f.read())
+            except (OSError, SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(alias.name.split(".")[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.add(node.module.split(".")[0])
+    local = {name[:-3] if name.endswith(".py") else name for name in os.listdir(repo_path)}
+    return sorted(names - local)
+
+
+def preload(repo_path, modules=()):
+    """Import pytest and the installed packages the tests use
+
+    Modules that live inside the repository are skipped, so the children
+    always import the current code.
+    """
+    import importlib
+    import importlib.util
+    import pytest  # noqa: F401
+    import _pytest.config
+    # Loading the plugin manager imports pytest's built-in and installed plugins
+    _pytest.config.get_plugin_manager()
+
+    repo = os.path.realpath(repo_path) + os.sep
+    loaded = []
+    for name in list(modules) + third_party_imports(repo_path):
+        if name in sys.modules:
+            continue
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            continue
+        origin = getattr(spec, "origin", None) or ""
+        if (not spec or origin in ("built-in", "frozen")
+                or os.path.realpath(origin).startswith(repo)):
+            continue
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            continue
+    return loaded
+
+
+def _run_child(request):
+    """Run pytest in a forked child; never returns"""
+    try:
+        os.setsid()
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        if request.get("cpu_limit") or request.get("memory_limit"):
+            import resource
+            if request.get("cpu_limit"):
+                resource.setrlimit(resource.RLIMIT_CPU, (request["cpu_limit"],) * 2)
+            if request.get("memory_limit"):
+                limit = request["memory_limit"] * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        log = os.open(request["log_path"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(log, 1)
+        os.dup2(log, 2)
+        sys.stdout = os.fdopen(1, "w", buffering=1)
+        sys.stderr = os.fdopen(2, "w", buffering=1)
+        if request.get("module_mode"):
+            # "python -m pytest" puts the working directory first on sys.path
+            sys.path.insert(0, request["cwd"])
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        import pytest
+        code = int(pytest.main(request["args"]))
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+    except BaseException as e:
+        try:
+            os.write(2, f"Test worker error: {e}\n".encode("utf-8"))
+        finally:
+            os._exit(70)
+
+
+def serve(path, repo_path, modules=(), idle_seconds=IDLE_SECONDS):
+    """Pre-load the test stack and serve runs on a Unix socket until idle
+
+    Runs are handled by one thread with a selector, so forking is safe.
+    """
+    # The scripts directory must not shadow modules of the tested repository
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [entry for entry in sys.path if os.path.abspath(entry or ".") != script_dir]
+    loaded = preload(repo_path, modules)
+    print(f"Test worker ready on {path}, pre-loaded: {', '.join(loaded) or 'pytest only'}",
+          flush=True)
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    server.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    running = {}  # pid -> (connection, deadline, timed_out)
+    last_active = time.time()
+    try:
+        while running or time.time() - last_active < idle_seconds:
+            for _ in selector.select(timeout=0.1):
+                conn, _ = server.accept()
+                conn.setblocking(True)
+                conn.settimeout(10)
+                try:
+                    request = json.loads(conn.makefile("r").readline())
+                except (OSError, ValueError):
+                    conn.close()
+                    continue
+                if request.get("command") == "stop":
+                    conn.close()
+                    return
+                pid = os.fork()
+                if pid == 0:
+                    selector.close()
+                    server.close()
+                    _run_child(request)
+                timeout = request.get("timeout")
+                running[pid] = [conn, time.time() + timeout if timeout else None, False]
+
+            # Kill runs that exceeded their timeout, then collect finished runs
+            for pid, run in running.items():
+                if run[1] and time.time() > run[1] and not run[2]:
+                    run[2] = True
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except OSError:
+                        # The child has not started its own session yet
+                        os.kill(pid, signal.SIGKILL)
+            while running:
+                try:
+                    pid, status, usage = os.wait4(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                conn, _, timed_out = running.pop(pid, (None, None, False))
+                if conn is None:
+                    continue
+                # Like subprocess: the negative signal number if the run was killed
+                returncode = (-os.WTERMSIG(status) if os.WIFSIGNALED(status)
+                              else os.WEXITSTATUS(status))
+                response = {"returncode": returncode,
+                            "cpu_time": usage.ru_utime + usage.ru_stime,
+                            "max_rss": usage.ru_maxrss, "timed_out": timed_out}
+                try:
+                    conn.sendall((json.dumps(response) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+                conn.close()
+                last_active = time.time()
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        return client
+    except OSError:
+        client.close()
+        return None
+
+
+def ensure_worker(interpreter, repo_path, worker_dir=None, env=None):
+    """Return the socket path of a running worker, starting one if needed
+
+    env is the environment the worker pre-loads its imports in. Returns
+    None if the worker could not be started.
+    """
+    key = worker_key(interpreter, str(repo_path))
+    path = socket_path(key, worker_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        client = _connect(path)
+        if client:
+            client.close()
+            return path
+
+        print(f"Starting test worker for {interpreter}")
+        log = open(path[:-len(".sock")] + ".log", "a")
+        subprocess.Popen([interpreter, os.path.abspath(__file__), 'serve', '--socket', path,
+                          '--repo-path', str(repo_path)],
+                         cwd=str(repo_path), env=env, stdin=subprocess.DEVNULL, stdout=log,
+                         stderr=log, start_new_session=True)
+        log.close()
+        deadline = time.time() + START_TIMEOUT
+        while time.time() < deadline:
+            client = _connect(path)
+            if client:
+                client.close()
+                return path
+            time.sleep(0.1)
+    print(f"Test worker did not start; see {path[:-len('.sock')]}.log")
+    return None
+
+
+def run_in_worker(test_command, cwd, env=None, log_path=None, timeout=None, cpu_limit=0,
+                  memory_limit=0, worker_dir=None):
+    """Run a pytest command in a warm worker
+
+    Returns:
+        A CompletedProcess like output_capture.run_streaming returns, or None
+        if the command can't use a worker (the caller then runs it normally)
+    """
+    from output_capture import OutputExcerpt, new_log_path
+
+    env = dict(os.environ if env is None else env)
+    invocation = pytest_invocation(test_command, env)
+    if invocation is None:
+        return None
+    interpreter, args, module_mode = invocation
+    # The worker outlives this run, so it doesn't get the run's temporary directory
+    worker_env = {name: value for name, value in env.items() if name != "TMPDIR"}
+    path = ensure_worker(interpreter, cwd, worker_dir, worker_env)
+    if path is None:
+        return None
+
+    log_path = log_path or new_log_path()
+    request = {"cwd": str(cwd), "env": env, "args": args, "module_mode": module_mode,
+               "log_path": log_path,
+               "timeout": timeout, "cpu_limit": cpu_limit, "memory_limit": memory_limit}
+    start = time.time()
+    client = _connect(path)
+    if client is None:
+        return None
+    try:
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        response = json.loads(client.makefile("r").readline() or "null")
+    except (OSError, ValueError):
+        response = None
+    finally:
+        client.close()
+    if not response:
+        print("Test worker failed, running the tests normally")
+        return None
+
+    excerpt = OutputExcerpt()
+    with open(log_path, encoding="utf-8", errors="replace") as log:
+        for line in log:
+            excerpt.add(line)
+    stderr = ""
+    if response["timed_out"]:
+        stderr = f"\n[Timed out after {timeout} seconds; process group killed]\n"
+    result = subprocess.CompletedProcess(test_command, response["returncode"],
+                                         stdout=excerpt.text(), stderr=stderr)
+    result.log_path = log_path
+    result.duration = time.time() - start
+    result.cpu_time = response["cpu_time"]
+    result.max_rss = response["max_rss"]
+    result.timed_out = response["timed_out"]
+    return result
+
+
+def stop_workers(worker_dir=None):
+    """Ask all running workers to exit; returns the number of workers stopped"""
+    worker_dir = worker_dir or WORKER_DIR
+    stopped = 0
+    if not os.path.isdir(worker_dir):
+        return stopped
+    for name in os.listdir(worker_dir):
+        if not name.endswith(".sock"):
+            continue
+        client = _connect(os.path.join(worker_dir, name))
+        if client:
+            client.sendall(b'{"command": "stop"}\n')
+            client.close()
+            stopped += 1
+    return stopped
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Warm pytest worker')
+    parser.add_argument('command', choices=['serve', 'stop'], help='Command to run')
+    parser.add_argument('--socket', type=str, help='Socket to serve on (serve)')
+    parser.add_argument('--repo-path', type=str, default=os.getcwd(),
+                        help='Repository whose test imports are pre-loaded (serve)')
+    parser.add_argument('--preload', type=str, action='append', default=[],
+                        help='Additional module to pre-load (serve, can be repeated)')
+    parser.add_argument('--idle-seconds', type=float, default=IDLE_SECONDS,
+                        help='Exit after this many seconds without runs (serve)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'stop':
+        print(f"Stopped {stop_workers()} test workers")
+        return 0
+
+    if not args.socket:
+        print("Error: serve needs --socket")
+        return 1
+    serve(args.socket, args.repo_path, args.preload, args.idle_seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
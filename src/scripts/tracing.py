@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Pipeline Tracing
+
+This module records span-based traces for the issue fix pipeline.
+Each issue gets one trace whose ID is derived from the repository and issue
+number, so the workflow loop, fix_issue.py and verify_fix.py all report
+into the same trace. A parent span can be handed to child processes through
+the W3C TRACEPARENT environment variable.
+
+Spans are appended to a local JSONL file using the OTLP span field names.
+Running this module as a script prints p50/p95 latency per stage.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+# Constants
+TRACE_FILE = os.environ.get(
+    "WORKFLOW_TRACE_FILE",
+    os.path.expanduser("~/.cache/openhands-workflow/traces.jsonl")
+)
+TRACEPARENT_ENV = "TRACEPARENT"
+
+_service_name = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+_export_lock = threading.Lock()
+
+
+def set_service_name(name):
+    """Set the service name attached to exported spans"""
+    global _service_name
+    _service_name = name
+
+
+def new_span_id():
+    """Return a random 64-bit span ID"""
+    return os.urandom(8).hex()
+
+
+def format_traceparent(trace_id, span_id):
+    """Format a W3C traceparent header value"""
+    return f"00-{trace_id}-{span_id}-01"
+
+
+def parse_traceparent(value):
+    """Parse a W3C traceparent value into (trace_id, span_id), or None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+def inherited_parent():
+    """Return the (trace_id, span_id) passed in by a parent process, or None"""
+    return parse_traceparent(os.environ.get(TRACEPARENT_ENV))
+
+
+def issue_trace_id(issue_number, repository=""):
+    """Return the trace ID for an issue
+
+    A trace passed in through TRACEPARENT takes precedence, so a child
+    process joins the trace of the process that started it.
+    """
+    parent = inherited_parent()
+    if parent:
+        return parent[0]
+    key = f"{repository}#{issue_number}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def traceparent_env(trace_id, span_id, env=None):
+    """Return a copy of the environment that passes the given span to a child process"""
+    env = dict(os.environ if env is None else env)
+    env[TRACEPARENT_ENV] = format_traceparent(trace_id, span_id)
+    return env
+
+
+def export_span(record, trace_file=None):
+    """Append a span record to the trace file"""
+    path = trace_file or TRACE_FILE
+    line = json.dumps(record, sort_keys=True) + "\n"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _export_lock:
+            with open(path, "a") as f:
+                f.write(line)
+    except OSError:
+        # Tracing must never break the pipeline
+        pass
+
+
+def record_span(name, trace_id, start, end, parent_span_id=None, span_id=None,
+                attributes=None, error=None):
+    """Export a span with explicit start and end times (seconds since the epoch)"""
+    span_id = span_id or new_span_id()
+    if parent_span_id is None:
+        parent = inherited_parent()
+        if parent and parent[0] == trace_id:
+            parent_span_id = parent[1]
+
+    record = {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "parentSpanId": parent_span_id or "",
+        "name": name,
+        "startTimeUnixNano": int(start * 1e9),
+        "endTimeUnixNano": int(end * 1e9),
+        "attributes": attributes or {},
+        "status": {"code": "ERROR", "message": str(error)} if error else {"code": "OK"},
+        "resource": {"service.name": _service_name},
+    }
+    export_span(record)
+    return span_id
+
+
+@contextmanager
+def span(name, trace_id, parent_span_id=None, **attributes):
+    """Trace a block of code as a span
+
+    Yields a dict with the span ID and its attributes; attributes added to
+    it inside the block are exported with the span. Exceptions are recorded
+    as an error status and re-raised.
+    """
+    current = {"span_id": new_span_id(), "attributes": dict(attributes)}
+    start = time.time()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        record_span(name, trace_id, start, time.time(),
+                    parent_span_id=parent_span_id,
+                    span_id=current["span_id"],
+                    attributes=current["attributes"],
+                    error=error)
+
+
+def load_spans(trace_file=None):
+    """Read all spans from the trace file"""
+    path = trace_file or TRACE_FILE
+    spans = []
+    if not os.path.exists(path):
+        return spans
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(spans, since=None):
+    """Return per-stage latency statistics in seconds, keyed by span name"""
+    durations = {}
+    for record in spans:
+        start = record.get("startTimeUnixNano", 0) / 1e9
+        if since and start < since:
+            continue
+        duration = (record.get("endTimeUnixNano", 0) - record.get("startTimeUnixNano", 0)) / 1e9
+        durations.setdefault(record.get("name", "unknown"), []).append(duration)
+
+    summary = {}
+    for name, values in durations.items():
+        summary[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values),
+        }
+    return summary
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Summarize fix pipeline traces')
+    parser.add_argument('command', nargs='?', default='summary', choices=['summary'],
+                        help='Command to run (default: summary)')
+    parser.add_argument('--trace-file', type=str, default=TRACE_FILE,
+                        help='Trace file to read')
+    parser.add_argument('--since-hours', type=float,
+                        help='Only include spans started in the last N hours')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the summary as JSON')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    summary = summarize(load_spans(args.trace_file), since=since)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+        return 0
+
+    if not summary:
+        print(f"No spans found in {args.trace_file}")
+        return 0
+
+    print(f"{'Stage':<24} {'Count':>7} {'p50 (s)':>10} {'p95 (s)':>10} {'Max (s)':>10}")
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["p95"]):
+        print(f"{name:<24} {stats['count']:>7} {stats['p50']:>10.2f} "
+              f"{stats['p95']:>10.2f} {stats['max']:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
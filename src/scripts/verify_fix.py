@@ -3,17 +3,32 @@
 Verify Fix Script
 
 This script verifies a fix implemented by OpenHands by running tests
-and closing the issue if the tests pass.
+and closing the issue if the tests pass. With --sticky-comment, one result
+comment per issue is updated in place.
 """
 
-import subprocess
 import requests
 import json
 import os
 import sys
+import shutil
 import argparse
+import tempfile
 from pathlib import Path
 
+import tracing
+from fix_issue import get_repo_info
+from github_batch import GitHubWriteBatcher, repository_for_path
+from github_limits import run_gh
+from output_capture import excerpt_text
+from shard_runner import restrict_command
+from affected_tests import select_tests
+from result_cache import POLICIES, MAX_AGE_HOURS, cached_run
+from report_parser import collect_failures
+from sticky_comment import post_sticky_comment
+from test_runner import (add_runner_arguments, runner_options, run_tests,
+                         install_dependencies)
+
 
 def parse_args():
     """Parse command line arguments"""
@@ -23,46 +38,46 @@ def parse_args():
                         help='Path to the repository')
     parser.add_argument('--test-command', type=str, default='npm test',
                         help='Command to run tests')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Run pytest/jest test files in N parallel processes (0: one per CPU)')
+    parser.add_argument('--test-cache', choices=POLICIES, default='off',
+                        help='Reuse test results of identical trees: off, reuse-passed, '
+                             'reuse-all or refresh (default: off)')
+    parser.add_argument('--test-cache-max-age', type=float, default=MAX_AGE_HOURS,
+                        help='Ignore cached test results older than this many hours')
+    parser.add_argument('--affected-only', action='store_true',
+                        help='Only run tests that depend on the changed files '
+                             '(falls back to all tests for config/build changes)')
+    parser.add_argument('--base-ref', type=str,
+                        help='Branch to diff against for --affected-only (default: origin/HEAD)')
     parser.add_argument('--auto-close', action='store_true',
                         help='Automatically close the issue if tests pass')
+    parser.add_argument('--batch-writes', action='store_true',
+                        help='Send the comment and close as one batched GraphQL request')
+    parser.add_argument('--sticky-comment', action='store_true',
+                        help='Update one result comment per issue with the changes since the '
+                             'last verification instead of adding a new comment')
+    add_runner_arguments(parser)
     return parser.parse_args()
 
 
-def run_tests(test_command, repo_path):
-    """Run tests to verify the fix"""
-    print(f"Running tests with command: {test_command}")
-
-    # Change to the repository directory
-    original_dir = os.getcwd()
-    os.chdir(repo_path)
+def comment_on_issue(issue_number, message, success, repo_path, writer=None, sticky=False,
+                     failing=()):
+    """Add a comment to the issue with verification results
 
-    try:
-        # Run the test command
-        test_result = subprocess.run(
-            test_command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-
-        # Change back to the original directory
-        os.chdir(original_dir)
-
-        return test_result
-    except Exception as e:
-        print(f"Error running tests: {e}")
-        # Change back to the original directory
-        os.chdir(original_dir)
-        return None
-
-
-def comment_on_issue(issue_number, message, success, repo_path):
-    """Add a comment to the issue with verification results"""
+    With sticky, the issue's result comment is updated with the changes
+    since the last verification of the failing tests instead.
+    """
     print("Adding comment to issue...")
 
     # Set the comment prefix based on success
     prefix = "✅ Fix verified!" if success else "❌ Fix verification failed!"
 
+    if sticky:
+        return post_sticky_comment(issue_number, "verify-fix", prefix,
+                                   "passed" if success else "failed", message, repo_path,
+                                   failing, writer=writer)
+
     comment_body = f"""
 {prefix}
 
@@ -78,12 +93,16 @@ def comment_on_issue(issue_number, message, success, repo_path):
 }
 """
 
-    # Add comment using GitHub CLI
-    result = subprocess.run(
-        ['gh', 'issue', 'comment', issue_number, '--body', comment_body],
-        cwd=repo_path,
-        capture_output=True,
-        text=True
+    # Queue the comment if writes are batched
+    if writer:
+        writer.comment(issue_number, comment_body)
+        return True
+
+    # Add comment using GitHub CLI; the body is passed on stdin to stay clear of ARG_MAX
+    result = run_gh(
+        ['gh', 'issue', 'comment', issue_number, '--body-file', '-'],
+        input=comment_body,
+        cwd=repo_path
     )
 
     if result.returncode != 0:
@@ -94,15 +113,25 @@ def comment_on_issue(issue_number, message, success, repo_path):
     return True
 
 
-def close_issue(issue_number, repo_path):
-    """Close the issue if tests pass"""
-    print(f"Closing issue #{issue_number}...")
+def close_issue(issue_number, repo_path, writer=None, comment=True):
+    """Close the issue if tests pass
 
-    result = subprocess.run(
-        ['gh', 'issue', 'close', issue_number, '--comment', "Closing issue: Fix verified and tests are passing."],
-        cwd=repo_path,
-        capture_output=True,
-        text=True
+    Without comment, the issue is closed without a closing comment (the
+    sticky result comment already says the fix was verified).
+    """
+    print(f"Closing issue #{issue_number}...")
+    closing = ['--comment', "Closing issue: Fix verified and tests are passing."] if comment else []
+
+    # Queue the closing comment and the close if writes are batched
+    if writer:
+        if comment:
+            writer.comment(issue_number, "Closing issue: Fix verified and tests are passing.")
+        writer.close_issue(issue_number)
+        return True
+
+    result = run_gh(
+        ['gh', 'issue', 'close', issue_number] + closing,
+        cwd=repo_path
     )
 
     if result.returncode != 0:
@@ -124,8 +153,51 @@ def main():
         print(f"Error: Repository path {repo_path} does not exist or is not a directory")
         return 1
 
-    # Run tests
-    test_result = run_tests(args.test_command, repo_path)
+    # All spans of this run belong to the issue's trace
+    trace_id = tracing.issue_trace_id(issue_number, get_repo_info(repo_path) or "")
+
+    # Collect GitHub writes into one batch if requested
+    writer = None
+    if args.batch_writes:
+        repository = repository_for_path(str(repo_path))
+        if not repository:
+            return 1
+        writer = GitHubWriteBatcher(repository, cwd=str(repo_path), background=False)
+
+    # Install dependencies, reusing cached environments
+    deps_env = install_dependencies(repo_path, args)
+    if deps_env is None:
+        return 1
+
+    # Select the tests affected by the fix if requested
+    test_files = None
+    if args.affected_only:
+        test_files = select_tests(repo_path, args.test_command, args.base_ref)
+    cache_command = (restrict_command(args.test_command, repo_path, test_files)
+                     if test_files else args.test_command)
+
+    # Run tests, letting pytest/jest write a report of the failing tests
+    report_dir = tempfile.mkdtemp(prefix="test-reports-")
+    try:
+        with tracing.span("test_run", trace_id, issue=issue_number,
+                          test_command=args.test_command, shards=args.shards,
+                          affected_files=len(test_files) if test_files else 0) as current:
+            test_result = cached_run(cache_command, repo_path,
+                                     lambda: run_tests(args.test_command, repo_path, args.shards,
+                                                       test_files, env=deps_env,
+                                                       report_dir=report_dir,
+                                                       **runner_options(args)),
+                                     args.test_cache, args.test_cache_max_age,
+                                     options=dict(runner_options(args), shards=args.shards),
+                                     report_dir=report_dir)
+            current["attributes"]["exit_code"] = test_result.returncode if test_result else -1
+            current["attributes"]["cpu_time"] = getattr(test_result, "cpu_time", None)
+        failing = []
+        if test_result is not None and test_result.returncode != 0:
+            failing = [failure["test_id"] for failure in collect_failures([report_dir],
+                                                                           str(repo_path))]
+    finally:
+        shutil.rmtree(report_dir, ignore_errors=True)
     if test_result is None:
         return 1
 
@@ -133,15 +205,23 @@ def main():
     tests_passed = test_result.returncode == 0
 
     # Get test output
-    test_output = test_result.stdout if test_result.stdout else test_result.stderr
+    test_output = excerpt_text(test_result.stdout if test_result.stdout else test_result.stderr)
+    if getattr(test_result, "log_path", None):
+        print(f"Full test output: {test_result.log_path}")
 
     # Comment on issue with verification results
-    if not comment_on_issue(issue_number, test_output, tests_passed, repo_path):
+    with tracing.span("comment", trace_id, issue=issue_number):
+        commented = comment_on_issue(issue_number, test_output, tests_passed, repo_path, writer,
+                                     args.sticky_comment, failing)
+    if not commented:
         return 1
 
     # If tests passed and auto-close is enabled, close the issue
     if tests_passed and args.auto_close:
-        if not close_issue(issue_number, repo_path):
+        with tracing.span("close", trace_id, issue=issue_number):
+            closed = close_issue(issue_number, repo_path, writer,
+                                 comment=not args.sticky_comment)
+        if not closed:
             return 1
         print(f"Issue #{issue_number} verified and closed.")
     else:
@@ -149,6 +229,16 @@ def main():
         closing = "" if not args.auto_close else " Not closed due to test failures."
         print(f"Issue #{issue_number} verified. Tests {status}.{closing}")
 
+    # Send the batched writes and report each outcome
+    if writer:
+        with tracing.span("github_writes", trace_id, issue=issue_number):
+            items = writer.flush()
+        for item in items:
+            if not item.ok:
+                print(f"Error: GitHub {item.kind} on #{item.number} failed: {item.error}")
+        if not all(item.ok for item in items):
+            return 1
+
     return 0 if tests_passed else 1
 
 
@@ -13,27 +13,38 @@ import subprocess
 import argparse
 import json
 import time
+import queue
 import logging
+import threading
 import requests
 from pathlib import Path
 from datetime import datetime, timedelta
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("workflow_loop.log")
-    ]
-)
+import tracing
+from adaptive_scheduler import AdaptiveScheduler
+from github_batch import GitHubWriteBatcher, MAX_BATCH, MAX_DELAY
+from github_limits import run_gh
+from health_probe import check_health
+from structured_logging import setup_logging, MAX_BYTES, BACKUP_COUNT
+from result_cache import POLICIES
+
+# Logging is configured in main() (queue-based, JSON log file with rotation)
 logger = logging.getLogger("workflow-loop")
+tracing.set_service_name("workflow-loop")
 
 # Constants
 DEV_SERVER_DIR = os.path.expanduser("~/Dev-Server-Workflow")
+DEV_SERVER_REPOSITORY = "EcoSphereNetwork/Dev-Server-Workflow"
 OPENHANDS_API_URL = "http://localhost:17244/api/tasks"
 CHECK_INTERVAL = 300  # 5 minutes
+MIN_CHECK_INTERVAL = 30
+MAX_CHECK_INTERVAL = 1800  # 30 minutes
+BACKOFF_FACTOR = 2.0
+POLL_INTERVAL = 60  # 1 minute
 MAX_RETRIES = 3
+VERIFY_WORKERS = 2
+LOG_FILE = "workflow_loop.log"
+LOG_ROTATE_HOURS = 24
 
 
 def parse_args():
@@ -42,17 +53,62 @@ def parse_args():
     parser.add_argument('--install-dir', type=str, default=DEV_SERVER_DIR,
                         help='Installation directory for Dev-Server-Workflow')
     parser.add_argument('--check-interval', type=int, default=CHECK_INTERVAL,
-                        help='Interval between checks in seconds')
+                        help='Initial interval between checks in seconds')
+    parser.add_argument('--min-interval', type=int, default=MIN_CHECK_INTERVAL,
+                        help='Shortest interval between checks while issues arrive or tasks '
+                             'complete')
+    parser.add_argument('--max-interval', type=int, default=MAX_CHECK_INTERVAL,
+                        help='Longest interval between checks after idle backoff')
+    parser.add_argument('--backoff-factor', type=float, default=BACKOFF_FACTOR,
+                        help='Factor the check interval grows by after each idle check')
+    parser.add_argument('--fixed-interval', action='store_true',
+                        help='Always wait --check-interval seconds between checks')
+    parser.add_argument('--poll-interval', type=int, default=POLL_INTERVAL,
+                        help='Interval between OpenHands task status checks in seconds')
     parser.add_argument('--max-retries', type=int, default=MAX_RETRIES,
                         help='Maximum number of retries for failed operations')
+    parser.add_argument('--verify-workers', type=int, default=VERIFY_WORKERS,
+                        help='Number of workers verifying completed fixes in parallel')
+    parser.add_argument('--test-shards', type=int, default=1,
+                        help='Run each verification test suite in N parallel shards '
+                             '(0: one per CPU)')
+    parser.add_argument('--test-cache', choices=POLICIES, default='off',
+                        help='Reuse test results of trees that were already tested (default: off)')
+    parser.add_argument('--warm-worker', action='store_true',
+                        help='Run pytest verifications in a resident worker with pre-loaded '
+                             'imports')
+    parser.add_argument('--install-deps', action='store_true',
+                        help='Install dependencies through the dependency cache before verifying')
+    parser.add_argument('--test-timeout', type=float, default=0,
+                        help='Kill a verification test run after this many seconds (0: no timeout)')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Run likely failing tests first and stop a verification at the '
+                             'first failure')
+    parser.add_argument('--sticky-comments', action='store_true',
+                        help='Update one verification comment per issue instead of adding one '
+                             'per verification')
+    parser.add_argument('--write-batch-size', type=int, default=MAX_BATCH,
+                        help='Number of queued GitHub writes that triggers a batch flush')
+    parser.add_argument('--write-flush-delay', type=float, default=MAX_DELAY,
+                        help='Maximum seconds a GitHub write waits before its batch is flushed')
     parser.add_argument('--once', action='store_true',
                         help='Run the workflow loop once and exit')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose logging')
+    parser.add_argument('--log-file', type=str, default=LOG_FILE,
+                        help='JSON log file (rotated and compressed)')
+    parser.add_argument('--log-max-bytes', type=int, default=MAX_BYTES,
+                        help='Rotate the log file when it grows beyond this size')
+    parser.add_argument('--log-backups', type=int, default=BACKUP_COUNT,
+                        help='Number of compressed log files to keep')
+    parser.add_argument('--log-rotate-hours', type=float, default=LOG_ROTATE_HOURS,
+                        help='Rotate the log file after this many hours (0 disables)')
+    parser.add_argument('--no-console-log', action='store_true',
+                        help='Only write the log file, not the console')
     return parser.parse_args()
 
 
-def run_command(command, cwd=None, shell=False):
+def run_command(command, cwd=None, shell=False, env=None):
     """Run a command and return the result"""
     logger.debug(f"Running command: {command}")
     
@@ -60,10 +116,19 @@ def run_command(command, cwd=None, shell=False):
         command = command.split()
     
     try:
+        # GitHub calls share the rate limit budget of all scripts
+        if not shell and command[0] == "gh":
+            result = run_gh(command, cwd=cwd, env=env)
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, command,
+                                                    result.stdout, result.stderr)
+            return result.stdout.strip()
+
         result = subprocess.run(
             command,
             cwd=cwd,
             shell=shell,
+            env=env,
             check=True,
             capture_output=True,
             text=True
@@ -76,22 +141,28 @@ def run_command(command, cwd=None, shell=False):
 
 
 def check_dev_server_status(install_dir):
-    """Check the status of Dev-Server-Workflow"""
+    """Check the health of the Dev-Server-Workflow components
+
+    The components are probed in-process (see health_probe); recent results
+    of other processes are reused.
+
+    Returns:
+        {component: health} if all components are up, otherwise None
+    """
     logger.info("Checking Dev-Server-Workflow status")
-    
-    try:
-        # Run status command
-        if os.path.exists(os.path.join(install_dir, "docker-start.sh")):
-            status = run_command([os.path.join(install_dir, "docker-start.sh"), "status"])
+
+    health = check_health(install_dir)
+    for name, result in health.items():
+        latency = result["http_ms"] if result["http_ms"] is not None else result["tcp_ms"]
+        fields = {"stage": "health", "component": name, "status": result["state"],
+                  "duration": latency}
+        if result["state"] == "up":
+            logger.debug(f"{name}: up ({latency:.0f} ms)", extra=fields)
         else:
-            # Try using dev-server CLI
-            status = run_command(["dev-server", "status"])
-        
-        logger.debug(f"Status: {status}")
-        return status
-    except Exception as e:
-        logger.error(f"Failed to check Dev-Server-Workflow status: {e}")
+            logger.warning(f"{name}: {result['state']} ({result['error']})", extra=fields)
+    if any(result["state"] != "up" for result in health.values()):
         return None
+    return health
 
 
 def get_dev_server_issues(install_dir):
@@ -103,7 +174,8 @@ def get_dev_server_issues(install_dir):
         run_command(["gh", "--version"])
         
         # Get issues
-        issues = run_command(["gh", "issue", "list", "--repo", "EcoSphereNetwork/Dev-Server-Workflow", "--state", "open", "--json", "number,title,body,labels"])
+        issues = run_command(["gh", "issue", "list", "--repo", DEV_SERVER_REPOSITORY,
+                              "--state", "open", "--json", "number,title,body,labels"])
         
         # Parse JSON
         issues = json.loads(issues)
@@ -115,7 +187,8 @@ def get_dev_server_issues(install_dir):
             if "fix-me" in labels:
                 fix_me_issues.append(issue)
         
-        logger.info(f"Found {len(fix_me_issues)} issues with 'fix-me' label")
+        logger.info(f"Found {len(fix_me_issues)} issues with 'fix-me' label",
+                    extra={"stage": "discovery", "issues": len(fix_me_issues)})
         return fix_me_issues
     except Exception as e:
         logger.error(f"Failed to get Dev-Server-Workflow issues: {e}")
@@ -124,7 +197,8 @@ def get_dev_server_issues(install_dir):
 
 def trigger_openhands_fix(issue):
     """Trigger OpenHands to fix an issue"""
-    logger.info(f"Triggering OpenHands to fix issue #{issue['number']}: {issue['title']}")
+    logger.info(f"Triggering OpenHands to fix issue #{issue['number']}: {issue['title']}",
+                extra={"stage": "trigger", "issue": issue["number"]})
     
     try:
         # Prepare the payload
@@ -132,7 +206,7 @@ def trigger_openhands_fix(issue):
             "command": "fix-issue",
             "context": {
                 "issue_number": str(issue["number"]),
-                "repository": "EcoSphereNetwork/Dev-Server-Workflow",
+                "repository": DEV_SERVER_REPOSITORY,
                 "title": issue["title"],
                 "body": issue["body"]
             }
@@ -144,7 +218,9 @@ def trigger_openhands_fix(issue):
         # Check the response
         if response.status_code == 200:
             result = response.json()
-            logger.info(f"OpenHands task created: {result.get('task_id')}")
+            logger.info(f"OpenHands task created: {result.get('task_id')}",
+                        extra={"stage": "trigger", "issue": issue["number"],
+                               "task_id": result.get("task_id")})
             return result.get("task_id")
         else:
             logger.error(f"OpenHands API returned status code {response.status_code}")
@@ -156,7 +232,7 @@ def trigger_openhands_fix(issue):
 
 def check_openhands_task(task_id):
     """Check the status of an OpenHands task"""
-    logger.info(f"Checking OpenHands task {task_id}")
+    logger.debug(f"Checking OpenHands task {task_id}", extra={"stage": "poll", "task_id": task_id})
     
     try:
         # Send the request
@@ -166,7 +242,8 @@ def check_openhands_task(task_id):
         if response.status_code == 200:
             result = response.json()
             status = result.get("status")
-            logger.info(f"OpenHands task status: {status}")
+            logger.debug(f"OpenHands task status: {status}",
+                         extra={"stage": "poll", "task_id": task_id, "status": status})
             return status
         else:
             logger.error(f"OpenHands API returned status code {response.status_code}")
@@ -176,28 +253,49 @@ def check_openhands_task(task_id):
         return None
 
 
-def verify_fix(issue_number, install_dir):
+def verify_fix(issue_number, install_dir, trace=None, extra_args=None):
     """Verify a fix using GPT-CLI"""
-    logger.info(f"Verifying fix for issue #{issue_number}")
-    
-    try:
-        # Run verify-fix command
-        result = run_command(["gpt", "verify-fix", str(issue_number), "--repo-path", install_dir])
-        
-        logger.info(f"Verification result: {result}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to verify fix: {e}")
-        return False
+    logger.info(f"Verifying fix for issue #{issue_number}",
+                extra={"stage": "verification", "issue": issue_number})
+
+    started = time.time()
+    trace = trace or new_issue_trace(issue_number)
+    with tracing.span("verification", trace["trace_id"], parent_span_id=trace["span_id"],
+                      issue=issue_number) as current:
+        try:
+            # Run verify-fix command, passing the span on so its spans join the issue trace
+            env = tracing.traceparent_env(trace["trace_id"], current["span_id"])
+            command = ["gpt", "verify-fix", str(issue_number), "--repo-path", install_dir]
+            result = run_command(command + (extra_args or []), env=env)
+
+            logger.info(f"Verification result: {result}",
+                        extra={"stage": "verification", "issue": issue_number, "verified": True,
+                               "duration": round(time.time() - started, 3)})
+            current["attributes"]["verified"] = True
+            return True
+        except Exception as e:
+            logger.error(f"Failed to verify fix: {e}",
+                         extra={"stage": "verification", "issue": issue_number, "verified": False,
+                                "duration": round(time.time() - started, 3)})
+            current["attributes"]["verified"] = False
+            return False
+
+
+def close_issue(issue_number, writer=None, callback=None):
+    """Close an issue
 
+    With a write batcher the close is queued and callback is called with the
+    write item once its batch has been flushed.
+    """
+    logger.info(f"Closing issue #{issue_number}", extra={"stage": "close", "issue": issue_number})
 
-def close_issue(issue_number):
-    """Close an issue"""
-    logger.info(f"Closing issue #{issue_number}")
+    if writer:
+        writer.close_issue(issue_number, callback=callback)
+        return True
     
     try:
         # Close the issue
-        run_command(["gh", "issue", "close", str(issue_number), "--repo", "EcoSphereNetwork/Dev-Server-Workflow"])
+        run_command(["gh", "issue", "close", str(issue_number), "--repo", DEV_SERVER_REPOSITORY])
         
         logger.info(f"Issue #{issue_number} closed")
         return True
@@ -206,71 +304,312 @@ def close_issue(issue_number):
         return False
 
 
+class VerificationPool:
+    """Worker pool that verifies completed fixes outside the main loop
+
+    Issues whose OpenHands task completed are put on the verification queue
+    and picked up by a fixed number of worker threads, so a slow test suite
+    only occupies a verification worker instead of stalling triggering and
+    polling. Results are put on a separate queue that is drained by the
+    close/comment stage, together with the issues whose close has finished.
+    """
+
+    def __init__(self, install_dir, workers=VERIFY_WORKERS, extra_args=None):
+        self.install_dir = install_dir
+        self.extra_args = extra_args
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.threads = []
+        for index in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker, name=f"verify-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, issue_number, trace=None):
+        """Queue an issue for verification"""
+        logger.info(f"Queueing issue #{issue_number} for verification")
+        self.tasks.put((issue_number, trace))
+
+    def _worker(self):
+        """Verify queued issues until a stop sentinel is received"""
+        while True:
+            item = self.tasks.get()
+            if item is None:
+                break
+            issue_number, trace = item
+            try:
+                verified = verify_fix(issue_number, self.install_dir, trace, self.extra_args)
+            except Exception as e:
+                logger.error(f"Verification worker failed for issue #{issue_number}: {e}")
+                verified = False
+            self.results.put((issue_number, verified, trace))
+
+    def finished(self, issue_number):
+        """Report that an issue left the pipeline; drain returns it with verified None"""
+        self.results.put((issue_number, None, None))
+
+    def drain(self, timeout=0):
+        """Return finished verifications, waiting up to timeout seconds for the first one"""
+        results = []
+        try:
+            if timeout > 0:
+                results.append(self.results.get(timeout=timeout))
+            while True:
+                results.append(self.results.get_nowait())
+        except queue.Empty:
+            pass
+        return results
+
+    def shutdown(self, wait=True):
+        """Stop the workers, optionally waiting for running verifications"""
+        for _ in self.threads:
+            self.tasks.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+def new_issue_trace(issue_number, start=None):
+    """Start the trace for an issue entering the pipeline"""
+    return {
+        "trace_id": tracing.issue_trace_id(issue_number, DEV_SERVER_REPOSITORY),
+        "span_id": tracing.new_span_id(),
+        "start": start or time.time(),
+    }
+
+
+def finish_issue_trace(issue_number, trace, outcome):
+    """Export the root span of an issue trace once the issue leaves the pipeline"""
+    tracing.record_span("issue", trace["trace_id"], trace["start"], time.time(),
+                        parent_span_id="", span_id=trace["span_id"],
+                        attributes={"issue": issue_number, "outcome": outcome})
+
+
+def trigger_new_issues(issues, pending, verifying, poll_interval, discovery=None):
+    """Trigger stage: start OpenHands tasks for issues not already in the pipeline
+
+    discovery is the (start, end) time of the discovery that found the issues;
+    it is recorded as the first span of every newly triggered issue.
+    """
+    discovery_start, discovery_end = discovery or (time.time(), time.time())
+    triggered = 0
+
+    for issue in issues:
+        issue_number = issue["number"]
+        if issue_number in pending or issue_number in verifying:
+            logger.debug(f"Issue #{issue_number} is already being processed")
+            continue
+
+        logger.info(f"Processing issue #{issue_number}: {issue['title']}")
+
+        trace = new_issue_trace(issue_number, start=discovery_start)
+        tracing.record_span("discovery", trace["trace_id"], discovery_start, discovery_end,
+                            parent_span_id=trace["span_id"],
+                            attributes={"issues_found": len(issues)})
+
+        # Trigger OpenHands fix
+        with tracing.span("trigger", trace["trace_id"], parent_span_id=trace["span_id"]) as current:
+            task_id = trigger_openhands_fix(issue)
+            current["attributes"]["task_id"] = task_id or ""
+        if not task_id:
+            logger.warning(f"Failed to trigger OpenHands fix for issue #{issue_number}")
+            finish_issue_trace(issue_number, trace, "trigger_failed")
+            continue
+
+        triggered_at = time.time()
+        pending[issue_number] = {
+            "task_id": task_id,
+            "polls": 0,
+            "triggered_at": triggered_at,
+            "next_poll": triggered_at + poll_interval,
+            "trace": trace,
+        }
+        triggered += 1
+
+    return triggered
+
+
+def poll_pending_tasks(pending, max_retries, poll_interval):
+    """Poll stage: check due OpenHands tasks and return (issue, trace) for completed ones"""
+    completed = []
+    now = time.time()
+
+    for issue_number, entry in list(pending.items()):
+        if entry["next_poll"] > now:
+            continue
+
+        trace = entry["trace"]
+        fields = {"stage": "poll", "issue": issue_number, "task_id": entry["task_id"]}
+
+        # Check task status
+        entry["polls"] += 1
+        with tracing.span("poll", trace["trace_id"], parent_span_id=trace["span_id"],
+                          task_id=entry["task_id"], poll=entry["polls"]) as current:
+            status = check_openhands_task(entry["task_id"])
+            current["attributes"]["status"] = status or "unknown"
+
+        if status == "completed":
+            logger.info(f"OpenHands task completed for issue #{issue_number}",
+                        extra={**fields, "status": status,
+                               "duration": round(time.time() - entry["triggered_at"], 3)})
+            tracing.record_span("openhands_runtime", trace["trace_id"], entry["triggered_at"],
+                                time.time(), parent_span_id=trace["span_id"],
+                                attributes={"task_id": entry["task_id"]})
+            completed.append((issue_number, trace))
+            del pending[issue_number]
+            continue
+        elif status == "failed":
+            logger.warning(f"OpenHands task failed for issue #{issue_number}",
+                           extra={**fields, "status": status})
+            finish_issue_trace(issue_number, trace, "task_failed")
+            del pending[issue_number]
+            continue
+        elif status == "in_progress":
+            logger.info(f"OpenHands task still in progress for issue #{issue_number}",
+                        extra={**fields, "status": status, "poll": entry["polls"]})
+        else:
+            logger.warning(f"Unknown task status: {status}", extra={**fields, "status": status})
+
+        if entry["polls"] >= max_retries:
+            logger.warning(f"Max retries reached for issue #{issue_number}", extra=fields)
+            finish_issue_trace(issue_number, trace, "max_retries")
+            del pending[issue_number]
+        else:
+            entry["next_poll"] = now + poll_interval
+
+    return completed
+
+
+def handle_verification_result(issue_number, verified, trace, writer=None, done=None):
+    """Close/comment stage: act on a finished verification
+
+    done is called once the issue has left the pipeline; for batched closes
+    that is when the close has been flushed, so the issue is not triggered
+    again while its close is still queued.
+    """
+    if verified and writer:
+        queued_at = time.time()
+
+        def closed(item):
+            tracing.record_span("close", trace["trace_id"], queued_at, time.time(),
+                                parent_span_id=trace["span_id"],
+                                attributes={"closed": item.ok, "batched": True})
+            finish_issue_trace(issue_number, trace, "closed" if item.ok else "close_failed")
+            if done:
+                done()
+
+        close_issue(issue_number, writer=writer, callback=closed)
+        return
+    if verified:
+        with tracing.span("close", trace["trace_id"], parent_span_id=trace["span_id"]) as current:
+            current["attributes"]["closed"] = close_issue(issue_number)
+        finish_issue_trace(issue_number, trace, "closed")
+    else:
+        logger.warning(f"Fix for issue #{issue_number} was not verified, leaving issue open")
+        finish_issue_trace(issue_number, trace, "verification_failed")
+    if done:
+        done()
+
+
 def workflow_loop(args):
-    """Main workflow loop"""
+    """Main workflow loop
+
+    The loop is split into stages: discovery and triggering run every
+    check interval, in-flight OpenHands tasks are polled every poll interval,
+    completed tasks are verified by the verification pool and finished
+    verifications are closed by the close stage as soon as they arrive.
+
+    Unless --fixed-interval is given, the check interval adapts to the
+    pipeline activity: new issues and completed tasks bring the next check
+    forward to the minimum interval, idle checks back off exponentially.
+
+    Issue closes are queued on a GitHub write batcher and sent as batched
+    GraphQL mutations instead of one request per issue.
+    """
     logger.info("Starting workflow loop")
-    
+
+    scheduler = None
+    if not args.fixed_interval:
+        scheduler = AdaptiveScheduler(args.min_interval, args.max_interval,
+                                      backoff=args.backoff_factor, initial=args.check_interval)
+
+    # Options passed on to every verify-fix run
+    verify_args = []
+    if args.test_shards != 1:
+        verify_args += ["--shards", str(args.test_shards)]
+    if args.test_cache != "off":
+        verify_args += ["--test-cache", args.test_cache]
+    if args.test_timeout:
+        verify_args += ["--timeout", str(args.test_timeout)]
+    if args.install_deps:
+        verify_args.append("--install-deps")
+    if args.warm_worker:
+        verify_args.append("--warm-worker")
+    if args.fail_fast:
+        verify_args += ["--prioritize", "--fail-fast"]
+    if args.sticky_comments:
+        verify_args.append("--sticky-comment")
+    pool = VerificationPool(args.install_dir, args.verify_workers, verify_args)
+    writer = GitHubWriteBatcher(DEV_SERVER_REPOSITORY, max_batch=args.write_batch_size,
+                                max_delay=args.write_flush_delay)
+    pending = {}
+    verifying = {}
+    next_check = 0
+    discovered = False
+
     while True:
         try:
-            # Check Dev-Server-Workflow status
-            status = check_dev_server_status(args.install_dir)
-            if not status:
-                logger.warning("Dev-Server-Workflow status check failed")
-            
-            # Get issues
-            issues = get_dev_server_issues(args.install_dir)
-            
-            # Process each issue
-            for issue in issues:
-                issue_number = issue["number"]
-                logger.info(f"Processing issue #{issue_number}: {issue['title']}")
-                
-                # Trigger OpenHands fix
-                task_id = trigger_openhands_fix(issue)
-                if not task_id:
-                    logger.warning(f"Failed to trigger OpenHands fix for issue #{issue_number}")
-                    continue
-                
-                # Wait for OpenHands to complete the task
-                retries = 0
-                while retries < args.max_retries:
-                    # Wait for a while
-                    time.sleep(60)  # Wait 1 minute
-                    
-                    # Check task status
-                    status = check_openhands_task(task_id)
-                    
-                    if status == "completed":
-                        logger.info(f"OpenHands task completed for issue #{issue_number}")
-                        
-                        # Verify the fix
-                        if verify_fix(issue_number, args.install_dir):
-                            # Close the issue
-                            close_issue(issue_number)
-                        
-                        break
-                    elif status == "failed":
-                        logger.warning(f"OpenHands task failed for issue #{issue_number}")
-                        break
-                    elif status == "in_progress":
-                        logger.info(f"OpenHands task still in progress for issue #{issue_number}")
-                    else:
-                        logger.warning(f"Unknown task status: {status}")
-                    
-                    retries += 1
-                
-                if retries >= args.max_retries:
-                    logger.warning(f"Max retries reached for issue #{issue_number}")
-            
-            # Exit if running once
-            if args.once:
+            if time.time() >= next_check and not (args.once and discovered):
+                # Check Dev-Server-Workflow status
+                status = check_dev_server_status(args.install_dir)
+                if not status:
+                    logger.warning("Dev-Server-Workflow status check failed")
+
+                # Get issues and trigger fixes for new ones
+                discovery_start = time.time()
+                issues = get_dev_server_issues(args.install_dir)
+                triggered = trigger_new_issues(issues, pending, verifying, args.poll_interval,
+                                               discovery=(discovery_start, time.time()))
+
+                discovered = True
+                interval = args.check_interval
+                if scheduler:
+                    scheduler.record_event(triggered)
+                    interval = scheduler.next_interval()
+                next_check = time.time() + interval
+                if not args.once:
+                    logger.info(f"Next check in {interval:.0f} seconds")
+
+            # Hand completed tasks over to the verification pool
+            completed = poll_pending_tasks(pending, args.max_retries, args.poll_interval)
+            for issue_number, trace in completed:
+                verifying[issue_number] = trace
+                pool.submit(issue_number, trace)
+            if completed and scheduler:
+                # Completions free capacity: look for new issues soon
+                scheduler.record_event(len(completed))
+                next_check = min(next_check, time.time() + args.min_interval)
+
+            # Exit if running once and the pipeline is empty
+            if args.once and not pending and not verifying:
                 logger.info("Exiting after one iteration")
                 break
-            
-            # Wait for next check
-            logger.info(f"Waiting {args.check_interval} seconds until next check")
-            time.sleep(args.check_interval)
-        
+
+            # Wait for the next poll or check, handling verification results as they arrive
+            wake_times = [entry["next_poll"] for entry in pending.values()]
+            if not args.once:
+                wake_times.append(next_check)
+            timeout = max(0, min(wake_times) - time.time()) if wake_times else args.poll_interval
+            for issue_number, verified, trace in pool.drain(timeout):
+                if verified is None:
+                    # Its close is done (it may have been flushed by the writer thread)
+                    verifying.pop(issue_number, None)
+                    continue
+                # The issue stays in flight until its (batched) close is done
+                handle_verification_result(
+                    issue_number, verified, trace, writer,
+                    done=lambda number=issue_number: pool.finished(number))
+
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received, exiting")
             break
@@ -278,17 +617,24 @@ def workflow_loop(args):
             logger.error(f"Error in workflow loop: {e}")
             logger.info(f"Waiting {args.check_interval} seconds until next check")
             time.sleep(args.check_interval)
-    
+
+    pool.shutdown(wait=False)
+    writer.close()
     logger.info("Workflow loop ended")
 
 
 def main():
     """Main function"""
     args = parse_args()
-    
-    # Set log level
-    if args.verbose:
-        logger.setLevel(logging.DEBUG)
+
+    # Set up the non-blocking logging pipeline
+    setup_logging("workflow-loop",
+                  log_file=args.log_file,
+                  level=logging.DEBUG if args.verbose else logging.INFO,
+                  console=not args.no_console_log,
+                  max_bytes=args.log_max_bytes,
+                  backup_count=args.log_backups,
+                  rotate_interval=int(args.log_rotate_hours * 3600))
     
     # Run the workflow loop
     workflow_loop(args)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Adaptive Scheduler Tests
+
+Unit tests for the workflow loop check interval scheduler.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+from adaptive_scheduler import AdaptiveScheduler
+
+
+class TestAdaptiveScheduler(unittest.TestCase):
+    """Test interval backoff and activity handling."""
+
+    def test_idle_backoff_is_bounded(self):
+        """Idle cycles double the interval up to the maximum."""
+        scheduler = AdaptiveScheduler(30, 200, backoff=2.0, initial=30)
+        now = 0
+        intervals = []
+        for _ in range(5):
+            interval = scheduler.next_interval(now)
+            intervals.append(interval)
+            now += interval
+        self.assertEqual(intervals, [60, 120, 200, 200, 200])
+
+    def test_activity_resets_to_minimum(self):
+        """New issues bring the next check down to the minimum interval."""
+        scheduler = AdaptiveScheduler(30, 1800, initial=600)
+        scheduler.next_interval(0)
+        scheduler.record_event(3)
+        self.assertEqual(scheduler.next_interval(1200), 30)
+
+    def test_arrival_rate_caps_backoff(self):
+        """After a busy period the interval follows the decaying arrival rate."""
+        scheduler = AdaptiveScheduler(10, 3600, backoff=2.0, smoothing=0.3, initial=10)
+        now = 0
+        for _ in range(10):
+            # One new issue every 10 seconds
+            scheduler.record_event(1)
+            now += scheduler.next_interval(now)
+
+        intervals = []
+        for _ in range(3):
+            interval = scheduler.next_interval(now)
+            intervals.append(interval)
+            now += interval
+
+        # Plain exponential backoff would give 20, 40 and 80 seconds
+        self.assertLess(intervals[0], 20)
+        self.assertLess(intervals[2], 80)
+        self.assertEqual(intervals, sorted(intervals))
+
+    def test_invalid_bounds(self):
+        """The minimum must not exceed the maximum."""
+        with self.assertRaises(ValueError):
+            AdaptiveScheduler(60, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Affected Test Selection Tests
+
+Unit tests for selecting tests through the import graph.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import affected_tests
+
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "VALUE = 1\n",
+    "pkg/b.py": "from .a import VALUE\n",
+    "pkg/c.py": "OTHER = 2\n",
+    "tests/test_b.py": "from pkg.b import VALUE\n",
+    "tests/test_c.py": "import pkg.c\n",
+    "web/x.js": "module.exports = 1;\n",
+    "web/y.js": "const x = require('./x');\n",
+    "web/__tests__/y.test.js": "import y from '../y';\n",
+    "package.json": '{"scripts": {"test": "jest"}}\n',
+}
+
+
+def git(*args, cwd):
+    return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+                          + list(args), cwd=cwd, check=True, capture_output=True, text=True)
+
+
+class TestAffectedTests(unittest.TestCase):
+    """Test the import graph and the full-run fallbacks."""
+
+    def setUp(self):
+        """Create a repository with a base branch and a feature branch."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = self.tmp.name
+        git('init', '-q', '-b', 'main', self.repo, cwd=self.repo)
+        for path, content in FILES.items():
+            self._write(path, content)
+        git('add', '-A', cwd=self.repo)
+        git('commit', '-q', '-m', 'base', cwd=self.repo)
+        git('checkout', '-q', '-b', 'feature', cwd=self.repo)
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+        with open(os.path.join(self.repo, path), "w") as f:
+            f.write(content)
+
+    def _commit(self, path, content):
+        self._write(path, content)
+        git('add', '-A', cwd=self.repo)
+        git('commit', '-q', '-m', path, cwd=self.repo)
+
+    def test_transitive_python_dependents(self):
+        """A change to a.py selects tests importing modules that import it."""
+        self._commit("pkg/a.py", "VALUE = 3\n")
+        selected = affected_tests.select_tests(self.repo, "pytest -q", "main")
+        self.assertEqual(selected, ["tests/test_b.py"])
+
+    def test_javascript_dependents(self):
+        """Relative requires and imports are followed for jest suites."""
+        self._commit("web/x.js", "module.exports = 2;\n")
+        selected = affected_tests.select_tests(self.repo, "npm test", "main")
+        self.assertEqual(selected, [os.path.join("web", "__tests__", "y.test.js")])
+
+    def test_uncommitted_changes_are_included(self):
+        """Uncommitted edits count as changes."""
+        self._write("pkg/c.py", "OTHER = 4\n")
+        selected = affected_tests.select_tests(self.repo, "pytest", "main")
+        self.assertEqual(selected, ["tests/test_c.py"])
+
+    def test_config_change_runs_everything(self):
+        """Build configuration changes fall back to the full suite."""
+        self._commit("pkg/a.py", "VALUE = 3\n")
+        self._commit("pyproject.toml", "[tool.pytest.ini_options]\n")
+        self.assertIsNone(affected_tests.select_tests(self.repo, "pytest", "main"))
+
+
+if __name__ == "__main__":
+    unittest.main()
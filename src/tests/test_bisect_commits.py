@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Commit Bisection Tests
+
+Unit tests for the parallel bisection of test failures.
+"""
+
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import bisect_commits
+
+TEST_COMMAND = "test \"$(cat value.txt)\" -lt 100"
+
+
+def run(test_command, worktree):
+    return subprocess.run(test_command, shell=True, cwd=worktree, capture_output=True, text=True)
+
+
+class TestBisectCommits(unittest.TestCase):
+    """Test finding the culprit commit in a small repository."""
+
+    def setUp(self):
+        """Create a repository with twelve commits after the good one."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = os.path.join(self.tmp.name, "repo")
+        os.makedirs(self.repo)
+        self._git("init", "-q")
+        self._git("config", "user.email", "ci@example.com")
+        self._git("config", "user.name", "CI")
+        self.commits = [self._commit(0)]
+        for value in range(1, 13):
+            self.commits.append(self._commit(value * 100 if value >= 9 else value))
+        self.state_file = os.path.join(self.tmp.name, "last_good.json")
+
+    def _git(self, *args):
+        return subprocess.run(["git"] + list(args), cwd=self.repo, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    def _commit(self, value):
+        with open(os.path.join(self.repo, "value.txt"), "w") as f:
+            f.write(f"{value}\n")
+        self._git("add", "value.txt")
+        self._git("commit", "-q", "-m", f"Set value to {value}")
+        return self._git("rev-parse", "HEAD")
+
+    def test_split_points(self):
+        """Split points lie strictly inside the range and are spread evenly."""
+        self.assertEqual(bisect_commits.split_points(-1, 11, 3), [2, 5, 8])
+        self.assertEqual(bisect_commits.split_points(3, 5, 4), [4])
+        self.assertEqual(bisect_commits.split_points(3, 4, 4), [])
+
+    def test_finds_culprit(self):
+        """The first failing commit is found and described."""
+        with bisect_commits.Bisector(self.repo, self.commits[0], run, jobs=3) as bisector:
+            culprit = bisector.find(TEST_COMMAND)
+
+        self.assertEqual(culprit["commit"], self.commits[9])
+        self.assertEqual(culprit["subject"], "Set value to 900")
+        self.assertIn("+900", culprit["diff"])
+        self.assertLessEqual(culprit["rounds"], 3)
+        self.assertNotIn("bisect-", self._git("worktree", "list"))
+
+    def test_passing_head_is_not_bisected(self):
+        """Nothing is returned if HEAD does not fail."""
+        with bisect_commits.Bisector(self.repo, self.commits[0], run, jobs=2) as bisector:
+            self.assertIsNone(bisector.find("true"))
+
+    def test_recorded_good_commit(self):
+        """The recorded commit is used while it is an ancestor of HEAD."""
+        self._git("checkout", "-q", self.commits[8])
+        self.assertEqual(bisect_commits.record_good(self.repo, self.state_file), self.commits[8])
+        self._git("checkout", "-q", "-")
+
+        self.assertEqual(bisect_commits.good_commit(self.repo, state_file=self.state_file),
+                         self.commits[8])
+        self.assertEqual(bisect_commits.good_commit(self.repo, "HEAD~3", self.state_file),
+                         self.commits[9])
+
+    def test_test_added_after_good_commit(self):
+        """A pytest test that doesn't exist at the good commit yet counts as passing there."""
+        good = self._commit(1)
+        os.makedirs(os.path.join(self.repo, "tests"))
+        with open(os.path.join(self.repo, "tests", "test_value.py"), "w") as f:
+            f.write("def test_value():\n    assert int(open('value.txt').read()) < 100\n")
+        self._git("add", "tests")
+        self._git("commit", "-q", "-m", "Add test")
+        self._commit(2)
+        culprit_commit = self._commit(500)
+        self._commit(600)
+        command = f"{sys.executable} -m pytest -q -p no:cacheprovider tests/test_value.py"
+
+        with bisect_commits.Bisector(self.repo, good, run, jobs=2) as bisector:
+            culprit = bisector.find(command + "::test_value")
+
+        self.assertEqual(culprit["commit"], culprit_commit)
+
+
+if __name__ == "__main__":
+    unittest.main()
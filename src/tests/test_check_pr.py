@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check PR Tests
+
+Unit tests for selecting and ordering PRs in check_pr batch mode.
+"""
+
+import sys
+import argparse
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import check_pr
+
+OPEN_PRS = [
+    {"number": 10, "updatedAt": "2024-01-01T00:00:00Z", "headRefOid": "a" * 40},
+    {"number": 11, "updatedAt": "2024-01-03T00:00:00Z", "headRefOid": "b" * 40},
+    {"number": 12, "updatedAt": "2024-01-02T00:00:00Z", "headRefOid": "c" * 40},
+    {"number": 30, "updatedAt": "2024-01-04T00:00:00Z", "headRefOid": "d" * 40},
+]
+
+
+def make_args(*pr_numbers, **options):
+    defaults = {"pr_numbers": list(pr_numbers), "all_open": False, "label": None,
+                "skip_unchanged": False}
+    defaults.update(options)
+    return argparse.Namespace(**defaults)
+
+
+class TestCheckPrBatch(unittest.TestCase):
+    """Test PR number parsing, selection and prioritization."""
+
+    def test_parse_pr_numbers(self):
+        """Lists, ranges and single numbers are accepted."""
+        numbers, ranges = check_pr.parse_pr_numbers(["5", "#7,9", "20-10"])
+        self.assertEqual(numbers, [5, 7, 9])
+        self.assertEqual(ranges, [(10, 20)])
+
+    def test_changed_prs_come_first(self):
+        """PRs with a new head are checked before already checked ones."""
+        checks = {"11": {"head": "b" * 40}}
+        with mock.patch.object(check_pr, "list_open_prs", return_value=OPEN_PRS):
+            order = check_pr.select_prs(make_args(all_open=True), ".", checks)
+        self.assertEqual(order, [30, 12, 10, 11])
+
+    def test_range_selects_open_prs_and_skips_unchanged(self):
+        """Ranges only select open PRs; --skip-unchanged drops checked heads."""
+        checks = {"12": {"head": "c" * 40}}
+        with mock.patch.object(check_pr, "list_open_prs", return_value=OPEN_PRS):
+            order = check_pr.select_prs(make_args("10-20", "40", skip_unchanged=True), ".", checks)
+        self.assertEqual(order, [11, 10, 40])
+
+    def test_single_pr_does_not_list_prs(self):
+        """Checking one PR does not query the open PRs."""
+        with mock.patch.object(check_pr, "list_open_prs") as list_open_prs:
+            self.assertEqual(check_pr.select_prs(make_args("7"), ".", {}), [7])
+        list_open_prs.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
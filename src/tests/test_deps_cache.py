@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Dependency Cache Tests
+
+Unit tests for the lockfile-keyed dependency cache.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import deps_cache
+
+# Installs "dependencies" by copying the lockfile and counts the installs
+FAKE_ECOSYSTEM = ("fake", ("deps.lock",), "node_modules",
+                  'mkdir -p node_modules && cp deps.lock node_modules/lock '
+                  '&& echo x >> "$INSTALL_LOG"')
+
+
+class TestDepsCache(unittest.TestCase):
+    """Test cold installs, warm runs, cloning into other checkouts and eviction."""
+
+    def setUp(self):
+        """Create two checkouts with the same lockfile and an empty cache."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = os.path.join(self.tmp.name, "cache")
+        self.install_log = os.path.join(self.tmp.name, "installs.log")
+        self.repos = []
+        for name in ("main", "worktree"):
+            repo = os.path.join(self.tmp.name, name)
+            os.makedirs(repo)
+            self._write(repo, "deps.lock", "left-pad 1.0\n")
+            self.repos.append(repo)
+        for patcher in (mock.patch.object(deps_cache, "ECOSYSTEMS", (FAKE_ECOSYSTEM,)),
+                        mock.patch.dict(os.environ, {"INSTALL_LOG": self.install_log})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write(self, repo, name, content):
+        with open(os.path.join(repo, name), "w") as f:
+            f.write(content)
+
+    def _installs(self):
+        try:
+            with open(self.install_log) as f:
+                return len(f.readlines())
+        except OSError:
+            return 0
+
+    def _lock(self, repo):
+        with open(os.path.join(repo, "node_modules", "lock")) as f:
+            return f.read()
+
+    def test_warm_runs_skip_installation(self):
+        """The first run installs; later runs and other checkouts reuse the cache."""
+        main, worktree = self.repos
+        env = deps_cache.ensure_dependencies(main, self.cache)
+        self.assertEqual(self._installs(), 1)
+        self.assertTrue(env["PATH"].startswith(os.path.join(main, "node_modules", ".bin")))
+
+        deps_cache.ensure_dependencies(main, self.cache)
+        deps_cache.ensure_dependencies(worktree, self.cache)
+
+        self.assertEqual(self._installs(), 1)
+        self.assertEqual(self._lock(worktree), "left-pad 1.0\n")
+        self.assertEqual(len(deps_cache.list_entries(self.cache)), 1)
+
+    def test_lockfile_change_installs_again(self):
+        """A different lockfile is a different cache entry."""
+        main = self.repos[0]
+        deps_cache.ensure_dependencies(main, self.cache)
+        self._write(main, "deps.lock", "left-pad 2.0\n")
+
+        deps_cache.ensure_dependencies(main, self.cache)
+
+        self.assertEqual(self._installs(), 2)
+        self.assertEqual(self._lock(main), "left-pad 2.0\n")
+        self.assertEqual(len(deps_cache.list_entries(self.cache)), 2)
+
+    def test_failed_install_returns_none(self):
+        """A failing install command is reported and nothing is cached."""
+        failing = ("fake", ("deps.lock",), "node_modules", "exit 3")
+        with mock.patch.object(deps_cache, "ECOSYSTEMS", (failing,)):
+            self.assertIsNone(deps_cache.ensure_dependencies(self.repos[0], self.cache))
+        self.assertEqual(deps_cache.list_entries(self.cache), [])
+
+    def test_evict_least_recently_used(self):
+        """Eviction removes the oldest entries first and keeps the requested ones."""
+        main = self.repos[0]
+        keys = []
+        for version in ("1.0", "2.0", "3.0"):
+            self._write(main, "deps.lock", f"left-pad {version}\n")
+            deps_cache.ensure_dependencies(main, self.cache)
+            keys.append(deps_cache.dependency_key(main, FAKE_ECOSYSTEM))
+
+        removed = deps_cache.evict(self.cache, 0, keep={keys[0]})
+
+        self.assertEqual(removed, [keys[1], keys[2]])
+        self.assertEqual([entry["key"] for entry in deps_cache.list_entries(self.cache)],
+                         [keys[0]])
+
+    def test_no_lockfile(self):
+        """Repositories without a known lockfile get an empty environment."""
+        os.remove(os.path.join(self.repos[0], "deps.lock"))
+        self.assertEqual(deps_cache.ensure_dependencies(self.repos[0], self.cache), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Dev-Server Installer Tests
+
+Unit tests for cloning the Dev-Server-Workflow through the mirror cache
+and for creating its .env file.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import dev_server_installer
+
+
+class TestCloneRepository(unittest.TestCase):
+    """Test mirror-cached and shallow clones of a local upstream repository."""
+
+    def setUp(self):
+        """Create an upstream repository with three commits."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.upstream = os.path.join(self.tmp.name, "Dev-Server-Workflow")
+        os.makedirs(self.upstream)
+        self._git(self.upstream, "init", "-q")
+        self._git(self.upstream, "config", "user.email", "ci@example.com")
+        self._git(self.upstream, "config", "user.name", "CI")
+        for index in range(3):
+            self._commit(index)
+        self.url = "file://" + self.upstream
+        self.mirrors = os.path.join(self.tmp.name, "mirrors")
+        for name, value in (("DEV_SERVER_REPO", self.url), ("MIRROR_DIR", self.mirrors)):
+            patcher = mock.patch.object(dev_server_installer, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _git(self, cwd, *args):
+        return subprocess.run(["git"] + list(args), cwd=cwd, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    def _commit(self, index):
+        with open(os.path.join(self.upstream, "README.md"), "a") as f:
+            f.write(f"change {index}\n")
+        self._git(self.upstream, "add", "README.md")
+        self._git(self.upstream, "commit", "-q", "-m", f"Change {index}")
+
+    def test_clone_through_mirror(self):
+        """Installs are cloned from the mirror, which is updated incrementally."""
+        first = os.path.join(self.tmp.name, "first")
+        dev_server_installer.clone_repository(first)
+
+        mirror = os.path.join(self.mirrors, "Dev-Server-Workflow.git")
+        alternates = os.path.join(first, ".git", "objects", "info", "alternates")
+        self.assertFalse(os.path.exists(alternates))
+        self.assertEqual(self._git(first, "remote", "get-url", "origin"), self.url)
+        self.assertEqual(self._git(first, "rev-list", "--count", "HEAD"), "3")
+
+        self._commit(3)
+        second = os.path.join(self.tmp.name, "second")
+        dev_server_installer.clone_repository(second)
+        self.assertEqual(self._git(second, "rev-parse", "HEAD"),
+                         self._git(self.upstream, "rev-parse", "HEAD"))
+        self.assertEqual(self._git(mirror, "rev-list", "--count", "--all"), "4")
+
+        # The installs keep working without the mirror
+        shutil.rmtree(self.mirrors)
+        result = subprocess.run(["git", "log", "--oneline"], cwd=second,
+                                capture_output=True, text=True)
+        self.assertEqual((result.returncode, result.stderr), (0, ""))
+        self.assertEqual(len(result.stdout.splitlines()), 4)
+
+    def test_mirror_skips_pull_request_refs(self):
+        """The mirror only holds branches and tags, also after an update."""
+        self._git(self.upstream, "tag", "v1")
+        self._git(self.upstream, "update-ref", "refs/pull/1/head", "HEAD~1")
+        mirror = dev_server_installer.refresh_mirror(self.url)
+        self._commit(3)
+        self._git(self.upstream, "update-ref", "refs/pull/2/head", "HEAD")
+        dev_server_installer.refresh_mirror(self.url)
+
+        refs = self._git(mirror, "for-each-ref", "--format=%(refname)").splitlines()
+        self.assertIn("refs/tags/v1", refs)
+        self.assertFalse([ref for ref in refs if ref.startswith("refs/pull/")])
+        self.assertEqual(self._git(mirror, "rev-parse", "HEAD"),
+                         self._git(self.upstream, "rev-parse", "HEAD"))
+
+    def test_shallow_clone_without_mirror(self):
+        """Without the mirror a shallow clone is made."""
+        target = os.path.join(self.tmp.name, "shallow")
+        dev_server_installer.clone_repository(target, mirror=False)
+
+        self.assertFalse(os.path.exists(self.mirrors))
+        self.assertEqual(self._git(target, "rev-list", "--count", "HEAD"), "1")
+        self.assertEqual(self._git(target, "rev-parse", "--is-shallow-repository"), "true")
+
+    def test_unreachable_upstream(self):
+        """No mirror is returned if it can't be created."""
+        self.assertIsNone(dev_server_installer.refresh_mirror(self.url + "-missing"))
+
+
+class TestCreateEnvFile(unittest.TestCase):
+    """Test creating the .env file without prompting."""
+
+    def setUp(self):
+        """Create an install directory with an env template."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.makedirs(os.path.join(self.tmp.name, "src"))
+        with open(os.path.join(self.tmp.name, "src", "env-template"), "w") as f:
+            f.write("N8N_PORT=5678\n")
+        self.env_path = os.path.join(self.tmp.name, ".env")
+
+    def _read(self):
+        with open(self.env_path) as f:
+            return f.read()
+
+    def test_existing_env_file_is_kept(self):
+        """An edited .env file is kept without asking; a missing one comes from the template."""
+        with mock.patch("builtins.input", side_effect=AssertionError("prompted")):
+            dev_server_installer.create_env_file(self.tmp.name)
+            self.assertEqual(self._read(), "N8N_PORT=5678\n")
+            with open(self.env_path, "w") as f:
+                f.write("N8N_PORT=9999\n")
+            dev_server_installer.create_env_file(self.tmp.name)
+        self.assertEqual(self._read(), "N8N_PORT=9999\n")
+
+    def test_custom_env_file_is_copied(self):
+        """A custom .env file replaces the existing one."""
+        custom = os.path.join(self.tmp.name, "custom.env")
+        with open(custom, "w") as f:
+            f.write("N8N_PORT=1234\n")
+        with open(self.env_path, "w") as f:
+            f.write("N8N_PORT=9999\n")
+        dev_server_installer.create_env_file(self.tmp.name, custom)
+        self.assertEqual(self._read(), "N8N_PORT=1234\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Failure Index Tests
+
+Unit tests for failure fingerprints and the open issue index.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import failure_index
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/home/ci/work-{run}/repo/app/calc.py", line {line}, in divide
+    return a / b
+ZeroDivisionError: division by zero"""
+
+
+def make_failure(test_id="tests/test_calc.py::test_divide", run=1, line=10):
+    return {"test_id": test_id, "message": "ZeroDivisionError: division by zero",
+            "traceback": TRACEBACK.format(run=run, line=line)}
+
+
+class TestFailureIndex(unittest.TestCase):
+    """Test fingerprinting and syncing with open issues."""
+
+    def setUp(self):
+        """Use a temporary index file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index_file = os.path.join(self.tmp.name, "index.json")
+
+    def test_fingerprint_ignores_volatile_details(self):
+        """Line numbers and checkout paths don't change the fingerprint."""
+        first = failure_index.fingerprint(make_failure(run=1, line=10))
+        self.assertEqual(first, failure_index.fingerprint(make_failure(run=2, line=12)))
+        self.assertNotEqual(first, failure_index.fingerprint(
+            make_failure(test_id="tests/test_calc.py::test_other")))
+        self.assertEqual(failure_index.exception_type(make_failure()), "ZeroDivisionError")
+
+    def test_sync_keeps_only_open_issues(self):
+        """Open issues with a marker are indexed; closed ones drop out."""
+        index = failure_index.FailureIndex("/repo", self.index_file)
+        index.record("0" * 16, 5, "closed test")
+        open_issues = [{"number": 7, "body": "Failure\n" + failure_index.marker("a" * 16)}]
+        completed = subprocess.CompletedProcess([], 0, stdout=json.dumps(open_issues), stderr="")
+
+        with mock.patch.object(failure_index, "run_gh", return_value=completed):
+            self.assertTrue(index.sync())
+
+        self.assertEqual(index.lookup("a" * 16), 7)
+        self.assertIsNone(index.lookup("0" * 16))
+
+    def test_index_is_saved_per_repository(self):
+        """Recorded fingerprints survive a reload."""
+        index = failure_index.FailureIndex("/repo", self.index_file)
+        index.record("b" * 16, "12", "tests/test_calc.py::test_divide")
+        index.save()
+
+        reloaded = failure_index.FailureIndex("/repo", self.index_file)
+        self.assertEqual(reloaded.lookup("b" * 16), 12)
+        other = failure_index.FailureIndex("/other", self.index_file)
+        self.assertIsNone(other.lookup("b" * 16))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Flaky Detector Tests
+
+Unit tests for confirming test failures by rerunning them in isolation.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import flaky_detector
+import report_parser
+import output_capture
+
+
+class TestFlakyDetector(unittest.TestCase):
+    """Test rerun commands, classification and the flakiness history."""
+
+    def setUp(self):
+        """Create a repository with one deterministic and one flaky failure."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = self.tmp.name
+        patcher = mock.patch.object(output_capture, "LOG_DIR", os.path.join(self.repo, ".logs"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.makedirs(os.path.join(self.repo, "tests"))
+        with open(os.path.join(self.repo, "tests", "test_mixed.py"), "w") as f:
+            f.write(
+                "import os\n"
+                "def test_broken():\n"
+                "    assert 1 == 2\n"
+                "def test_flaky():\n"
+                "    seen = os.path.exists('seen')\n"
+                "    open('seen', 'w').close()\n"
+                "    assert seen\n"
+            )
+        self.command = f"{sys.executable} -m pytest -q -p no:cacheprovider -o addopts= tests"
+
+    def test_rerun_command(self):
+        """pytest reruns the node ID, jest the file filtered by test name."""
+        command = flaky_detector.rerun_command(self.command, self.repo,
+                                               "tests/test_mixed.py::test_broken")
+        self.assertTrue(command.endswith("tests/test_mixed.py::test_broken"))
+        self.assertNotIn(" tests ", command + " ")
+
+        command = flaky_detector.rerun_command("npx jest", self.repo, "a.test.js > adds numbers")
+        self.assertIn("a.test.js", command)
+        self.assertIn("-t '^adds\\ numbers$'", command)
+
+        self.assertIsNone(flaky_detector.rerun_command("make check", self.repo, "x::y"))
+
+    def test_confirm_failures_separates_flaky_tests(self):
+        """A test passing on a rerun is flaky; one failing every rerun is confirmed."""
+        # The first run of test_flaky fails and leaves the marker behind
+        open(os.path.join(self.repo, "seen"), "w").close()
+        failures = [
+            {"test_id": "tests/test_mixed.py::test_broken", "message": "assert 1 == 2"},
+            {"test_id": "tests/test_mixed.py::test_flaky", "message": "assert False"},
+            {"test_id": "", "message": "raw output"},
+        ]
+
+        confirmed, flaky = flaky_detector.confirm_failures(failures, self.command, self.repo,
+                                                           reruns=2, jobs=2)
+
+        self.assertEqual([f["test_id"] for f in confirmed],
+                         ["tests/test_mixed.py::test_broken", ""])
+        self.assertEqual([f["test_id"] for f in flaky], ["tests/test_mixed.py::test_flaky"])
+        self.assertEqual(flaky[0]["reruns_passed"], 2)
+
+    def test_rerun_of_class_based_test(self):
+        """A flaky test inside a class is rerun by its JUnit node ID and found flaky."""
+        with open(os.path.join(self.repo, "tests", "test_cls.py"), "w") as f:
+            f.write(
+                "import os\n"
+                "class TestThing:\n"
+                "    def test_flaky(self):\n"
+                "        seen = os.path.exists('seen_cls')\n"
+                "        open('seen_cls', 'w').close()\n"
+                "        assert seen\n"
+            )
+        report_dir = os.path.join(self.repo, "reports")
+        os.makedirs(report_dir)
+        command = report_parser.report_command(f"{self.command}/test_cls.py", report_dir)
+        subprocess.run(command, shell=True, cwd=self.repo, capture_output=True)
+        failures = report_parser.collect_failures([report_dir], self.repo)
+        test_id = "tests/test_cls.py::TestThing::test_flaky"
+        self.assertEqual([f["test_id"] for f in failures], [test_id])
+
+        confirmed, flaky = flaky_detector.confirm_failures(failures, self.command, self.repo,
+                                                           reruns=1)
+
+        self.assertEqual(confirmed, [])
+        self.assertEqual([f["test_id"] for f in flaky], [test_id])
+
+    def test_no_reruns_confirms_everything(self):
+        """With reruns disabled, every failure is reported."""
+        failures = [{"test_id": "tests/test_mixed.py::test_flaky"}]
+        self.assertEqual(flaky_detector.confirm_failures(failures, self.command, self.repo, 0),
+                         (failures, []))
+
+    def test_history_tracks_flake_rate(self):
+        """The history counts confirmed and flaky outcomes per test and persists them."""
+        history_file = os.path.join(self.repo, "history.json")
+        history = flaky_detector.FlakyHistory(self.repo, history_file)
+        failure = {"test_id": "tests/test_mixed.py::test_flaky"}
+        history.record([], [failure])
+        history.record([failure], [])
+        history.save()
+
+        reloaded = flaky_detector.FlakyHistory(self.repo, history_file)
+        self.assertEqual(reloaded.flake_rate(failure["test_id"]), 0.5)
+        self.assertEqual(reloaded.tests[failure["test_id"]]["last_status"], "confirmed")
+        self.assertEqual(reloaded.flake_rate("unknown"), 0.0)
+
+    def test_concurrent_saves_are_merged(self):
+        """Histories saved from several threads at once keep every outcome."""
+        history_file = os.path.join(self.repo, "history.json")
+        failure = {"test_id": "tests/test_mixed.py::test_flaky"}
+
+        def run():
+            history = flaky_detector.FlakyHistory(self.repo, history_file)
+            history.record([], [failure])
+            history.save()
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reloaded = flaky_detector.FlakyHistory(self.repo, history_file)
+        self.assertEqual(reloaded.tests[failure["test_id"]]["flaky"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+GitHub Write Batcher Tests
+
+Unit tests for batching GitHub writes into GraphQL documents.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+from github_batch import GitHubWriteBatcher, WriteItem, build_mutation
+
+
+class TestGitHubBatch(unittest.TestCase):
+    """Test mutation building and per-item outcomes."""
+
+    def test_build_mutation_aliases_every_item(self):
+        """Each item becomes one aliased mutation with its own variables."""
+        items = [
+            WriteItem("comment", 7, body="Tests passed"),
+            WriteItem("close", 7),
+            WriteItem("label", 8, labels=["fix-me"]),
+        ]
+        query, variables, aliases = build_mutation(items, {7: "I_7", 8: "I_8"}, {"fix-me": "L_1"})
+
+        self.assertIn("m0: addComment(input: {subjectId: $node0, body: $body0})", query)
+        self.assertIn("m1: closeIssue(input: {issueId: $node1})", query)
+        self.assertIn("m2: addLabelsToLabelable", query)
+        self.assertEqual(variables["body0"], "Tests passed")
+        self.assertEqual(variables["labels2"], ["L_1"])
+        self.assertEqual(list(aliases), ["m0", "m1", "m2"])
+
+    def test_flush_reports_each_outcome(self):
+        """A failed mutation only fails its own item."""
+        batcher = GitHubWriteBatcher("owner/repo", background=False)
+        responses = [
+            ({"data": {"repository": {"n7": {"id": "I_7"}}}}, ""),
+            ({"data": {"m0": {"clientMutationId": None}, "m1": None},
+              "errors": [{"path": ["m1"], "message": "Could not close"}]}, "gh: error"),
+        ]
+        with mock.patch.object(batcher, "_graphql", side_effect=responses) as graphql:
+            comment = batcher.comment(7, "Fix verified")
+            close = batcher.close_issue(7)
+            items = batcher.flush()
+
+        self.assertEqual(graphql.call_count, 2)
+        self.assertEqual(items, [comment, close])
+        self.assertTrue(comment.ok)
+        self.assertFalse(close.ok)
+        self.assertEqual(close.error, "Could not close")
+
+    def test_rate_limited_items_are_resent(self):
+        """After a rate limit only the items that were not applied are sent again."""
+        batcher = GitHubWriteBatcher("owner/repo", background=False)
+        batcher._node_ids.update({7: "I_7", 8: "I_8"})
+        responses = [
+            ({"data": {"m0": {"clientMutationId": None}, "m1": None},
+              "errors": [{"path": ["m1"], "message": "was submitted too quickly"}]}, "gh: error"),
+            ({"data": {"m0": {"clientMutationId": None}}}, ""),
+        ]
+        with mock.patch.object(batcher, "_graphql", side_effect=responses) as graphql:
+            first = batcher.comment(7, "Fix verified")
+            second = batcher.comment(8, "Fix verified")
+            batcher.flush()
+
+        self.assertEqual(graphql.call_count, 2)
+        resent, variables = graphql.call_args.args
+        self.assertEqual(variables["node0"], "I_8")
+        self.assertNotIn("m1:", resent)
+        self.assertTrue(first.ok)
+        self.assertTrue(second.ok)
+
+    def test_unknown_number_fails_without_write(self):
+        """Items whose issue cannot be found are failed before the mutation."""
+        batcher = GitHubWriteBatcher("owner/repo", background=False)
+        response = ({"data": {"repository": {"n9": None}}}, "")
+        with mock.patch.object(batcher, "_graphql", return_value=response) as graphql:
+            item = batcher.close_issue(9)
+            batcher.flush()
+
+        self.assertEqual(graphql.call_count, 1)
+        self.assertFalse(item.ok)
+
+    def test_background_flush_on_size(self):
+        """A full batch is flushed without waiting for the delay."""
+        batcher = GitHubWriteBatcher("owner/repo", max_batch=2, max_delay=60)
+        batcher._node_ids = {1: "I_1", 2: "I_2"}
+        response = ({"data": {"m0": {}, "m1": {}}}, "")
+        with mock.patch.object(batcher, "_graphql", return_value=response):
+            first = batcher.close_issue(1)
+            second = batcher.close_issue(2)
+            self.assertTrue(first.wait(timeout=5))
+            self.assertTrue(second.wait(timeout=5))
+            batcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+GitHub Rate Limit Tests
+
+Unit tests for the shared GitHub rate limit budget.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import github_limits
+
+NOW = 1700000000.0
+
+
+class FakeClock:
+    """time replacement whose sleep advances the clock instantly."""
+
+    def __init__(self):
+        self.now = NOW
+        self.slept = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+def completed(returncode=0, stdout="", stderr=""):
+    return subprocess.CompletedProcess([], returncode, stdout=stdout, stderr=stderr)
+
+
+class TestGitHubLimits(unittest.TestCase):
+    """Test classification, budgeting, header parsing and retries."""
+
+    def setUp(self):
+        """Use a temporary state file, a fake clock and no budget lookups."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state_file = os.path.join(self.tmp.name, "limits.json")
+        self.clock = FakeClock()
+        for patcher in (mock.patch.object(github_limits, "time", self.clock),
+                        mock.patch.object(github_limits, "read_limits", return_value={})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _state(self, remaining, limit=5000, reset=NOW + 1000):
+        return {"resources": {"graphql": {"limit": limit, "remaining": remaining, "reset": reset}}}
+
+    def test_classify(self):
+        """Commands are mapped to their API resource and read/write kind."""
+        self.assertEqual(github_limits.classify(["gh", "issue", "list"]), ("graphql", False))
+        self.assertEqual(github_limits.classify(["gh", "pr", "comment", "3"]), ("graphql", True))
+        self.assertEqual(github_limits.classify(["gh", "api", "graphql", "--input", "-"],
+                                                "mutation { x }"), ("graphql", True))
+        self.assertEqual(github_limits.classify(["gh", "api", "repos/o/r/issues"]), ("core", False))
+        self.assertEqual(github_limits.classify(["gh", "api", "-X", "PATCH", "repos/o/r"]),
+                         ("core", True))
+        self.assertEqual(github_limits.classify(["gh", "--version"]), (None, False))
+
+    def test_idempotent(self):
+        """Reads and writes that can be applied twice are idempotent, mutations are not."""
+        self.assertTrue(github_limits.idempotent(["gh", "issue", "view", "3"]))
+        self.assertTrue(github_limits.idempotent(["gh", "issue", "close", "3"]))
+        self.assertTrue(github_limits.idempotent(["gh", "api", "-X", "PATCH", "repos/o/r"]))
+        self.assertFalse(github_limits.idempotent(["gh", "pr", "comment", "3"]))
+        self.assertFalse(github_limits.idempotent(["gh", "api", "repos/o/r/issues", "-f", "t=x"]))
+        self.assertFalse(github_limits.idempotent(["gh", "api", "graphql", "--input", "-"],
+                                                  "mutation { x }"))
+
+    def test_reads_leave_a_reserve_for_writes(self):
+        """Below the reserve, reads wait for the reset while writes go ahead."""
+        state = self._state(remaining=400)
+        self.assertEqual(github_limits._reserve(state, "graphql", False, NOW), 1000)
+        self.assertEqual(github_limits._reserve(state, "graphql", True, NOW), 0)
+        self.assertEqual(state["resources"]["graphql"]["remaining"], 399)
+
+    def test_writes_are_spaced(self):
+        """A second write waits for the write interval."""
+        state = self._state(remaining=4000)
+        self.assertEqual(github_limits._reserve(state, "graphql", True, NOW), 0)
+        self.assertAlmostEqual(github_limits._reserve(state, "graphql", True, NOW + 0.25), 0.75)
+
+    def test_read_bursts_are_smoothed(self):
+        """After a burst, reads are paced at the rate the budget allows."""
+        state = self._state(remaining=600)  # 100 above the reserve, reset in 1000s
+        waits = [github_limits._reserve(state, "graphql", False, NOW)
+                 for _ in range(github_limits.BURST + 1)]
+        self.assertEqual(waits[:-1], [0] * github_limits.BURST)
+        # 80 requests left above the reserve for 1000s
+        self.assertAlmostEqual(waits[-1], 1000 / 80.0)
+
+    def test_headers_update_the_budget(self):
+        """gh api responses are read with headers, which are stripped from the output."""
+        response = ("HTTP/2.0 200 OK\nX-Ratelimit-Limit: 5000\nX-Ratelimit-Remaining: 42\n"
+                    f"X-Ratelimit-Reset: {int(NOW) + 60}\nX-Ratelimit-Resource: core\n\n"
+                    '{"id": 1}')
+        with mock.patch.object(github_limits.subprocess, "run",
+                               return_value=completed(stdout=response)) as run:
+            result = github_limits.run_gh(["gh", "api", "repos/o/r/issues/comments/1"],
+                                          state_file=self.state_file)
+
+        self.assertEqual(json.loads(result.stdout), {"id": 1})
+        self.assertEqual(run.call_args.args[0], ["gh", "api", "--include",
+                                                 "repos/o/r/issues/comments/1"])
+        with open(self.state_file) as f:
+            self.assertEqual(json.load(f)["resources"]["core"]["remaining"], 42)
+
+    def test_secondary_limit_is_retried(self):
+        """A secondary rate limit blocks for the backoff time and retries."""
+        responses = [completed(1, stderr="HTTP 403: You have exceeded a secondary rate limit"),
+                     completed(stdout="ok")]
+        with mock.patch.object(github_limits.subprocess, "run", side_effect=responses) as run:
+            result = github_limits.run_gh(["gh", "issue", "close", "3"],
+                                          state_file=self.state_file)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(run.call_count, 2)
+        self.assertGreaterEqual(self.clock.slept, github_limits.SECONDARY_BACKOFF)
+
+    def test_rate_limited_mutation_is_not_retried(self):
+        """A rate-limited mutation document is returned, but later requests still wait."""
+        response = completed(1, stderr="HTTP 429: Too Many Requests")
+        with mock.patch.object(github_limits.subprocess, "run", return_value=response) as run:
+            result = github_limits.run_gh(["gh", "api", "graphql", "--input", "-"],
+                                          input='{"query": "mutation { x }"}',
+                                          state_file=self.state_file)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(run.call_count, 1)
+        with open(self.state_file) as f:
+            self.assertGreaterEqual(json.load(f)["blocked_until"],
+                                    NOW + github_limits.SECONDARY_BACKOFF)
+
+    def test_other_errors_are_not_retried(self):
+        """Errors that are not rate limits are returned at once."""
+        with mock.patch.object(github_limits.subprocess, "run",
+                               return_value=completed(1, stderr="HTTP 404: Not Found")) as run:
+            result = github_limits.run_gh(["gh", "issue", "view", "3"], state_file=self.state_file)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(run.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
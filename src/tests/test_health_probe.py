@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Health Probe Tests
+
+Unit tests for the concurrent TCP/HTTP health probes and their cache.
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import health_probe
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Healthy n8n endpoint, failing Grafana endpoint."""
+
+    requests = 0
+
+    def do_GET(self):
+        Handler.requests += 1
+        self.send_response(200 if self.path == "/healthz" else 503)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+class TestHealthProbe(unittest.TestCase):
+    """Test probing components and caching the results."""
+
+    def setUp(self):
+        """Serve the health endpoints on a local port."""
+        self.server = ThreadingHTTPServer(("localhost", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        port = str(self.server.server_address[1])
+        self.env = dict(health_probe.DEFAULT_PORTS, N8N_PORT=port, GRAFANA_PORT=port,
+                        PROMETHEUS_PORT=str(free_port()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_file = os.path.join(self.tmp.name, "health.json")
+        Handler.requests = 0
+
+    def check(self, **kwargs):
+        return health_probe.check_health(components=["n8n", "grafana", "prometheus"], env=self.env,
+                                         cache_file=self.cache_file, timeout=1, **kwargs)
+
+    def test_states(self):
+        """Components are up, degraded or down with latencies measured."""
+        health = self.check()
+
+        self.assertEqual(health["n8n"]["state"], "up")
+        self.assertEqual(health["n8n"]["http_status"], 200)
+        self.assertGreaterEqual(health["n8n"]["http_ms"], 0)
+        self.assertEqual(health["grafana"]["state"], "degraded")
+        self.assertEqual(health["grafana"]["error"], "HTTP 503")
+        self.assertEqual(health["prometheus"]["state"], "down")
+        self.assertIsNone(health["prometheus"]["http_ms"])
+
+    def test_results_are_cached(self):
+        """Fresh results are reused; a changed port or ttl 0 probes again."""
+        self.check()
+        self.assertEqual(Handler.requests, 2)
+
+        self.check()
+        self.assertEqual(Handler.requests, 2)
+
+        self.check(ttl=0)
+        self.assertEqual(Handler.requests, 4)
+
+        self.env["GRAFANA_PORT"] = str(free_port())
+        health = self.check()
+        self.assertEqual(Handler.requests, 4)
+        self.assertEqual(health["grafana"]["state"], "down")
+
+    def test_component_env(self):
+        """The .env of the installation overrides the default ports."""
+        with open(os.path.join(self.tmp.name, ".env"), "w") as f:
+            f.write("N8N_PORT=15678\n")
+        env = health_probe.component_env(self.tmp.name)
+
+        self.assertEqual(env["N8N_PORT"], "15678")
+        self.assertEqual(env["GRAFANA_PORT"], "3001")
+
+    def test_main_json(self):
+        """The script prints JSON and fails if a component is not up."""
+        args = mock.Mock(install_dir=self.tmp.name, components="n8n", max_age=0, timeout=1,
+                         json=True)
+        with open(os.path.join(self.tmp.name, ".env"), "w") as f:
+            f.write(f"N8N_PORT={self.env['N8N_PORT']}\n")
+        with mock.patch.object(health_probe, "parse_args", return_value=args), \
+                mock.patch.object(health_probe, "HEALTH_FILE", self.cache_file), \
+                mock.patch("builtins.print") as printed:
+            self.assertEqual(health_probe.main(), 0)
+        self.assertIn('"state": "up"', printed.call_args[0][0])
+
+    def test_unknown_components_are_rejected(self):
+        """Unknown component names are an error instead of being skipped."""
+        with self.assertRaisesRegex(ValueError, "Unknown components: n8m"):
+            health_probe.check_health(self.tmp.name, ["n8n", "n8m"], env=self.env,
+                                      cache_file=self.cache_file)
+        args = mock.Mock(install_dir=self.tmp.name, components="n8n,grafna", max_age=0,
+                         timeout=1, json=True)
+        with mock.patch.object(health_probe, "parse_args", return_value=args), \
+                mock.patch("builtins.print") as printed:
+            self.assertEqual(health_probe.main(), 1)
+        self.assertIn("Unknown components: grafna", printed.call_args[0][0])
+        self.assertFalse(os.path.exists(self.cache_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
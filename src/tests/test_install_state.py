@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Install State Tests
+
+Unit tests for skipping installation steps with unchanged fingerprints.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import install_state
+
+
+class TestInstallState(unittest.TestCase):
+    """Test when steps run and when they are skipped."""
+
+    def setUp(self):
+        """Use a temporary state file and output file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state_file = os.path.join(self.tmp.name, "state.json")
+        self.output = os.path.join(self.tmp.name, ".env")
+        self.calls = 0
+
+    def state(self, force=False):
+        return install_state.InstallState("test", self.state_file, force=force)
+
+    def write_output(self):
+        self.calls += 1
+        with open(self.output, "w") as f:
+            f.write("N8N_PORT=5678\n")
+
+    def run_step(self, state, inputs=None, action=None):
+        return state.run("env-file", action or self.write_output, inputs or {"template": "a"},
+                         [self.output])
+
+    def test_unchanged_step_is_skipped(self):
+        """A step runs once and is skipped while nothing changed."""
+        self.run_step(self.state())
+        state = self.state()
+        self.assertTrue(self.run_step(state))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(state.skipped, ["env-file"])
+
+    def test_changed_inputs_or_drifted_outputs_run_again(self):
+        """New inputs, edited or deleted outputs and --force run the step again."""
+        self.run_step(self.state())
+        self.run_step(self.state(), {"template": "b"})
+        self.assertEqual(self.calls, 2)
+
+        with open(self.output, "a") as f:
+            f.write("GRAFANA_PORT=3001\n")
+        self.run_step(self.state(), {"template": "b"})
+        self.assertEqual(self.calls, 3)
+
+        os.remove(self.output)
+        self.run_step(self.state(), {"template": "b"})
+        self.assertEqual(self.calls, 4)
+
+        self.run_step(self.state(force=True), {"template": "b"})
+        self.assertEqual(self.calls, 5)
+
+    def test_failed_step_runs_again(self):
+        """Steps that raised or returned False are not skipped."""
+        def fail():
+            raise OSError("no space left")
+
+        with self.assertRaises(OSError):
+            self.run_step(self.state(), action=fail)
+        self.assertEqual(self.run_step(self.state(), action=lambda: False), False)
+        self.run_step(self.state())
+        self.assertEqual(self.calls, 1)
+
+    def test_outputs_resolved_after_the_step(self):
+        """Outputs given as a callable are fingerprinted after the step ran."""
+        def outputs():
+            return [self.output] if os.path.exists(self.output) else []
+
+        state = self.state()
+        state.run("cli", self.write_output, outputs=outputs)
+        state.run("cli", self.write_output, outputs=outputs)
+        self.assertEqual(self.calls, 1)
+
+    def test_missing_command_runs_again(self):
+        """A looked-up output that is missing after the step is not skipped next time."""
+        state = self.state()
+        state.run("cli", self.write_output, outputs=lambda: {"gpt": None})
+        state.run("cli", self.write_output, outputs=lambda: {"gpt": None})
+        self.assertEqual(self.calls, 2)
+
+        state.run("cli", self.write_output, outputs=lambda: {"gpt": self.output})
+        state.run("cli", self.write_output, outputs=lambda: {"gpt": self.output})
+        self.assertEqual(self.calls, 3)
+
+    def test_fingerprint(self):
+        """Files are fingerprinted by content and mode."""
+        self.assertIsNone(install_state.fingerprint(self.output))
+        self.write_output()
+        before = install_state.fingerprint(self.output)
+        os.chmod(self.output, 0o755)
+        self.assertNotEqual(install_state.fingerprint(self.output), before)
+
+    def test_run_step_without_state(self):
+        """Without a state the action always runs."""
+        install_state.run_step(None, "env-file", self.write_output)
+        install_state.run_step(None, "env-file", self.write_output)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
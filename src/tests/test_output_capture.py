@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Output Capture Tests
+
+Unit tests for streaming test output to disk with bounded excerpts.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import output_capture
+
+
+class TestOutputCapture(unittest.TestCase):
+    """Test the excerpt buffer, streaming and comment excerpts."""
+
+    def setUp(self):
+        """Write logs to a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_excerpt_keeps_head_and_tail(self):
+        """Only the first and last lines are kept in memory."""
+        excerpt = output_capture.OutputExcerpt(head_lines=2, tail_lines=3)
+        for index in range(100):
+            excerpt.add(f"line {index}\n")
+        self.assertEqual(excerpt.omitted, 95)
+        text = excerpt.text()
+        self.assertTrue(text.startswith("line 0\nline 1\n"))
+        self.assertTrue(text.endswith("line 97\nline 98\nline 99\n"))
+        self.assertIn("95 lines omitted", text)
+
+    def test_run_streaming_writes_full_log(self):
+        """The log file holds all output while the result holds an excerpt."""
+        log_path = os.path.join(self.tmp.name, "test.log")
+        command = (f"{sys.executable} -c \"import sys\n"
+                   "for i in range(5000): print('out', i)\n"
+                   "print('problem', file=sys.stderr); sys.exit(3)\"")
+
+        result = output_capture.run_streaming(command, log_path=log_path)
+
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.log_path, log_path)
+        self.assertIn("out 4999", result.stdout)
+        self.assertIn("lines omitted", result.stdout)
+        self.assertEqual(result.stderr, "problem\n")
+        with open(log_path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 5001)
+
+    def test_excerpt_text_respects_limit(self):
+        """Comment excerpts stay close to the limit and keep the end of the output."""
+        text = "x" * 1000 + "END"
+        excerpt = output_capture.excerpt_text(text, limit=100)
+        self.assertLess(len(excerpt), 200)
+        self.assertIn("END", excerpt)
+        self.assertEqual(output_capture.excerpt_text("short", limit=100), "short")
+
+    def test_prune_keeps_recent_logs(self):
+        """Only old logs beyond the newest ones are removed."""
+        log_dir = os.path.join(self.tmp.name, "logs")
+        os.makedirs(log_dir)
+        for index in range(4):
+            path = os.path.join(log_dir, f"test-{index}.log")
+            open(path, "w").close()
+            if index < 2:
+                os.utime(path, (0, index))
+        output_capture.prune_logs(log_dir, keep=1)
+        self.assertEqual(sorted(os.listdir(log_dir)), ["test-2.log", "test-3.log"])
+
+
+if __name__ == "__main__":
+    unittest.main()
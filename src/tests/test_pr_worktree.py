@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+PR Worktree Tests
+
+Unit tests for checking out pull requests into cached worktrees.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import pr_worktree
+
+
+def git(*args, cwd):
+    return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+                          + list(args), cwd=cwd, check=True, capture_output=True, text=True)
+
+
+class TestPrWorktree(unittest.TestCase):
+    """Test worktree checkout, reuse and pruning."""
+
+    def setUp(self):
+        """Create an origin with a pull request ref and a clone of it."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.origin = os.path.join(self.tmp.name, "origin")
+        self.repo = os.path.join(self.tmp.name, "repo")
+        self.worktrees = os.path.join(self.tmp.name, "worktrees")
+
+        git('init', '-q', self.origin, cwd=self.tmp.name)
+        self._commit("README.md", "main\n")
+        git('checkout', '-q', '-b', 'feature', cwd=self.origin)
+        self._commit("feature.txt", "first\n")
+        git('update-ref', 'refs/pull/1/head', 'HEAD', cwd=self.origin)
+        git('checkout', '-q', '-', cwd=self.origin)
+        git('clone', '-q', self.origin, self.repo, cwd=self.tmp.name)
+
+    def _commit(self, name, content):
+        with open(os.path.join(self.origin, name), "w") as f:
+            f.write(content)
+        git('add', name, cwd=self.origin)
+        git('commit', '-q', '-m', name, cwd=self.origin)
+
+    def test_checkout_leaves_repository_untouched(self):
+        """The PR is checked out in its worktree, not in the repository."""
+        with pr_worktree.checkout_worktree(1, self.repo, self.worktrees) as path:
+            self.assertIsNotNone(path)
+            self.assertTrue(os.path.exists(os.path.join(path, "feature.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.repo, "feature.txt")))
+        branch = git('rev-parse', '--abbrev-ref', 'HEAD', cwd=self.repo).stdout.strip()
+        self.assertNotEqual(branch, "HEAD")
+
+    def test_worktree_is_reused_with_new_head(self):
+        """A second check reuses the worktree and picks up new commits."""
+        with pr_worktree.checkout_worktree(1, self.repo, self.worktrees) as first:
+            with open(os.path.join(first, "stray.txt"), "w") as f:
+                f.write("left over\n")
+
+        git('checkout', '-q', 'feature', cwd=self.origin)
+        self._commit("feature.txt", "second\n")
+        git('update-ref', 'refs/pull/1/head', 'HEAD', cwd=self.origin)
+
+        with pr_worktree.checkout_worktree(1, self.repo, self.worktrees) as second:
+            self.assertEqual(first, second)
+            with open(os.path.join(second, "feature.txt")) as f:
+                self.assertEqual(f.read(), "second\n")
+            self.assertFalse(os.path.exists(os.path.join(second, "stray.txt")))
+
+    def test_prune_removes_unused_worktrees(self):
+        """Worktrees not used for keep_days are removed."""
+        with pr_worktree.checkout_worktree(1, self.repo, self.worktrees) as path:
+            pass
+        self.assertEqual(pr_worktree.prune_worktrees(self.repo, 1, self.worktrees), [])
+
+        old = time.time() - 2 * 86400
+        os.utime(path, (old, old))
+        self.assertEqual(pr_worktree.prune_worktrees(self.repo, 1, self.worktrees), [path])
+        self.assertFalse(os.path.exists(path))
+        worktrees = git('worktree', 'list', cwd=self.repo).stdout
+        self.assertNotIn(path, worktrees)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test Report Parser Tests
+
+Unit tests for parsing test reports into individual failures.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import report_parser
+
+JEST_REPORT = {
+    "testResults": [
+        {
+            "name": "/repo/src/__tests__/sum.test.js",
+            "status": "failed",
+            "assertionResults": [
+                {"fullName": "sum adds numbers", "status": "failed",
+                 "failureMessages": [
+                     "Error: expect(received).toBe(expected)\n    at sum.test.js:4:5"]},
+                {"fullName": "sum handles zero", "status": "passed", "failureMessages": []},
+            ],
+        }
+    ]
+}
+
+PYTEST_REPORT = {
+    "tests": [
+        {"nodeid": "tests/test_app.py::test_ok", "outcome": "passed"},
+        {"nodeid": "tests/test_app.py::test_bad", "outcome": "failed",
+         "call": {"outcome": "failed",
+                  "crash": {"message": "AssertionError: assert 1 == 2"},
+                  "longrepr": "def test_bad():\n>       assert 1 == 2\nE       AssertionError"}},
+    ]
+}
+
+
+class TestReportParser(unittest.TestCase):
+    """Test the report parsers and the report options."""
+
+    def setUp(self):
+        """Create a temporary report directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        return path
+
+    def test_junit_class_based_tests(self):
+        """Test classes are kept in the node ID, so equal names in two classes stay apart."""
+        path = self._write("junit-0.xml", """<testsuites><testsuite>
+<testcase classname="tests.test_cls.TestA" name="test_x"><failure message="a">A</failure></testcase>
+<testcase classname="tests.test_cls.TestB" name="test_x"><failure message="b">B</failure></testcase>
+<testcase classname="tests.test_cls" name="test_plain"><error message="c">C</error></testcase>
+</testsuite></testsuites>""")
+
+        failures = report_parser.parse_junit_xml(path)
+        self.assertEqual([failure["test_id"] for failure in failures],
+                         ["tests/test_cls.py::TestA::test_x", "tests/test_cls.py::TestB::test_x",
+                          "tests/test_cls.py::test_plain"])
+        self.assertEqual({failure["file"] for failure in failures}, {"tests/test_cls.py"})
+
+    def test_jest_json(self):
+        """Only failed assertions become failures, with relative file names."""
+        path = self._write("jest.json", JEST_REPORT)
+        failures = report_parser.collect_failures([path], "/repo")
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]["test_id"], "src/__tests__/sum.test.js > sum adds numbers")
+        self.assertEqual(failures[0]["message"], "Error: expect(received).toBe(expected)")
+
+    def test_pytest_json(self):
+        """pytest-json-report failures carry the crash message and traceback."""
+        path = self._write("report.json", PYTEST_REPORT)
+        failures = report_parser.collect_failures([path])
+        self.assertEqual([failure["test_id"] for failure in failures],
+                         ["tests/test_app.py::test_bad"])
+        self.assertEqual(failures[0]["message"], "AssertionError: assert 1 == 2")
+        self.assertIn("assert 1 == 2", failures[0]["traceback"])
+
+    def test_jest_results(self):
+        """Every assertion becomes a result with its outcome and duration."""
+        report = json.loads(json.dumps(JEST_REPORT))
+        report["testResults"][0]["assertionResults"][1]["duration"] = 250
+        path = self._write("jest.json", report)
+        results = report_parser.collect_results([path], "/repo")
+        self.assertEqual([(result["outcome"], result["duration"]) for result in results],
+                         [("failed", 0.0), ("passed", 0.25)])
+        self.assertEqual(results[1]["file"], "src/__tests__/sum.test.js")
+
+    def test_has_report_option(self):
+        """Commands that already write a report are recognized."""
+        self.assertTrue(report_parser.has_report_option("pytest --junitxml=out.xml"))
+        self.assertTrue(report_parser.has_report_option("npx jest --json --outputFile=r.json"))
+        self.assertFalse(report_parser.has_report_option("pytest -q tests"))
+
+    def test_trim_traceback_keeps_the_end(self):
+        """Long tracebacks are cut from the top."""
+        text = "\n".join(f"frame {index}" for index in range(100))
+        trimmed = report_parser.trim_traceback(text, max_lines=5)
+        self.assertTrue(trimmed.endswith("frame 99"))
+        self.assertIn("95 lines omitted", trimmed)
+
+    def test_pytest_junit_report_end_to_end(self):
+        """report_command makes pytest write JUnit XML that parses into failures."""
+        repo = os.path.join(self.tmp.name, "repo")
+        os.makedirs(os.path.join(repo, "tests"))
+        with open(os.path.join(repo, "tests", "test_math.py"), "w") as f:
+            f.write("def test_ok():\n    assert True\n\n"
+                    "def test_bad():\n    assert 1 == 2, 'numbers differ'\n")
+        report_dir = os.path.join(self.tmp.name, "reports")
+        os.makedirs(report_dir)
+
+        command = report_parser.report_command(
+            f"{sys.executable} -m pytest -q -p no:cacheprovider -o addopts= tests", report_dir)
+        subprocess.run(command, shell=True, cwd=repo, capture_output=True)
+
+        failures = report_parser.collect_failures([report_dir], repo)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]["test_id"], "tests/test_math.py::test_bad")
+        self.assertIn("numbers differ", failures[0]["message"])
+        results = report_parser.collect_results([report_dir], repo)
+        self.assertEqual(sorted((result["test_id"], result["outcome"]) for result in results),
+                         [("tests/test_math.py::test_bad", "failed"),
+                          ("tests/test_math.py::test_ok", "passed")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test Result Cache Tests
+
+Unit tests for the tree-hash keyed test result cache.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import result_cache
+
+
+def git(*args, cwd):
+    return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+                          + list(args), cwd=cwd, check=True, capture_output=True, text=True)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cache keys, reuse policies and invalidation."""
+
+    def setUp(self):
+        """Create a repository with one commit and an empty cache."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = os.path.join(self.tmp.name, "repo")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        git('init', '-q', self.repo, cwd=self.tmp.name)
+        self._write("app.py", "print('hello')\n")
+        git('add', '-A', cwd=self.repo)
+        git('commit', '-q', '-m', 'initial', cwd=self.repo)
+        self.runs = 0
+
+    def _write(self, name, content):
+        with open(os.path.join(self.repo, name), "w") as f:
+            f.write(content)
+
+    def _run(self, returncode=0, timed_out=False, report_dir=None):
+        def run():
+            self.runs += 1
+            if report_dir:
+                with open(os.path.join(report_dir, "junit.xml"), "w") as f:
+                    f.write("<testsuite/>")
+            result = subprocess.CompletedProcess("make test", returncode,
+                                                 stdout="3 passed\n", stderr="")
+            result.timed_out = timed_out
+            return result
+        return run
+
+    def _cached_run(self, policy, returncode=0, timed_out=False, options=None, report_dir=None):
+        return result_cache.cached_run("make test", self.repo,
+                                       self._run(returncode, timed_out, report_dir), policy,
+                                       cache_dir=self.cache_dir, options=options,
+                                       report_dir=report_dir)
+
+    def test_tree_hash_tracks_uncommitted_changes(self):
+        """Edits and untracked files change the hash; the index is left alone."""
+        clean = result_cache.tree_hash(self.repo)
+        self._write("new.py", "x = 1\n")
+        dirty = result_cache.tree_hash(self.repo)
+        self.assertNotEqual(clean, dirty)
+        status = git('status', '--porcelain', cwd=self.repo).stdout
+        self.assertIn("?? new.py", status)
+
+    def test_reuse_passed(self):
+        """A passing result is reused for the same tree and command."""
+        self.assertEqual(self._cached_run("reuse-passed").returncode, 0)
+        result = self._cached_run("reuse-passed")
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(result.stdout, "3 passed\n")
+
+        self._write("app.py", "print('changed')\n")
+        self._cached_run("reuse-passed")
+        self.assertEqual(self.runs, 2)
+
+    def test_failures_are_only_reused_with_reuse_all(self):
+        """reuse-passed re-runs failures, reuse-all reuses them."""
+        self._cached_run("refresh", returncode=1)
+        self._cached_run("reuse-passed", returncode=1)
+        self.assertEqual(self.runs, 2)
+        self.assertEqual(self._cached_run("reuse-all").returncode, 1)
+        self.assertEqual(self.runs, 2)
+
+    def test_run_options_are_part_of_the_key(self):
+        """Runs with different outcome-relevant options don't share results."""
+        self._cached_run("reuse-passed", options={"fail_fast": False, "shards": 1})
+        self._cached_run("reuse-passed", options={"fail_fast": True, "shards": 1})
+        self._cached_run("reuse-passed", options={"fail_fast": False, "shards": 4})
+        self.assertEqual(self.runs, 3)
+        self._cached_run("reuse-passed", options={"fail_fast": True, "shards": 1,
+                                                  "record_history": False})
+        self.assertEqual(self.runs, 3)
+
+    def test_timed_out_runs_are_not_stored(self):
+        """A run that timed out is re-run instead of being reused."""
+        self._cached_run("reuse-all", returncode=-9, timed_out=True)
+        self.assertEqual(result_cache.list_entries(self.cache_dir), [])
+        self._cached_run("reuse-all")
+        self.assertEqual(self.runs, 2)
+
+    def test_reports_are_restored_on_cache_hit(self):
+        """The reports of a cached failure are copied into the report directory."""
+        first = os.path.join(self.tmp.name, "reports-1")
+        second = os.path.join(self.tmp.name, "reports-2")
+        os.makedirs(first)
+        os.makedirs(second)
+        self._cached_run("reuse-all", returncode=1, report_dir=first)
+        result = result_cache.cached_run("make test", self.repo, self._run(1), "reuse-all",
+                                         cache_dir=self.cache_dir, report_dir=second)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(result.returncode, 1)
+        with open(os.path.join(second, "junit.xml")) as f:
+            self.assertEqual(f.read(), "<testsuite/>")
+
+        self.assertEqual(result_cache.clear(self.cache_dir), 1)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "reports")), [])
+
+    def test_off_and_clear(self):
+        """The off policy bypasses the cache; clear removes entries."""
+        self._cached_run("off")
+        self.assertEqual(result_cache.list_entries(self.cache_dir), [])
+        self._cached_run("refresh")
+        self.assertEqual(len(result_cache.list_entries(self.cache_dir)), 1)
+        self.assertEqual(result_cache.clear(self.cache_dir), 1)
+        self.assertEqual(result_cache.list_entries(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Run History Tests
+
+Unit tests for the test history and the fail-fast test order.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import run_history
+import test_runner
+import output_capture
+
+
+def result(test_id, outcome, duration):
+    return {"test_id": test_id, "file": test_id.split("::")[0], "outcome": outcome,
+            "duration": duration}
+
+
+class TestRunHistory(unittest.TestCase):
+    """Test recording results, ordering files and fail-fast runs."""
+
+    def setUp(self):
+        """Create an empty history and a repository with a slow and a failing test."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.history_file = os.path.join(self.tmp.name, "history.json")
+        self.repo = os.path.join(self.tmp.name, "repo")
+        os.makedirs(os.path.join(self.repo, "tests"))
+        for patcher in (mock.patch.object(run_history, "HISTORY_FILE", self.history_file),
+                        mock.patch.object(output_capture, "LOG_DIR",
+                                          os.path.join(self.tmp.name, "logs"))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._write("tests/test_a_slow.py", "import time\n\ndef test_slow():\n    time.sleep(1)\n")
+        self._write("tests/test_b_fast.py", "def test_fast():\n    assert True\n")
+        self._write("tests/test_c_broken.py", "def test_broken():\n    assert 1 == 2\n")
+
+    def _write(self, path, content):
+        with open(os.path.join(self.repo, path), "w") as f:
+            f.write(content)
+
+    def test_order_prefers_failures_then_fast_files(self):
+        """Recently failing files come first, then new files, then by duration."""
+        history = run_history.RunHistory(self.repo)
+        history.record([result("a.py::t", "passed", 5.0), result("b.py::t", "passed", 0.1),
+                        result("c.py::t", "failed", 2.0), result("d.py::t", "skipped", 0),
+                        result("e.py::t", "passed", 0.1)])
+
+        self.assertEqual(history.order(["a.py", "b.py", "c.py", "new.py"]),
+                         ["c.py", "new.py", "b.py", "a.py"])
+        self.assertEqual(history.order(["b.py", "e.py"], affected={"e.py"}), ["e.py", "b.py"])
+        self.assertNotIn("d.py::t", run_history.RunHistory(self.repo).tests)
+
+    def test_failure_score_decays(self):
+        """A test that passes again loses its priority over time."""
+        history = run_history.RunHistory(self.repo)
+        history.record([result("a.py::t", "failed", 1.0)])
+        for _ in range(10):
+            history.record([result("a.py::t", "passed", 1.0)])
+
+        self.assertLess(history.file_stats()["a.py"][1], 0.05)
+        self.assertEqual(history.tests["a.py::t"]["failures"], 1)
+
+    def test_fail_fast_command(self):
+        """pytest stops with -x, jest with --bail; other commands are unchanged."""
+        self.assertEqual(run_history.fail_fast_command("pytest -q"), "pytest -q -x")
+        self.assertEqual(run_history.fail_fast_command("npm test"), "npm test -- --bail")
+        self.assertEqual(run_history.fail_fast_command("make check"), "make check")
+        self._write("package.json", '{"scripts": {"test": "vitest run"}}')
+        self.assertEqual(run_history.fail_fast_command("npm test", self.repo), "npm test")
+
+    def test_prioritized_fail_fast_run(self):
+        """After a recorded failure, the failing file runs first and stops the run."""
+        command = f"{sys.executable} -m pytest -q -p no:cacheprovider -o addopts= tests"
+        first = test_runner.run_tests(command, self.repo)
+        self.assertIn("1 failed, 2 passed", first.stdout)
+
+        second = test_runner.run_tests(command, self.repo, prioritize=True, fail_fast=True)
+
+        self.assertNotEqual(second.returncode, 0)
+        self.assertIn("1 failed", second.stdout)
+        self.assertNotIn("passed", second.stdout)
+        tests = run_history.RunHistory(self.repo).tests
+        self.assertEqual(tests["tests/test_c_broken.py::test_broken"]["failures"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
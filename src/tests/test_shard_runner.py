@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Shard Runner Tests
+
+Unit tests for the parallel test sharding used by run_tests.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import shard_runner
+import output_capture
+
+
+class TestShardRunner(unittest.TestCase):
+    """Test framework detection, splitting and merged results."""
+
+    def setUp(self):
+        """Create a repository with a small pytest suite."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = self.tmp.name
+        patcher = mock.patch.object(output_capture, "LOG_DIR", os.path.join(self.repo, ".logs"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.makedirs(os.path.join(self.repo, "tests"))
+        os.makedirs(os.path.join(self.repo, "node_modules", "dep"))
+        for index in range(4):
+            self._write(f"tests/test_ok_{index}.py", "def test_ok():\n    assert True\n")
+        self._write("node_modules/dep/test_vendored.py", "def test_vendored():\n    assert False\n")
+
+    def _write(self, path, content):
+        with open(os.path.join(self.repo, path), "w") as f:
+            f.write(content)
+
+    def test_detect_framework(self):
+        """pytest and jest commands are recognized, others are not."""
+        self.assertEqual(shard_runner.detect_framework("python -m pytest -q"), "pytest")
+        self.assertEqual(shard_runner.detect_framework("npm test"), "jest")
+        self.assertEqual(shard_runner.detect_framework("npx jest --ci"), "jest")
+        self.assertIsNone(shard_runner.detect_framework("make check"))
+
+        self._write("package.json", '{"scripts": {"test": "vitest run"}}')
+        self.assertIsNone(shard_runner.detect_framework("npm test", self.repo))
+        self._write("package.json", '{"scripts": {"test": "react-scripts test"}}')
+        self.assertEqual(shard_runner.detect_framework("npm test", self.repo), "jest")
+
+    def test_split_into_shards_balances_files(self):
+        """Every file ends up in exactly one shard."""
+        files = shard_runner.discover_test_files(self.repo, "pytest")
+        self.assertEqual(len(files), 4)
+        groups = shard_runner.split_into_shards(files, 3, self.repo)
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(sorted(sum(groups, [])), sorted(files))
+        self.assertLessEqual(max(map(len, groups)) - min(map(len, groups)), 1)
+
+    def test_shard_command_for_npm(self):
+        """npm needs -- before the arguments passed to jest."""
+        command = shard_runner.shard_command("npm test", "jest", ["a.test.js"])
+        self.assertEqual(command, "npm test -- --runInBand a.test.js")
+
+    def test_run_sharded_merges_results(self):
+        """A failing shard fails the merged result and its output is kept."""
+        self._write("tests/test_broken.py", "def test_broken():\n    assert 1 == 2\n")
+        command = f"{sys.executable} -m pytest -q -p no:cacheprovider -o addopts= tests"
+
+        result = shard_runner.run_sharded(command, self.repo, 2)
+
+        self.assertIsNotNone(result)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("1 of 2 shards failed", result.stdout)
+        self.assertIn("test_broken", result.stdout)
+        self.assertNotIn("test_vendored", result.stdout)
+
+    def test_run_sharded_falls_back_for_unknown_commands(self):
+        """Commands that cannot be sharded return None."""
+        self.assertIsNone(shard_runner.run_sharded("make check", self.repo, 4))
+
+    def test_npm_test_of_other_runners_is_unchanged(self):
+        """An npm test script that doesn't run jest gets no jest arguments."""
+        self._write("package.json", '{"scripts": {"test": "vitest run"}}')
+        self._write("sum.test.js", "test('sum', () => {});\n")
+
+        self.assertIsNone(shard_runner.suite_files("npm test", self.repo))
+        self.assertIsNone(shard_runner.restrict_command("npm test", self.repo, ["sum.test.js"]))
+        self.assertIsNone(shard_runner.run_sharded("npm test", self.repo, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
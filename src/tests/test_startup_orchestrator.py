@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup Orchestrator Tests
+
+Unit tests for the dependency-ordered, parallel component startup.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import startup_orchestrator
+
+
+class FakeStack:
+    """Components that become ready a fixed time after their start."""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = failing
+        self.started = {}
+        self.lock = threading.Lock()
+
+    def start(self, name):
+        if name in self.failing:
+            raise subprocess.CalledProcessError(1, ["docker-start.sh", "start", name])
+        with self.lock:
+            self.started[name] = time.monotonic()
+
+    def probe(self, name):
+        started = self.started.get(name)
+        return started is not None and time.monotonic() - started >= self.delays.get(name, 0)
+
+    def ready_at(self, name):
+        return self.started[name] + self.delays.get(name, 0)
+
+
+class TestStartupOrchestrator(unittest.TestCase):
+    """Test the startup order, parallelism and failure handling."""
+
+    def run_stack(self, stack, names, ready_timeout=5):
+        return startup_orchestrator.start_components(names, stack.start, stack.probe,
+                                                     ready_timeout=ready_timeout, interval=0.01)
+
+    def test_resolve(self):
+        """Dependencies are added and come before their dependents."""
+        self.assertEqual(startup_orchestrator.resolve(["frontend", "grafana"]),
+                         ["n8n", "mcp-hub", "frontend", "prometheus", "grafana"])
+        self.assertEqual(startup_orchestrator.resolve(["custom"]), ["custom"])
+        with self.assertRaises(ValueError):
+            startup_orchestrator.resolve(["a"], {"a": {"depends": ["b"]}, "b": {"depends": ["a"]}})
+
+    def test_parallel_start_gated_on_readiness(self):
+        """Independent components start together, dependents after readiness."""
+        stack = FakeStack({"n8n": 0.2, "prometheus": 0.1, "mcp-hub": 0.1})
+        results = self.run_stack(stack, list(startup_orchestrator.COMPONENTS))
+
+        self.assertTrue(all(results[name]["status"] == "ready"
+                            for name in startup_orchestrator.COMPONENTS))
+        self.assertLess(abs(stack.started["n8n"] - stack.started["prometheus"]), 0.1)
+        self.assertGreaterEqual(stack.started["mcp-hub"], stack.ready_at("n8n"))
+        self.assertGreaterEqual(stack.started["frontend"], stack.ready_at("mcp-hub"))
+        self.assertGreaterEqual(stack.started["grafana"], stack.ready_at("prometheus"))
+        # n8n and mcp-hub one after the other bound the startup, not the sum of all delays
+        self.assertLess(results["total_seconds"], 0.5)
+        self.assertGreaterEqual(results["mcp-hub"]["seconds"], 0.1)
+
+    def test_failed_dependency_blocks_dependents(self):
+        """Dependents of a failed or unready component are not started."""
+        stack = FakeStack({"prometheus": 10}, failing=("n8n",))
+        results = self.run_stack(stack, ["frontend", "grafana"], ready_timeout=0.1)
+
+        self.assertEqual(results["n8n"]["status"], "failed")
+        self.assertEqual(results["mcp-hub"]["status"], "blocked")
+        self.assertEqual(results["frontend"]["status"], "blocked")
+        self.assertEqual(results["prometheus"]["status"], "timeout")
+        self.assertEqual(results["grafana"]["status"], "blocked")
+        self.assertEqual(set(stack.started), {"prometheus"})
+        self.assertFalse(startup_orchestrator.log_report(results))
+
+    def test_http_probe(self):
+        """Any answer but a server error counts as ready."""
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(401 if self.path == "/auth" else 503)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("localhost", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        self.assertTrue(startup_orchestrator.http_probe(f"http://localhost:{port}/auth"))
+        self.assertFalse(startup_orchestrator.http_probe(f"http://localhost:{port}/booting"))
+        server.shutdown()
+        server.server_close()
+        self.assertFalse(startup_orchestrator.http_probe(f"http://localhost:{port}/", timeout=0.5))
+
+    def test_component_url_from_env(self):
+        """Ports come from the .env file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            env_path = os.path.join(tmp, ".env")
+            with open(env_path, "w") as f:
+                f.write("# ports\nN8N_PORT=15678\nGRAFANA_PORT=\"13001\"\n")
+            env = startup_orchestrator.load_env(env_path)
+
+        self.assertEqual(startup_orchestrator.component_url("n8n", env),
+                         "http://localhost:15678/healthz")
+        self.assertEqual(startup_orchestrator.component_url("grafana", env),
+                         "http://localhost:13001/api/health")
+        self.assertIsNone(startup_orchestrator.component_url("prometheus", env))
+        self.assertIsNone(startup_orchestrator.component_url("custom", env))
+
+
+if __name__ == "__main__":
+    unittest.main()
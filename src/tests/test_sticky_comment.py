@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Sticky Comment Tests
+
+Unit tests for updating one result comment in place.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import sticky_comment
+from github_batch import GitHubWriteBatcher
+
+COMMENT = {"id": 101, "node_id": "IC_101"}
+
+
+class TestStickyComment(unittest.TestCase):
+    """Test result diffs, creating and updating the comment."""
+
+    def setUp(self):
+        """Use a temporary comment cache."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state_file = os.path.join(self.tmp.name, "sticky.json")
+
+    def _post(self, status, failing, **options):
+        return sticky_comment.post_sticky_comment(
+            7, "check-pr", f"Tests {status}", status, "x" * 100000, self.tmp.name, failing,
+            state_file=self.state_file, **options)
+
+    def test_result_diff(self):
+        """Status changes, new, fixed and remaining failures are listed."""
+        previous = {"status": "failed", "failing": ["a", "b"]}
+        self.assertEqual(sticky_comment.result_diff(previous, {"status": "failed",
+                                                               "failing": ["b", "c"]}),
+                         ["Newly failing (1): `c`", "Fixed (1): `a`", "Still failing: 1"])
+        self.assertEqual(sticky_comment.result_diff(previous, {"status": "passed", "failing": []}),
+                         ["Status: failed → passed", "Fixed (2): `a`, `b`"])
+        self.assertEqual(sticky_comment.result_diff(None, {"status": "passed", "failing": []}),
+                         ["First run."])
+
+    def test_first_run_posts_then_updates_in_place(self):
+        """The first run posts the comment; later runs edit it without searching."""
+        with mock.patch.object(sticky_comment, "find_comment", return_value=None) as find, \
+                mock.patch.object(sticky_comment, "_gh_api", return_value=COMMENT) as api:
+            self.assertTrue(self._post("failed", ["tests/test_a.py::test_a"]))
+            self.assertTrue(self._post("passed", []))
+
+        self.assertEqual(find.call_count, 1)
+        calls = [call.args for call in api.call_args_list]
+        (first, _, first_body), (second, _, second_body) = calls
+        self.assertEqual(first[:2], ["-X", "POST"])
+        self.assertEqual(second, ["-X", "PATCH", "repos/{owner}/{repo}/issues/comments/101"])
+        self.assertIn("<!-- openhands-workflow:check-pr -->", second_body)
+        self.assertIn("Status: failed → passed", second_body)
+        self.assertIn("Fixed (1): `tests/test_a.py::test_a`", second_body)
+        self.assertLess(len(second_body), sticky_comment.OUTPUT_CHARS + 1000)
+        self.assertEqual(sticky_comment.parse_state(second_body)["runs"], 2)
+
+    def test_deleted_comment_is_posted_again(self):
+        """If the edit fails, a new comment is posted."""
+        with mock.patch.object(sticky_comment, "find_comment",
+                               return_value=dict(COMMENT, state={"status": "failed", "runs": 4})), \
+                mock.patch.object(sticky_comment, "_gh_api",
+                                  side_effect=[None, {"id": 102, "node_id": "IC_102"}]) as api:
+            self.assertTrue(self._post("passed", []))
+
+        self.assertEqual(api.call_args_list[1].args[0][:2], ["-X", "POST"])
+        self.assertIn("First run.", api.call_args_list[1].args[2])
+
+    def test_batched_edit(self):
+        """With a write batcher, the comment is edited by its node ID."""
+        batcher = GitHubWriteBatcher("owner/repo", background=False)
+        with mock.patch.object(sticky_comment, "find_comment", return_value=dict(COMMENT)), \
+                mock.patch.object(batcher, "_graphql",
+                                  return_value=({"data": {"m0": {"clientMutationId": None}}}, "")
+                                  ) as graphql:
+            self._post("failed", ["a"], writer=batcher)
+            items = batcher.flush()
+
+        self.assertTrue(items[0].ok)
+        query, variables = graphql.call_args.args
+        self.assertEqual(graphql.call_count, 1)
+        self.assertIn("updateIssueComment(input: {id: $node0, body: $body0})", query)
+        self.assertEqual(variables["node0"], "IC_101")
+
+
+if __name__ == "__main__":
+    unittest.main()
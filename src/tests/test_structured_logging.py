@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Structured Logging Tests
+
+Unit tests for the queue-based JSON logging pipeline.
+"""
+
+import os
+import sys
+import gzip
+import json
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import structured_logging
+
+
+class TestStructuredLogging(unittest.TestCase):
+    """Test the JSON formatter, rotation and the queue pipeline."""
+
+    def setUp(self):
+        """Log into a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "test.log")
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(structured_logging.shutdown_logging)
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Extra fields are written next to the standard ones."""
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "Task %s created",
+                                   ("abc",), None)
+        record.issue = 12
+        record.stage = "trigger"
+        entry = json.loads(structured_logging.JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "Task abc created")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["issue"], 12)
+        self.assertEqual(entry["stage"], "trigger")
+        self.assertNotIn("args", entry)
+
+    def test_setup_logging_writes_json_lines(self):
+        """Records logged through the queue end up in the log file."""
+        logger = structured_logging.setup_logging("test", log_file=self.log_file, console=False)
+        logger.info("Verified", extra={"issue": 7, "status": "success"})
+        structured_logging.shutdown_logging()
+
+        with open(self.log_file) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["logger"], "test")
+        self.assertEqual(entries[0]["status"], "success")
+
+    def test_exception_is_kept_in_json_field(self):
+        """Tracebacks logged through the queue are stored in the exception field."""
+        logger = structured_logging.setup_logging("test", log_file=self.log_file, console=False)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Verification failed")
+        structured_logging.shutdown_logging()
+
+        with open(self.log_file) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry["message"], "Verification failed")
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_shutdown_restores_root_handlers(self):
+        """Shutting down removes the queue handler and restores the previous handlers."""
+        root = logging.getLogger()
+        previous = logging.NullHandler()
+        root.addHandler(previous)
+        self.addCleanup(root.removeHandler, previous)
+        handlers, level = root.handlers[:], root.level
+
+        structured_logging.setup_logging("test", console=False, level=logging.DEBUG)
+        structured_logging.setup_logging("test", console=False, level=logging.DEBUG)
+        structured_logging.shutdown_logging()
+
+        self.assertEqual(root.handlers, handlers)
+        self.assertEqual(root.level, level)
+
+    def test_rotation_compresses_old_files(self):
+        """Rotated log files are gzip-compressed and limited to the backup count."""
+        handler = structured_logging.CompressingRotatingFileHandler(
+            self.log_file, max_bytes=100, backup_count=2, rotate_interval=0)
+        handler.setFormatter(structured_logging.JsonFormatter())
+        for index in range(20):
+            handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1,
+                                           f"message {index}", None, None))
+        handler.close()
+
+        self.assertTrue(os.path.exists(self.log_file + ".1.gz"))
+        self.assertTrue(os.path.exists(self.log_file + ".2.gz"))
+        self.assertFalse(os.path.exists(self.log_file + ".3.gz"))
+        with gzip.open(self.log_file + ".1.gz", "rt") as f:
+            self.assertIn("message", json.loads(f.readline())["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
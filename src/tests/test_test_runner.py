@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test Runner Tests
+
+Unit tests for the shared, thread-safe test runner.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import test_runner
+import output_capture
+
+
+class TestTestRunner(unittest.TestCase):
+    """Test per-call working directories, timeouts, limits and environments."""
+
+    def setUp(self):
+        """Redirect the test logs into a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.object(output_capture, "LOG_DIR", os.path.join(self.tmp.name, ".logs"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_runs_use_their_own_directory(self):
+        """Runs from several threads each see their own cwd; the process cwd is unchanged."""
+        cwd = os.getcwd()
+        repos = []
+        for index in range(4):
+            repo = os.path.join(self.tmp.name, f"repo{index}")
+            os.makedirs(repo)
+            repos.append(repo)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda repo: test_runner.run_tests("pwd", repo), repos))
+
+        self.assertEqual([result.stdout.strip() for result in results],
+                         [os.path.realpath(repo) for repo in repos])
+        self.assertEqual(os.getcwd(), cwd)
+        for result in results:
+            self.assertGreaterEqual(result.duration, 0)
+            self.assertIsNotNone(result.cpu_time)
+            self.assertFalse(result.timed_out)
+
+    def test_timeout_kills_process_group(self):
+        """A timeout kills the command and the processes it started."""
+        start = time.time()
+        result = test_runner.run_tests("sleep 30 & sleep 30; wait", self.tmp.name, timeout=0.5)
+
+        self.assertLess(time.time() - start, 10)
+        self.assertTrue(result.timed_out)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("Timed out after 0.5 seconds", result.stderr)
+
+    def test_isolated_environment(self):
+        """Workflow credentials are removed; clean_env keeps only basic variables."""
+        base = {"PATH": "/bin", "GITHUB_TOKEN": "x", "OPENAI_API_KEY": "y", "APP_MODE": "test",
+                "LC_ALL": "C"}
+        self.assertEqual(test_runner.isolated_environment(base=base),
+                         {"PATH": "/bin", "OPENAI_API_KEY": "y", "APP_MODE": "test",
+                          "LC_ALL": "C"})
+        self.assertEqual(test_runner.isolated_environment(True, ["GITHUB_TOKEN"], base),
+                         {"PATH": "/bin", "GITHUB_TOKEN": "x", "LC_ALL": "C"})
+
+    def test_run_gets_private_tmpdir_and_no_credentials(self):
+        """The tests see their own TMPDIR, the extra variables and their own secrets."""
+        with mock.patch.dict(os.environ, {"GH_TOKEN": "secret", "DB_PASSWORD": "test"}):
+            result = test_runner.run_tests('echo "$TMPDIR|${GH_TOKEN:-none}|$DB_PASSWORD|$EXTRA"',
+                                           self.tmp.name, env={"EXTRA": "1"})
+        tmpdir, token, password, extra = result.stdout.strip().split("|")
+        self.assertIn("test-run-", tmpdir)
+        self.assertFalse(os.path.exists(tmpdir))
+        self.assertEqual((token, password, extra), ("none", "test", "1"))
+
+    def test_limit_command(self):
+        """Limits become ulimit calls in front of the command."""
+        self.assertEqual(test_runner.limit_command("make test"), "make test")
+        self.assertEqual(test_runner.limit_command("make test", 60, 512),
+                         "ulimit -t 60 && ulimit -v 524288 || exit 125\nmake test")
+        result = test_runner.run_tests("ulimit -t", self.tmp.name, cpu_limit=7)
+        self.assertEqual(result.stdout.strip(), "7")
+
+    def test_report_only_for_detected_frameworks(self):
+        """A non-jest `npm test` script runs unchanged; a jest script writes a report."""
+        commands = []
+
+        def run_streaming(command, **kwargs):
+            commands.append(command)
+            return mock.Mock(returncode=0, duration=0.0, cpu_time=None, timed_out=False)
+
+        for script in ("mocha --recursive", "jest --ci"):
+            with open(os.path.join(self.tmp.name, "package.json"), "w") as f:
+                json.dump({"scripts": {"test": script}}, f)
+            with mock.patch.object(test_runner, "run_streaming", side_effect=run_streaming), \
+                    mock.patch.object(test_runner, "record_results"):
+                test_runner.run_tests("npm test", self.tmp.name)
+
+        self.assertEqual(commands[0], "npm test")
+        self.assertIn("-- --json --outputFile=", commands[1])
+
+    def test_prioritize_only_orders_pytest_files(self):
+        """jest orders the files itself, so only pytest runs get a fail-fast order."""
+        files = ["tests/test_a.py", "tests/test_b.py"]
+        with mock.patch.object(test_runner, "RunHistory") as history:
+            history.return_value.order.return_value = files[::-1]
+            self.assertEqual(test_runner.prioritized_files("pytest -q", self.tmp.name, files),
+                             files[::-1])
+            self.assertIsNone(test_runner.prioritized_files("npx jest", self.tmp.name,
+                                                            ["a.test.js", "b.test.js"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
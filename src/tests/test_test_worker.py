@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test Worker Tests
+
+Unit tests for the warm pytest worker.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import test_worker
+import output_capture
+
+
+class TestTestWorker(unittest.TestCase):
+    """Test command parsing and runs in a real worker."""
+
+    def setUp(self):
+        """Create a repository with a passing and a failing test."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = os.path.join(self.tmp.name, "repo")
+        self.workers = os.path.join(self.tmp.name, "w")
+        os.makedirs(os.path.join(self.repo, "tests"))
+        patcher = mock.patch.object(output_capture, "LOG_DIR", os.path.join(self.tmp.name, "logs"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(test_worker.stop_workers, self.workers)
+        self._write("tests/test_ok.py",
+                    "import json\n\ndef test_ok():\n    assert json.loads('1') == 1\n")
+        self._write("tests/test_broken.py", "def test_broken():\n    assert 1 == 2\n")
+        self.python = os.path.basename(sys.executable)
+        self.env = dict(os.environ, PATH=os.path.dirname(sys.executable) + os.pathsep +
+                        os.environ.get("PATH", ""))
+
+    def _write(self, path, content):
+        with open(os.path.join(self.repo, path), "w") as f:
+            f.write(content)
+
+    def _run(self, command, **options):
+        return test_worker.run_in_worker(command, self.repo, self.env,
+                                         worker_dir=self.workers, **options)
+
+    def test_pytest_invocation(self):
+        """Plain pytest commands are accepted, shell constructs are not."""
+        interpreter, args, module_mode = test_worker.pytest_invocation(
+            f"{self.python} -m pytest -q tests", self.env)
+        self.assertTrue(os.path.samefile(interpreter, sys.executable))
+        self.assertEqual((args, module_mode), (["-q", "tests"], True))
+
+        _, args, _ = test_worker.pytest_invocation(
+            f"{self.python} -m pytest --junitxml=/r/junit-${{TEST_SHARD_INDEX:-0}}.xml", self.env)
+        self.assertEqual(args, ["--junitxml=/r/junit-0.xml"])
+
+        self.assertIsNone(test_worker.pytest_invocation("npm test", self.env))
+        self.assertIsNone(test_worker.pytest_invocation(
+            f"cd sub && {self.python} -m pytest", self.env))
+
+    def test_runs_reuse_one_worker(self):
+        """Several runs are served by the same worker and report their exit codes."""
+        base = f"{self.python} -m pytest -q -p no:cacheprovider -o addopts="
+
+        passed = self._run(f"{base} tests/test_ok.py")
+        failed = self._run(f"{base} tests")
+
+        self.assertEqual(passed.returncode, 0)
+        self.assertIn("1 passed", passed.stdout)
+        self.assertEqual(failed.returncode, 1)
+        self.assertIn("test_broken", failed.stdout)
+        self.assertIsNotNone(failed.cpu_time)
+        sockets = [name for name in os.listdir(self.workers) if name.endswith(".sock")]
+        self.assertEqual(len(sockets), 1)
+
+    def test_timeout_kills_run(self):
+        """A run exceeding its timeout is killed by the worker."""
+        self._write("tests/test_slow.py", "import time\n\ndef test_slow():\n    time.sleep(30)\n")
+
+        result = self._run(f"{self.python} -m pytest -q tests/test_slow.py", timeout=1)
+
+        self.assertTrue(result.timed_out)
+        self.assertLess(result.duration, 20)
+        self.assertNotEqual(result.returncode, 0)
+
+    def test_dependency_change_changes_worker(self):
+        """Changing a dependency file selects a different worker."""
+        before = test_worker.worker_key(sys.executable, self.repo)
+        self._write("requirements.txt", "requests\n")
+        self.assertNotEqual(test_worker.worker_key(sys.executable, self.repo), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tracing Tests
+
+Unit tests for the span tracing used by the fix pipeline.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+import tracing
+
+
+class TestTracing(unittest.TestCase):
+    """Test span export and the latency summary."""
+
+    def setUp(self):
+        """Write spans to a temporary trace file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trace_file = os.path.join(self.tmp.name, "traces.jsonl")
+        patcher = mock.patch.object(tracing, "TRACE_FILE", self.trace_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_issue_trace_id_is_stable(self):
+        """The same issue always maps to the same trace."""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            first = tracing.issue_trace_id(42, "owner/repo")
+            self.assertEqual(first, tracing.issue_trace_id(42, "owner/repo"))
+            self.assertNotEqual(first, tracing.issue_trace_id(43, "owner/repo"))
+            self.assertEqual(len(first), 32)
+
+    def test_traceparent_is_inherited(self):
+        """A child process joins the trace passed through TRACEPARENT."""
+        env = tracing.traceparent_env("a" * 32, "b" * 16, env={})
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.assertEqual(tracing.issue_trace_id(42, "owner/repo"), "a" * 32)
+            tracing.record_span("test_run", "a" * 32, 0, 1)
+        span = tracing.load_spans()[0]
+        self.assertEqual(span["parentSpanId"], "b" * 16)
+
+    def test_span_records_errors(self):
+        """Exceptions inside a span are exported as an error status."""
+        with self.assertRaises(ValueError):
+            with tracing.span("close", "c" * 32, parent_span_id=""):
+                raise ValueError("boom")
+        span = tracing.load_spans()[0]
+        self.assertEqual(span["name"], "close")
+        self.assertEqual(span["status"]["code"], "ERROR")
+
+    def test_summary_percentiles(self):
+        """The summary reports nearest-rank p50 and p95 per stage."""
+        for duration in range(1, 21):
+            tracing.record_span("poll", "d" * 32, 100, 100 + duration, parent_span_id="")
+        summary = tracing.summarize(tracing.load_spans())
+        self.assertEqual(summary["poll"]["count"], 20)
+        self.assertAlmostEqual(summary["poll"]["p50"], 10)
+        self.assertAlmostEqual(summary["poll"]["p95"], 19)
+
+
+if __name__ == "__main__":
+    unittest.main()